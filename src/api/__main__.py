@@ -3,13 +3,72 @@
 import uvicorn
 
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from api.core import Api, ApiResponse, ApiHttpException
+from api.core import (
+    LOG_CONFIG,
+    AccessLogMiddleware,
+    Api,
+    ApiJSONResponse,
+    ApiResponse,
+    ApiHttpException,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    RequestIdMiddleware,
+    StaticHeadersMiddleware,
+    TimingMiddleware,
+    metrics,
+)
 
 api = Api()
+# Error responses follow the API_RESPONSE_METADATA default of the resources
+ERROR_EXCLUDE = None if api.RESPONSE_METADATA else {"metatata"}
+
+
+def identify_user(request: Request):
+    """
+    Identify the caller of a request for the rate limiter.
+
+    The security stack (passlib, jwt, the DB drivers) is only imported once a
+    request carries a token, so lazy route loading also defers it.
+    """
+    if "Authorization" not in request.headers:
+        return None
+    from api.security import (  # pylint: disable=import-outside-toplevel
+        identify_user as identify,
+    )
+
+    return identify(request)
+
+
+api.rate_limiter.identify = identify_user
+
+
+def may_profile(request: Request) -> bool:
+    """Check that the caller of a request carrying the profile header is an admin."""
+    from api.security import (  # pylint: disable=import-outside-toplevel
+        may_profile as allowed,
+    )
+
+    return allowed(request)
+
+
+api.profiler.authorize = may_profile
+
+
+def cache_variant(request: Request, vary: str):
+    """Key of the caller of a request for responses cached per user or role."""
+    from api.security import (  # pylint: disable=import-outside-toplevel
+        cache_variant as variant,
+    )
+
+    return variant(request, vary)
+
+
+api.response_cache.variant = cache_variant
 
 
 @api.app.get("/")
@@ -23,21 +82,46 @@ def home():
     return {"message": "Hello World"}
 
 
-@api.app.middleware("http")
-async def after_request(request: Request, call_next):
+def install_middlewares():
     """
-    Middleware to add custom headers to the response.
-
-    Args:
-        request (Request): The incoming HTTP request.
-        call_next (Callable): The next middleware function in the chain.
+    Install the pure-ASGI middlewares, the last one added is the outermost.
 
-    Returns:
-        Response: The response object with the custom headers added.
+    `python -m api` runs this module as __main__, then uvicorn imports it
+    again as api.__main__: both share the Api.app singleton, so the
+    middlewares are only installed once.
     """
-    response = await call_next(request)
-    response.headers["X-Backend"] = "Sample API"
-    return response
+    if api.app.user_middleware:
+        return
+    api.app.add_middleware(StaticHeadersMiddleware, headers={"X-Backend": "Sample API"})
+    if api.REQUEST_ID:
+        api.app.add_middleware(RequestIdMiddleware)
+    if api.SERVER_TIMING:
+        api.app.add_middleware(TimingMiddleware)
+    if api.METRICS:
+        api.app.add_middleware(MetricsMiddleware)
+    if api.ACCESS_LOG:
+        # Replaces the uvicorn access log, which logs every request
+        api.app.add_middleware(AccessLogMiddleware, rates=api.ACCESS_LOG)
+    if api.profiler.enabled:
+        # Not installed at all when disabled
+        api.app.add_middleware(ProfilerMiddleware, profiler=api.profiler)
+
+
+install_middlewares()
+
+if api.METRICS:
+
+    @api.app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        """
+        Metrics endpoint, aggregated over the workers in multiprocess mode.
+
+        Returns:
+            PlainTextResponse: The metrics in the Prometheus text format.
+        """
+        return PlainTextResponse(
+            metrics.render(), media_type="text/plain; version=0.0.4"
+        )
 
 
 @api.app.exception_handler(StarletteHTTPException)
@@ -54,7 +138,9 @@ async def starlette_http_exception_handler(_: Request, exc: StarletteHTTPExcepti
     """
     api.app.logger.error("StarletteHTTPException: %s", exc)
     response = ApiResponse(status_code=exc.status_code, data=exc.detail)
-    return JSONResponse(status_code=exc.status_code, content=response.to_dict())
+    return ApiJSONResponse(
+        status_code=exc.status_code, content=response, exclude=ERROR_EXCLUDE
+    )
 
 
 @api.app.exception_handler(RequestValidationError)
@@ -70,8 +156,9 @@ async def validation_exception_handler(_: Request, exc: RequestValidationError):
         Response: A JSON response with the status code and data.
     """
     api.app.logger.error("RequestValidationError: %s", exc)
-    response = ApiResponse(status_code=422, data=exc.errors())
-    return JSONResponse(status_code=422, content=response.to_dict())
+    # The errors may hold exceptions, encoded like FastAPI's own handler does
+    response = ApiResponse(status_code=422, data=jsonable_encoder(exc.errors()))
+    return ApiJSONResponse(status_code=422, content=response, exclude=ERROR_EXCLUDE)
 
 
 @api.app.exception_handler(ApiHttpException)
@@ -86,10 +173,15 @@ async def http_exception_handler(_: Request, exc: ApiHttpException):
     Returns:
         Response: A JSON response with the status code and data.
     """
-    if hasattr(exc, "__cause__"):
+    if exc.__cause__ is not None:
         api.app.logger.error("ApiHttpException: %s", exc.__cause__)
     response = ApiResponse(status_code=exc.status_code, data=exc.data)
-    return JSONResponse(status_code=exc.status_code, content=response.to_dict())
+    return ApiJSONResponse(
+        status_code=exc.status_code,
+        content=response,
+        headers=exc.headers,
+        exclude=ERROR_EXCLUDE,
+    )
 
 
 @api.app.exception_handler(Exception)
@@ -106,51 +198,24 @@ async def all_exception_handler(_: Request, exc: Exception):
     """
     api.app.logger.error("Exception: %s", exc)
     response = ApiResponse(status_code=500, data="Internal Server Error")
-    return JSONResponse(status_code=500, content=response.to_dict())
+    return ApiJSONResponse(status_code=500, content=response, exclude=ERROR_EXCLUDE)
 
 
 def run():
-    """Method to start the server."""
+    """
+    Method to start a single server process, with reload in development.
+
+    Production deployments run `python -m api.launcher` instead, which
+    supervises several workers.
+    """
     uvicorn.run(
         "api.__main__:api.app",
         host=api.HOST,
         port=api.PORT,
         reload=api.IS_DEV,
         server_header=False,
-        log_config={
-            "version": 1,
-            "disable_existing_loggers": False,
-            "formatters": {
-                "default": {
-                    "format": "%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-                    "datefmt": "%Y-%m-%d %H:%M:%S",
-                }
-            },
-            "handlers": {
-                "default": {
-                    "level": "INFO",
-                    "class": "logging.StreamHandler",
-                    "formatter": "default",
-                }
-            },
-            "loggers": {
-                "uvicorn": {
-                    "level": "INFO",
-                    "handlers": ["default"],
-                    "propagate": False,
-                },
-                "uvicorn.error": {
-                    "level": "INFO",
-                    "handlers": ["default"],
-                    "propagate": False,
-                },
-                "uvicorn.access": {
-                    "level": "INFO",
-                    "handlers": ["default"],
-                    "propagate": False,
-                },
-            },
-        },
+        log_config=LOG_CONFIG,
+        access_log=False,
     )
 
 
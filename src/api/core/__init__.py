@@ -1,4 +1,19 @@
 """Core module."""
 
 from .__main__ import Api, ApiResource, ApiResponse
+from .cache import ResponseCache, cache_response
 from .exceptions import ApiHttpException
+from .logs import LOG_CONFIG, JsonFormatter, LogPipeline, pipeline
+from .metrics import Metrics, metrics
+from .middleware import (
+    AccessLogMiddleware,
+    MetricsMiddleware,
+    ProfilerMiddleware,
+    RequestIdMiddleware,
+    ResponseHeadersMiddleware,
+    StaticHeadersMiddleware,
+    TimingMiddleware,
+)
+from .profiler import Profiler
+from .responses import ApiJSONResponse
+from .ratelimit import BucketTable, RateLimiter, SharedBucketTable
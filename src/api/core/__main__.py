@@ -2,21 +2,29 @@
 
 import sys
 import logging
+import logging.config
 import importlib
 import ast
-from datetime import datetime
+import functools
+import inspect
+import threading
 from os import environ, walk, path
-from typing import Any, Dict
-from pydantic import BaseModel
-from fastapi import FastAPI
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, field_serializer
+from fastapi import Depends, FastAPI, Request, Response
 from fastapi_utils import Api as FastRestApi
 from fastapi_utils import Resource
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+from .cache import ResponseCache
+from .clock import clock
+from .lazy import LazyEndpoint, LazyRoute
+from .logs import LOG_CONFIG, parse_sample_rates
+from .manifest import RouteManifest
+from .profiler import Profiler
+from .ratelimit import RateLimiter
+from .responses import ApiJSONResponse
+
+logging.config.dictConfig(LOG_CONFIG)
 
 
 class Api:  # pylint: disable=too-few-public-methods
@@ -27,9 +35,32 @@ class Api:  # pylint: disable=too-few-public-methods
     HOST = environ.get("API_HOST", "0.0.0.0")
     PORT = int(environ.get("API_PORT", 3000))
     IS_DEV = environ.get("API_IS_DEV", "false").lower() == "true"
-    app = FastAPI(title="API", version="0.1.0", description="SAMPLE API")
+    REQUEST_ID = environ.get("API_REQUEST_ID", "true").lower() == "true"
+    METRICS = environ.get("API_METRICS", "true").lower() == "true"
+    SERVER_TIMING = environ.get("API_SERVER_TIMING", "false").lower() == "true"
+    STRICT_ROUTES = environ.get("API_STRICT_ROUTES", "false").lower() == "true"
+    ROUTES_MANIFEST = environ.get(
+        "API_ROUTES_MANIFEST", RouteManifest.default_filename(f"{__path_module}/routes")
+    )
+    LAZY_ROUTES = environ.get("API_LAZY_ROUTES", "false").lower() == "true"
+    WARMUP_ROUTES = [
+        route.strip()
+        for route in environ.get("API_WARMUP_ROUTES", "").split(",")
+        if route.strip()
+    ]
+    ACCESS_LOG = parse_sample_rates(environ.get("API_ACCESS_LOG", "*=1"))
+    RESPONSE_METADATA = environ.get("API_RESPONSE_METADATA", "false").lower() == "true"
+    rate_limiter = RateLimiter.from_env()
+    profiler = Profiler.from_env()
+    response_cache = ResponseCache.from_env()
+    app = FastAPI(
+        title="API",
+        version="0.1.0",
+        description="SAMPLE API",
+        dependencies=[Depends(rate_limiter)],
+        default_response_class=ApiJSONResponse,
+    )
     app.logger = logging.getLogger("api")
-    logging.basicConfig(level=logging.INFO)
     api = FastRestApi(app)
 
     app.logger.info("Host: %s", HOST)
@@ -37,6 +68,8 @@ class Api:  # pylint: disable=too-few-public-methods
     app.logger.info("IsDev: %s", IS_DEV)
 
     _instance = None
+    _lazy_routes: Dict[str, List[Dict[str, Any]]] = {}
+    _lazy_lock = threading.RLock()
 
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -49,9 +82,8 @@ class Api:  # pylint: disable=too-few-public-methods
 
     @staticmethod
     def _get_time():
-        """Get the current time."""
-        date_time = datetime.now()
-        return date_time.strftime("%Y-%m-%dT%H:%M:%S.%f%z")
+        """Get the current time, formatted by the cached clock."""
+        return clock.now()
 
     def get_first_class_name_from_init(self, file_path: str) -> str:
         """Get the first class name from the __init__.py file."""
@@ -79,63 +111,162 @@ class Api:  # pylint: disable=too-few-public-methods
         # If no class was found, return None or a default value
         return None
 
+    def _discover_routes(self) -> List[Dict[str, Any]]:
+        """Walk the routes directory and list the routes it serves."""
+        routes = []
+        routes_dir = f"{self.__path_module}/routes"
+        for dirname, dirnames, files in walk(routes_dir):
+            dirnames.sort()
+            if "__main__.py" not in files:
+                continue
+
+            result = path.relpath(dirname, routes_dir).split(path.sep)
+            module_name = ".".join(result)
+            self.app.logger.info("Filename routes/%s", "/".join(result))
+            module = importlib.import_module(module_name)
+            publish = bool(getattr(module, "publish", True))
+
+            if hasattr(module, "resources"):
+                for path_route, import_class in module.resources:
+                    routes.append(
+                        {
+                            "path": path_route,
+                            "module": module_name,
+                            "class": import_class.__name__,
+                            "publish": publish,
+                        }
+                    )
+            else:
+                # pylint: disable-next=invalid-name
+                className = self.get_first_class_name_from_init(dirname)
+                if not className:
+                    if self.STRICT_ROUTES:
+                        raise LookupError(f"No class found in {dirname}")
+                    self.app.logger.error("No class found in %s", dirname)
+                    continue
+                routes.append(
+                    {
+                        "path": f'/apis/{"/".join(result)}',
+                        "module": module_name,
+                        "class": className,
+                        "publish": publish,
+                    }
+                )
+        return routes
+
+    def _register_route(self, route: Dict[str, Any]) -> None:
+        """Import the class of a route and publish it."""
+        self.app.logger.info("Loading %s", route["module"])
+        module = importlib.import_module(route["module"])
+        if not getattr(module, "publish", True):
+            self.app.logger.info("Skipping Publish %s", route["path"])
+            return
+        self.app.logger.info("Resource %s", route["class"])
+        import_class = getattr(module, route["class"])
+        self.api.add_resource(import_class(), route["path"])
+        self.app.logger.info("Publish %s", route["path"])
+
     def _load_paths(self):
-        """Method to load the API paths."""
+        """
+        Method to load the API paths.
+
+        Routes are read from the manifest when it is up to date, otherwise
+        discovered and written to it. In strict mode (API_STRICT_ROUTES) any
+        error aborts the startup instead of being logged.
+
+        In lazy mode (API_LAZY_ROUTES) only placeholders are added, and a route
+        module is imported on the first request to one of its paths, or at
+        startup if one of them is listed in API_WARMUP_ROUTES.
+        """
         try:
             self.app.logger.info("Loading routes")
             sys.path.append(f"{self.__path_module}/routes")
-            for dirname, _, files in walk(f"{self.__path_module}/routes"):
-                module_path_segments = dirname.strip("/").split("/")
-                base_path_segments = self.__path_module.strip("/").split("/")
-                base_path_segments.append("routes")
-
-                if "__main__.py" not in files:
-                    continue
-
-                result = [
-                    segment
-                    for segment in module_path_segments
-                    if segment not in base_path_segments
+            manifest = None
+            routes = None
+            if self.ROUTES_MANIFEST:
+                manifest = RouteManifest(
+                    f"{self.__path_module}/routes", self.ROUTES_MANIFEST
+                )
+                routes = manifest.load()
+            if routes is None:
+                routes = self._discover_routes()
+                if manifest is not None:
+                    manifest.save(routes)
+            else:
+                self.app.logger.info("Routes read from %s", self.ROUTES_MANIFEST)
+        except Exception as err:  # pylint: disable=broad-except
+            if self.STRICT_ROUTES:
+                raise
+            self.app.logger.error(err)
+            return
+
+        if self.LAZY_ROUTES:
+            self._add_lazy_routes(routes)
+            self.warmup()
+        else:
+            self._publish_routes(routes)
+
+    def _publish_routes(self, routes: List[Dict[str, Any]]) -> None:
+        """Publish routes, logging the failures unless in strict mode."""
+        for route in routes:
+            try:
+                self._register_route(route)
+            except Exception as err:  # pylint: disable=broad-except
+                if self.STRICT_ROUTES:
+                    raise
+                self.app.logger.error("Unable to publish %s: %s", route["path"], err)
+
+    def _add_lazy_routes(self, routes: List[Dict[str, Any]]) -> None:
+        """Add placeholder routes importing their module on first request."""
+        endpoints: Dict[str, LazyEndpoint] = {}
+        for route in routes:
+            module_name = route["module"]
+            self._lazy_routes.setdefault(module_name, []).append(route)
+            if module_name not in endpoints:
+                endpoints[module_name] = LazyEndpoint(
+                    functools.partial(self._load_module, module_name),
+                    self.app.router,
+                )
+            self.app.router.routes.append(
+                LazyRoute(route["path"], module_name, endpoints[module_name])
+            )
+            self.app.logger.info("Lazy %s", route["path"])
+
+    def _load_module(self, module_name: str) -> None:
+        """Publish the routes of a lazy module and drop its placeholders."""
+        with self._lazy_lock:
+            routes = self._lazy_routes.pop(module_name, None)
+            if routes is None:
+                return
+            try:
+                self._publish_routes(routes)
+            finally:
+                self.app.router.routes[:] = [
+                    route
+                    for route in self.app.router.routes
+                    if not (
+                        isinstance(route, LazyRoute) and route.module == module_name
+                    )
                 ]
-                if result:
-                    module_name = ".".join(result)
-                    self.app.logger.info("Filename routes/%s", "/".join(result))
-                    self.app.logger.info("Loading %s", module_name)
+                # Regenerate the OpenAPI schema with the new routes
+                self.app.openapi_schema = None
 
-                    pathRoute = (  # pylint: disable=invalid-name
-                        f'/apis/{"/".join(result)}'
-                    )
-                    self.app.logger.info("Route %s", pathRoute)
-
-                    module = importlib.import_module(module_name)
-
-                    if hasattr(module, "publish"):
-                        if not module.publish:
-                            self.app.logger.info("Skipping Publish %s", pathRoute)
-                            continue
-
-                    if hasattr(module, "resources"):
-                        for resource in module.resources:
-                            pathRoute = resource[0]  # pylint: disable=invalid-name
-                            import_class = resource[1]
-                            self.app.logger.info("Resource %s", import_class.__name__)
-                            self.api.add_resource(import_class(), pathRoute)
-                            self.app.logger.info("Publish %s", pathRoute)
-                    else:
-                        className = self.get_first_class_name_from_init(  # pylint: disable=invalid-name
-                            dirname
-                        )
-                        if not className:
-                            self.app.logger.error("No class found in %s", dirname)
-                            continue
-                        self.app.logger.info("ClassName %s", className)
-                        import_class = getattr(module, className)
-
-                        self.api.add_resource(import_class(), pathRoute)
-                        self.app.logger.info("Publish %s", pathRoute)
+    def warmup(self, paths: Optional[List[str]] = None) -> None:
+        """
+        Load the lazy routes serving `paths` ahead of their first request.
 
-        except Exception as err:  # pylint: disable=broad-except
-            self.app.logger.error(err)
+        Args:
+            paths (list): Route paths, defaults to API_WARMUP_ROUTES.
+        """
+        paths = self.WARMUP_ROUTES if paths is None else paths
+        modules = {
+            route["module"]
+            for routes in list(self._lazy_routes.values())
+            for route in routes
+            if route["path"] in paths
+        }
+        for module_name in sorted(modules):
+            self._load_module(module_name)
 
 
 class ApiResponse(BaseModel):  # pylint: disable=too-few-public-methods
@@ -143,7 +274,14 @@ class ApiResponse(BaseModel):  # pylint: disable=too-few-public-methods
 
     data: Any
     status_code: int
-    metatata: dict = {"timestamp": Api._get_time()}  # pylint: disable=protected-access
+    metatata: Optional[dict] = None
+
+    @field_serializer("metatata")
+    def _stamp(self, metatata: Optional[dict]) -> dict:
+        """Stamps the response when serialized, the clock is not read if excluded."""
+        if metatata is None:
+            return {"timestamp": Api._get_time()}  # pylint: disable=protected-access
+        return metatata
 
     def to_dict(self):
         """Convert the model to a dict for FastAPI."""
@@ -162,5 +300,114 @@ class ApiResponse(BaseModel):  # pylint: disable=too-few-public-methods
         return response
 
 
+def _cache_api_response(func, exclude: Optional[set], options: Dict[str, Any]):
+    """Wrap a handler so that its responses are served from the response cache."""
+
+    def render(result):
+        if isinstance(result, ApiResponse):
+            return ApiJSONResponse(content=result, exclude=exclude)
+        if isinstance(result, Response):
+            return result
+        return ApiJSONResponse(content=result)
+
+    # The request is injected under a private name, for the cache key and
+    # the If-None-Match header
+    signature = inspect.signature(func)
+    parameters = [
+        *signature.parameters.values(),
+        inspect.Parameter(
+            "cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        ),
+    ]
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def handler(*args, **kwargs):
+            request = kwargs.pop("cache_request")
+            key, response = Api.response_cache.lookup(request, options)
+            if response is not None:
+                return response
+            response = render(await func(*args, **kwargs))
+            return Api.response_cache.store(request, key, response, options)
+
+    else:
+
+        @functools.wraps(func)
+        def handler(*args, **kwargs):
+            request = kwargs.pop("cache_request")
+            key, response = Api.response_cache.lookup(request, options)
+            if response is not None:
+                return response
+            response = render(func(*args, **kwargs))
+            return Api.response_cache.store(request, key, response, options)
+
+    handler.__signature__ = signature.replace(parameters=parameters)
+    return handler
+
+
+def _render_api_response(func, metadata: bool):
+    """Wrap a handler so that a returned ApiResponse is rendered right away."""
+    exclude = None if metadata else {"metatata"}
+
+    options = getattr(func, "response_cache", None)
+    if options is not None:
+        # A cached body carries the timestamp of the request that rendered it
+        cached = _cache_api_response(func, exclude, options)
+        cached.api_handler = (func, metadata)
+        return cached
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def handler(*args, **kwargs):
+            result = await func(*args, **kwargs)
+            if isinstance(result, ApiResponse):
+                return ApiJSONResponse(content=result, exclude=exclude)
+            return result
+
+    else:
+
+        @functools.wraps(func)
+        def handler(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if isinstance(result, ApiResponse):
+                return ApiJSONResponse(content=result, exclude=exclude)
+            return result
+
+    # What the wrapper renders, for the subclasses inheriting it
+    handler.api_handler = (func, metadata)
+    return handler
+
+
 class ApiResource(Resource):  # pylint: disable=too-few-public-methods
-    """Base class for API resources."""
+    """
+    Base class for API resources.
+
+    The HTTP method handlers of subclasses are wrapped so that an ApiResponse
+    they return is serialized to an ApiJSONResponse in one pass, instead of
+    being validated, dumped to a dict and re-encoded by FastAPI. The declared
+    return type is kept for the OpenAPI schema.
+
+    Responses leave the `metatata` field out unless the resource opts in with
+    `metadata = True` (API_RESPONSE_METADATA=true opts every resource in).
+
+    Methods decorated with `cache_response(ttl, vary)` are served from the
+    response cache (`Api.response_cache`) while fresh, with an ETag; their
+    `metatata` timestamp is the one of the request that rendered them.
+    """
+
+    HTTP_METHODS = ("get", "post", "put", "patch", "delete")
+    metadata = Api.RESPONSE_METADATA
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in cls.HTTP_METHODS:
+            func = getattr(cls, name, None)
+            wrapped = getattr(func, "api_handler", None)
+            if wrapped is None:
+                if inspect.isfunction(func) and name in cls.__dict__:
+                    setattr(cls, name, _render_api_response(func, cls.metadata))
+            elif wrapped[1] != cls.metadata:
+                # Inherited from a resource rendering with another setting
+                setattr(cls, name, _render_api_response(wrapped[0], cls.metadata))
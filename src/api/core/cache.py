@@ -0,0 +1,266 @@
+"""Response cache module."""
+
+import collections
+import hashlib
+import threading
+import time
+from os import environ
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.dependencies.utils import get_flat_dependant
+
+from .metrics import metrics
+
+Query = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, str, str, Query, str]
+
+VARY_BY = (None, "user", "role")
+
+
+def cache_response(ttl: float, vary: Optional[str] = None) -> Callable:
+    """
+    Mark an ApiResource method as cacheable.
+
+    Its 200 responses are kept for `ttl` seconds, per path and declared query
+    parameters, and also per caller with vary="user" (username) or vary="role"
+    (roles). Cached responses of resources that include the `metatata` field
+    keep the timestamp of the request that rendered them.
+
+    Args:
+        ttl (float): Seconds a response stays fresh.
+        vary (str): None, "user" or "role".
+    """
+    if vary not in VARY_BY:
+        raise ValueError(f"vary must be one of {VARY_BY}, not {vary!r}")
+
+    def decorator(func):
+        func.response_cache = {"ttl": ttl, "vary": vary}
+        return func
+
+    return decorator
+
+
+def _declared_query(route: Any) -> Optional[frozenset]:
+    """Returns the query parameters a route reads, None if unknown."""
+    dependant = getattr(route, "dependant", None)
+    if dependant is None:
+        return None
+    declared = getattr(route, "cache_query", None)
+    if declared is None:
+        declared = frozenset(
+            field.alias for field in get_flat_dependant(dependant).query_params
+        )
+        route.cache_query = declared
+    return declared
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses, bounded in bytes.
+
+    Entries keep the body as sent, with a strong ETag (a hash of the body). A
+    request whose If-None-Match lists the ETag of a fresh entry gets a 304,
+    otherwise the stored body, without calling the handler in both cases.
+    Responses varying by caller need `variant`, which returns the username or
+    roles of the caller of a request (None to bypass the cache). Each worker
+    process has its own cache.
+    """
+
+    # Bookkeeping bytes counted per entry, next to its body
+    ENTRY_OVERHEAD = 256
+
+    def __init__(
+        self,
+        max_bytes: int = 8 * 1024 * 1024,
+        variant: Optional[Callable[[Request, str], Optional[str]]] = None,
+    ):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_bytes (int): Size of the entries kept, 0 disables the cache.
+            variant (Callable): Returns the key of the caller of a request for
+                vary="user" or vary="role".
+        """
+        self.max_bytes = max_bytes
+        self.variant = variant
+        self.size = 0
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._counts = {"hit": 0, "not_modified": 0, "miss": 0, "evicted": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Returns the cache configured through environment variables.
+
+        - API_RESPONSE_CACHE_BYTES: size of the cache (default: 8 MiB, 0
+          disables it).
+        """
+        return cls(int(environ.get("API_RESPONSE_CACHE_BYTES", 8 * 1024 * 1024)))
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        """Returns the strong ETag of a body."""
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    @staticmethod
+    def matches(request: Request, etag: str) -> bool:
+        """Checks if the If-None-Match header of a request lists `etag`."""
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            # Weak comparison, as RFC 9110 prescribes for If-None-Match
+            if candidate == "*" or candidate.removeprefix("W/") == etag:
+                return True
+        return False
+
+    @staticmethod
+    def _headers(etag: str, options: Dict[str, Any]) -> Dict[str, str]:
+        """Returns the caching headers of a response."""
+        headers = {
+            "ETag": etag,
+            "Cache-Control": (
+                f"{'private' if options['vary'] else 'public'}, "
+                f"max-age={int(options['ttl'])}"
+            ),
+        }
+        if options["vary"]:
+            headers["Vary"] = "Authorization"
+        return headers
+
+    def _count(self, result: str) -> None:
+        """Counts a lookup result (lock held)."""
+        self._counts[result] += 1
+        metrics.inc("api_response_cache_total", (("result", result),))
+
+    @staticmethod
+    def query(request: Request) -> Query:
+        """
+        Returns the query parameters of a request keying its response.
+
+        Only the parameters the route declares are kept, sorted, so callers
+        can not fill the cache (and evict its entries) with made up ones.
+        """
+        declared = _declared_query(request.scope.get("route"))
+        return tuple(
+            sorted(
+                (name, value)
+                for name, value in request.query_params.multi_items()
+                if declared is None or name in declared
+            )
+        )
+
+    def lookup(
+        self, request: Request, options: Dict[str, Any]
+    ) -> Tuple[Optional[Key], Optional[Response]]:
+        """
+        Looks up the response to a request.
+
+        Returns:
+            tuple: The key to store the response under (None if it must not be
+                cached) and the cached response (None on a miss).
+        """
+        if not self.max_bytes:
+            return None, None
+        variant = ""
+        if options["vary"]:
+            variant = self.variant(request, options["vary"]) if self.variant else None
+            if variant is None:
+                return None, None
+        scope = request.scope
+        key = (
+            options["vary"] or "",
+            variant,
+            scope["path"],
+            self.query(request),
+            scope["method"],
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires"] <= time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._count("miss")
+                return key, None
+            self._entries.move_to_end(key)
+            if self.matches(request, entry["etag"]):
+                self._count("not_modified")
+                return key, Response(status_code=304, headers=entry["headers"])
+            self._count("hit")
+        return key, Response(
+            entry["body"],
+            media_type=entry["media_type"],
+            headers=entry["headers"],
+        )
+
+    def store(
+        self,
+        request: Request,
+        key: Optional[Key],
+        response: Response,
+        options: Dict[str, Any],
+    ) -> Response:
+        """Stores a response (200s with a body only), returns what to send."""
+        body = getattr(response, "body", None)
+        if key is None or response.status_code != 200 or body is None:
+            return response
+        etag = self.etag(body)
+        headers = self._headers(etag, options)
+        response.headers.update(headers)
+        size = len(body) + self.ENTRY_OVERHEAD
+        if size <= self.max_bytes:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = {
+                    "body": body,
+                    "media_type": response.media_type,
+                    "headers": headers,
+                    "etag": etag,
+                    "expires": time.monotonic() + options["ttl"],
+                    "size": size,
+                }
+                self.size += size
+                while self.size > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self._count("evicted")
+        if self.matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return response
+
+    def _remove(self, key: Key) -> None:
+        """Drops an entry (lock held)."""
+        self.size -= self._entries.pop(key)["size"]
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the entries, size, lookup counts and hit ratio of the cache."""
+        with self._lock:
+            counts = dict(self._counts)
+            entries = len(self._entries)
+        lookups = counts["hit"] + counts["not_modified"] + counts["miss"]
+        return {
+            "entries": entries,
+            "bytes": self.size,
+            **counts,
+            "hit_ratio": (
+                (counts["hit"] + counts["not_modified"]) / lookups if lookups else 0.0
+            ),
+        }
+
+
+metrics.describe(
+    "api_response_cache_total",
+    "counter",
+    "Response cache lookups by result (hit, not_modified, miss) and evictions.",
+)
@@ -0,0 +1,34 @@
+"""Clock module."""
+
+import time
+from datetime import datetime
+from typing import Tuple
+
+
+class CachedClock:  # pylint: disable=too-few-public-methods
+    """
+    Wall clock formatting timestamps as "%Y-%m-%dT%H:%M:%S.%f%z".
+
+    The formatted date and time down to the second (and the UTC offset) only
+    change once per second, so they are formatted on the first call of each
+    second and reused. Other calls only append the microseconds.
+    """
+
+    def __init__(self):
+        # (second, prefix, suffix), replaced as a whole when the second changes
+        self._cache: Tuple[int, str, str] = (-1, "", "")
+
+    def now(self) -> str:
+        """Returns the current local time, formatted."""
+        current = time.time()
+        second = int(current)
+        cached_second, prefix, suffix = self._cache
+        if second != cached_second:
+            date_time = datetime.fromtimestamp(second)
+            prefix = date_time.strftime("%Y-%m-%dT%H:%M:%S.")
+            suffix = date_time.strftime("%z")
+            self._cache = (second, prefix, suffix)
+        return f"{prefix}{int((current - second) * 1_000_000):06d}{suffix}"
+
+
+clock = CachedClock()
@@ -1,11 +1,14 @@
 """Exceptions module."""
 
-from typing import Any
+from typing import Any, Dict, Optional
 
 
 class ApiHttpException(Exception):
     """Custom HTTPException for API responses."""
 
-    def __init__(self, status_code: int, data: Any):
+    def __init__(
+        self, status_code: int, data: Any, headers: Optional[Dict[str, str]] = None
+    ):
         self.status_code = status_code
         self.data = data
+        self.headers = headers
@@ -0,0 +1,39 @@
+"""Lazy routes module."""
+
+import asyncio
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
+
+
+class LazyEndpoint:  # pylint: disable=too-few-public-methods
+    """
+    ASGI endpoint of a route whose resource is not imported yet.
+
+    On the first request it calls `load`, which publishes the real routes and
+    removes the placeholders, then dispatches the request again through the
+    router so it reaches the real route.
+
+    The import runs in the threadpool so the event loop keeps serving other
+    requests, and the placeholders of a module share one endpoint, whose lock
+    makes the concurrent first requests wait for a single import.
+    """
+
+    def __init__(self, load: Callable[[], None], router):
+        self.load = load
+        self.router = router
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        async with self._lock:
+            await run_in_threadpool(self.load)
+        await self.router(scope, receive, send)
+
+
+class LazyRoute(Route):
+    """Placeholder route, matching every method of a path until it is loaded."""
+
+    def __init__(self, path: str, module: str, endpoint: LazyEndpoint):
+        super().__init__(path, endpoint, include_in_schema=False)
+        self.module = module
@@ -0,0 +1,202 @@
+"""Logs module."""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from os import environ
+from typing import Any, Dict, Optional
+
+from .metrics import metrics
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, `extra` fields included."""
+
+    RESERVED = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self.RESERVED:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the logging thread.
+
+    Records are enqueued without waiting: when the queue is full they are
+    dropped and counted per level (also in `api_log_dropped_total`).
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped: Dict[str, int] = {}
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now, they may refer to objects
+        # that change before the writer formats the record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            level = record.levelname
+            self.dropped[level] = self.dropped.get(level, 0) + 1
+            metrics.inc("api_log_dropped_total", (("level", level),))
+
+
+class _Writer(QueueListener):
+    """Queue listener whose stop waits for room in a full queue."""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class LogPipeline:
+    """
+    Logging pipeline moving the I/O off the threads that log.
+
+    Loggers hand their records to a bounded queue (DroppingQueueHandler) and
+    a background thread writes them to stderr, as text or JSON. The thread is
+    started again in forked workers, and the queue is drained at exit.
+    """
+
+    def __init__(self, size: int = 10000, fmt: str = "text"):
+        """
+        Initializes the pipeline, stopped.
+
+        Args:
+            size (int): Records buffered before dropping.
+            fmt (str): Output format, text or json.
+        """
+        self.size = size
+        self.output = logging.StreamHandler(sys.stderr)
+        self.output.setFormatter(
+            JsonFormatter()
+            if fmt == "json"
+            else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+        )
+        self.handler = DroppingQueueHandler(queue.Queue(size))
+        self._writer: Optional[_Writer] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork_in_child)
+        atexit.register(self.stop)
+
+    @classmethod
+    def from_env(cls) -> "LogPipeline":
+        """
+        Returns the pipeline configured through environment variables.
+
+        - API_LOG_QUEUE_SIZE: records buffered before dropping (default: 10000).
+        - API_LOG_FORMAT: text or json (default: text).
+        """
+        return cls(
+            int(environ.get("API_LOG_QUEUE_SIZE", 10000)),
+            environ.get("API_LOG_FORMAT", "text").lower(),
+        )
+
+    @property
+    def dropped(self) -> Dict[str, int]:
+        """Returns the records dropped so far, per level."""
+        return dict(self.handler.dropped)
+
+    def start(self) -> None:
+        """Starts the writer thread, if not running."""
+        if self._writer is None:
+            self._writer = _Writer(self.handler.queue, self.output)
+            self._writer.start()
+
+    def stop(self) -> None:
+        """Writes the queued records and stops the writer thread."""
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.stop()
+
+    def _after_fork_in_child(self) -> None:
+        """Replaces the queue and thread of the parent, which did not survive."""
+        running = self._writer is not None
+        self._writer = None
+        self.handler.queue = queue.Queue(self.size)
+        if running:
+            self.start()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """Parses "route=rate,..." access log rules, "*" matching every other route."""
+    rates = {}
+    for rule in filter(None, (item.strip() for item in value.split(","))):
+        route, rate = rule.rsplit("=", 1)
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+def queue_handler() -> logging.Handler:
+    """Returns the handler of the pipeline, for `logging.config.dictConfig`."""
+    pipeline.start()
+    return pipeline.handler
+
+
+pipeline = LogPipeline.from_env()
+metrics.describe(
+    "api_log_dropped_total", "counter", "Log records dropped, queue full, by level."
+)
+
+# Logging setup of the API and its uvicorn servers, every logger writes
+# through the queue of the pipeline
+LOG_LEVEL = environ.get("API_LOG_LEVEL", "INFO").upper()
+LOG_CONFIG: Dict[str, Any] = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "default": {"()": queue_handler},
+    },
+    "root": {"level": LOG_LEVEL, "handlers": ["default"]},
+    "loggers": {
+        "uvicorn": {
+            "level": "INFO",
+            "handlers": ["default"],
+            "propagate": False,
+        },
+        "uvicorn.error": {
+            "level": "INFO",
+            "handlers": ["default"],
+            "propagate": False,
+        },
+        "uvicorn.access": {
+            "level": "INFO",
+            "handlers": ["default"],
+            "propagate": False,
+        },
+    },
+}
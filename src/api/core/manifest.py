@@ -0,0 +1,109 @@
+"""Manifest module."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("api")
+
+
+class RouteManifest:
+    """
+    Cache of the routes discovered under the routes directory.
+
+    Each entry maps a path to the module and class serving it, with the
+    `publish` flag the module had when it was discovered:
+
+    ```json
+    {"path": "/apis/v1/helloworld", "module": "v1.helloworld",
+     "class": "V1HelloWorld", "publish": true}
+    ```
+
+    The manifest also records the mtime of every package directory and
+    `__init__.py` file. It is valid while they are unchanged, which only takes
+    a few `stat` calls: adding or removing a route changes the mtime of its
+    parent directory, editing a `resources` list changes its `__init__.py`.
+    """
+
+    VERSION = 1
+
+    def __init__(self, routes_dir: str, filename: str):
+        """
+        Initializes the manifest.
+
+        Args:
+            routes_dir (str): Directory holding the route packages.
+            filename (str): Path of the manifest file, outside `routes_dir` so
+                writing it does not invalidate it.
+        """
+        self.routes_dir = routes_dir
+        self.filename = filename
+
+    @staticmethod
+    def default_filename(routes_dir: str) -> str:
+        """
+        Returns the manifest path of a routes directory in the temp directory.
+
+        Keeps the manifest out of the source tree and of the home directory,
+        with one file per routes directory in a directory of the current user
+        (API_ROUTES_MANIFEST sets another path, empty disables the manifest).
+        """
+        digest = hashlib.sha256(os.path.abspath(routes_dir).encode("utf-8"))
+        return os.path.join(
+            tempfile.gettempdir(),
+            f"api-{os.getuid()}",
+            f"routes-manifest-{digest.hexdigest()[:16]}.json",
+        )
+
+    def _tracked(self) -> List[str]:
+        """Returns the paths whose mtimes validate the manifest."""
+        tracked = []
+        for dirname, dirnames, files in os.walk(self.routes_dir):
+            dirnames[:] = sorted(name for name in dirnames if name != "__pycache__")
+            tracked.append(os.path.relpath(dirname, self.routes_dir))
+            if "__init__.py" in files:
+                tracked.append(
+                    os.path.relpath(
+                        os.path.join(dirname, "__init__.py"), self.routes_dir
+                    )
+                )
+        return tracked
+
+    def _mtimes(self, paths: List[str]) -> Dict[str, int]:
+        """Returns the mtimes of paths relative to the routes directory."""
+        return {
+            name: os.stat(os.path.join(self.routes_dir, name)).st_mtime_ns
+            for name in paths
+        }
+
+    def load(self) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached routes, or None if the manifest is missing or stale."""
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                content = json.load(f)
+            if content.get("version") != self.VERSION:
+                return None
+            if self._mtimes(list(content["mtimes"])) != content["mtimes"]:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return content["routes"]
+
+    def save(self, routes: List[Dict[str, Any]]) -> None:
+        """Writes the manifest, logging instead of failing on read-only trees."""
+        content = {
+            "version": self.VERSION,
+            "mtimes": self._mtimes(self._tracked()),
+            "routes": routes,
+        }
+        tmp_filename = f"{self.filename}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.filename) or ".", 0o700, exist_ok=True)
+            with open(tmp_filename, "w", encoding="utf-8") as f:
+                json.dump(content, f, indent=2)
+            os.replace(tmp_filename, self.filename)
+        except OSError as err:
+            logger.warning("Unable to write the routes manifest: %s", err)
@@ -0,0 +1,339 @@
+"""Metrics module."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from os import environ
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+Totals = Tuple[Dict[Key, float], Dict[Key, List[float]]]
+
+
+class Metrics:
+    """
+    Counters and fixed-bucket histograms, rendered in the Prometheus text format.
+
+    Each thread records into its own shard, so recording takes no lock. Shards
+    are only summed when the metrics are collected. In multiprocess mode
+    (`directory` set) a background thread of every worker also writes its totals
+    to `<directory>/metrics-<pid>.json` every `flush_interval` seconds (and when
+    collected), and collecting merges the files of all the workers. The
+    supervisor merges the files of the workers that exited into
+    `metrics-archive.json`, so the directory does not grow with recycling.
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    ARCHIVE = "metrics-archive.json"
+
+    def __init__(self, directory: Optional[str] = None, flush_interval: float = 5.0):
+        """
+        Initializes an empty registry.
+
+        Args:
+            directory (str): Directory shared by the workers, None for a
+                single process.
+            flush_interval (float): Seconds between two writes of the totals.
+        """
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._local = threading.local()
+        self._shards: List[Totals] = []
+        self._lock = threading.Lock()
+        self._stopping: Optional[threading.Event] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        """
+        Returns the registry configured through environment variables.
+
+        - API_METRICS_DIR: directory enabling the multiprocess mode.
+        - API_METRICS_FLUSH_INTERVAL: seconds between two writes of the totals.
+        """
+        return cls(
+            environ.get("API_METRICS_DIR") or None,
+            float(environ.get("API_METRICS_FLUSH_INTERVAL", 5)),
+        )
+
+    def _reset(self) -> None:
+        """Forgets the parent's values in a forked worker."""
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self._stopping = None
+
+    def describe(self, name: str, kind: str, description: str) -> None:
+        """Declares the type ("counter" or "histogram") and help of a metric."""
+        self._descriptions[name] = (kind, description)
+
+    def _shard(self) -> Totals:
+        """Returns the (counters, histograms) shard of the current thread."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = ({}, {})
+            with self._lock:
+                self._shards.append(shard)
+                if self.directory is not None and self._stopping is None:
+                    self._start_flusher()
+        return shard
+
+    def _start_flusher(self) -> None:
+        """Starts the thread writing the totals of this process (lock held)."""
+        stopping = self._stopping = threading.Event()
+
+        def flush_periodically():
+            while not stopping.wait(self.flush_interval):
+                try:
+                    self.flush()
+                except OSError:
+                    pass  # Tried again on the next interval
+
+        threading.Thread(
+            target=flush_periodically, name="metrics-flusher", daemon=True
+        ).start()
+
+    def close(self) -> None:
+        """Stops the background writes, after writing the totals a last time."""
+        with self._lock:
+            stopping, self._stopping = self._stopping, None
+        if stopping is not None:
+            stopping.set()
+            self.flush()
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        """Increments a counter."""
+        counters = self._shard()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        """Records a value in a histogram."""
+        histograms = self._shard()[1]
+        key = (name, labels)
+        series = histograms.get(key)
+        if series is None:
+            # One count per bucket, then +Inf, sum
+            series = histograms[key] = [0.0] * (len(self.BUCKETS) + 2)
+        for i, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[-2] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        """Records the duration of a block in a histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, tuple(labels.items()), time.perf_counter() - started)
+
+    @staticmethod
+    def _merge(
+        totals: Totals,
+        counters: Dict[Key, float],
+        histograms: Dict[Key, List[float]],
+    ) -> None:
+        """Adds counters and histograms to totals."""
+        for key, value in counters.items():
+            totals[0][key] = totals[0].get(key, 0) + value
+        for key, series in histograms.items():
+            total = totals[1].setdefault(key, [0.0] * len(series))
+            for i, value in enumerate(series):
+                total[i] += value
+
+    @staticmethod
+    def _serialize(totals: Totals) -> Dict[str, List[Any]]:
+        """Returns totals as JSON-compatible lists."""
+        return {
+            "counters": [
+                [name, list(labels), value]
+                for (name, labels), value in totals[0].items()
+            ],
+            "histograms": [
+                [name, list(labels), series]
+                for (name, labels), series in totals[1].items()
+            ],
+        }
+
+    @classmethod
+    def _merge_serialized(cls, totals: Totals, content: Dict[str, List[Any]]) -> None:
+        """Adds totals read back from JSON to totals."""
+        cls._merge(
+            totals,
+            {
+                (name, tuple(map(tuple, labels))): value
+                for name, labels, value in content["counters"]
+            },
+            {
+                (name, tuple(map(tuple, labels))): series
+                for name, labels, series in content["histograms"]
+            },
+        )
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        """Returns the totals of this process, summed over the shards."""
+        totals: Totals = ({}, {})
+        for counters, histograms in list(self._shards):
+            self._merge(
+                totals,
+                counters.copy(),
+                {key: list(series) for key, series in histograms.copy().items()},
+            )
+        return self._serialize(totals)
+
+    def _read(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Reads a file of the shared directory, None if missing or partial."""
+        try:
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, filename: str, content: Dict[str, Any]) -> None:
+        """Atomically replaces a file of the shared directory."""
+        filename = os.path.join(self.directory, filename)
+        tmp_filename = f"{filename}.{threading.get_ident()}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(content, f)
+        os.replace(tmp_filename, filename)
+
+    def _filenames(self) -> List[str]:
+        """Lists the metrics files of the shared directory, the archive last."""
+        return sorted(
+            (
+                filename
+                for filename in os.listdir(self.directory)
+                if filename.startswith("metrics-") and filename.endswith(".json")
+            ),
+            key=lambda filename: filename == self.ARCHIVE,
+        )
+
+    def flush(self) -> None:
+        """Writes the totals of this process to the shared directory."""
+        self._write(f"metrics-{os.getpid()}.json", self.snapshot())
+
+    def collect(self) -> Dict[str, List[Any]]:
+        """Returns the totals of this process, or of all the workers."""
+        if self.directory is None:
+            return self.snapshot()
+        self.flush()
+        # The archive is read last: a worker file removed in the meantime has
+        # been merged into it, and one still there is skipped if it lists it
+        contents = {}
+        for filename in self._filenames():
+            content = self._read(filename)
+            if content is not None:
+                contents[filename] = content
+        archived = {
+            f"metrics-{pid}.json"
+            for pid in contents.get(self.ARCHIVE, {}).get("pids", [])
+        }
+        totals: Totals = ({}, {})
+        for filename, content in contents.items():
+            if filename not in archived:
+                self._merge_serialized(totals, content)
+        return self._serialize(totals)
+
+    def archive(self, pids: Iterable[int]) -> None:
+        """
+        Merges the files of exited workers into the archive and removes them.
+
+        Only the supervisor calls it, once the workers are gone.
+
+        Args:
+            pids (Iterable[int]): Process ids of the exited workers.
+        """
+        totals: Totals = ({}, {})
+        content = self._read(self.ARCHIVE)
+        if content is not None:
+            self._merge_serialized(totals, content)
+        merged = []
+        for pid in pids:
+            content = self._read(f"metrics-{pid}.json")
+            if content is not None:
+                self._merge_serialized(totals, content)
+                merged.append(pid)
+        if not merged:
+            return
+        self._write(self.ARCHIVE, {**self._serialize(totals), "pids": merged})
+        for pid in merged:
+            os.remove(os.path.join(self.directory, f"metrics-{pid}.json"))
+
+    def clear(self) -> None:
+        """Removes the metrics files left in the shared directory by a previous run."""
+        for filename in self._filenames():
+            os.remove(os.path.join(self.directory, filename))
+
+    @staticmethod
+    def _labels(labels: List[Any], extra: str = "") -> str:
+        """Formats labels, escaping their values."""
+        parts = []
+        for name, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            parts.append(f'{name}="{value}"'.replace("\n", "\\n"))
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def _histogram_lines(
+        self, name: str, labels: List[Any], values: List[float]
+    ) -> List[str]:
+        """Formats the cumulative buckets, sum and count of a histogram."""
+        lines = []
+        cumulative = 0.0
+        for bound, count in zip(self.BUCKETS + (float("inf"),), values[:-1]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            bucket_labels = self._labels(labels, f'le="{le}"')
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative:g}")
+        lines.append(f"{name}_sum{self._labels(labels)} {values[-1]:g}")
+        lines.append(f"{name}_count{self._labels(labels)} {cumulative:g}")
+        return lines
+
+    def render(self) -> str:
+        """Returns the collected metrics in the Prometheus text format."""
+        collected = self.collect()
+        series: Dict[str, List[str]] = {}
+        for name, labels, value in sorted(collected["counters"]):
+            series.setdefault(name, []).append(
+                f"{name}{self._labels(labels)} {value:g}"
+            )
+        for name, labels, values in sorted(collected["histograms"]):
+            series.setdefault(name, []).extend(
+                self._histogram_lines(name, labels, values)
+            )
+
+        output = []
+        for name in sorted(series):
+            kind, description = self._descriptions.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(series[name])
+        return "\n".join(output) + "\n"
+
+
+metrics = Metrics.from_env()
+metrics.describe(
+    "api_requests_total", "counter", "HTTP requests by route, method and status."
+)
+metrics.describe(
+    "api_request_duration_seconds",
+    "histogram",
+    "HTTP request latency by route and method.",
+)
+metrics.describe(
+    "api_bcrypt_duration_seconds", "histogram", "bcrypt hashing and verification time."
+)
+metrics.describe(
+    "api_jwt_duration_seconds", "histogram", "JWT encoding and decoding time."
+)
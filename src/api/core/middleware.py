@@ -0,0 +1,235 @@
+"""Middleware module."""
+
+import logging
+import random
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metrics import metrics
+
+Headers = List[Tuple[bytes, bytes]]
+
+access_logger = logging.getLogger("api.access")
+
+
+class ResponseHeadersMiddleware(ABC):
+    """
+    Base pure-ASGI middleware adding headers to HTTP responses.
+
+    Unlike `@app.middleware("http")`, which wraps every request in Starlette's
+    BaseHTTPMiddleware (an extra task and a response stream copy), this only
+    rewrites the `http.response.start` message, so streaming responses go
+    through untouched. Subclasses implement `begin`, called when the request
+    arrives, and `headers`, called when the response starts with the context
+    `begin` returned.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @abstractmethod
+    def begin(self, scope: Dict[str, Any]) -> Optional[Any]:
+        """Returns the context passed to `headers` for this request."""
+
+    @abstractmethod
+    def headers(self, scope: Dict[str, Any], context: Any) -> Headers:
+        """Returns the headers to add to the response."""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = self.begin(scope)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    *self.headers(scope, context),
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class StaticHeadersMiddleware(ResponseHeadersMiddleware):
+    """Adds fixed headers, encoded once, to every response."""
+
+    def __init__(self, app, headers: Dict[str, str]):
+        super().__init__(app)
+        self._headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in headers.items()
+        ]
+
+    def begin(self, scope: Dict[str, Any]) -> None:
+        return None
+
+    def headers(self, scope: Dict[str, Any], context: None) -> Headers:
+        return self._headers
+
+
+class TimingMiddleware(ResponseHeadersMiddleware):
+    """Adds a `Server-Timing` header with the time spent until the response."""
+
+    def begin(self, scope: Dict[str, Any]) -> float:
+        return time.perf_counter()
+
+    def headers(self, scope: Dict[str, Any], context: float) -> Headers:
+        elapsed = (time.perf_counter() - context) * 1000
+        return [(b"server-timing", f"app;dur={elapsed:.3f}".encode("latin-1"))]
+
+
+class RequestIdMiddleware(ResponseHeadersMiddleware):
+    """
+    Tags each request with an ID, echoed in the `X-Request-ID` header.
+
+    The ID sent by the client (or a proxy) is kept, otherwise a new one is
+    generated. It is available to handlers as `request.state.request_id`.
+    """
+
+    def begin(self, scope: Dict[str, Any]) -> bytes:
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value[:128]
+                break
+        else:
+            request_id = uuid.uuid4().hex.encode("latin-1")
+        scope.setdefault("state", {})["request_id"] = request_id.decode("latin-1")
+        return request_id
+
+    def headers(self, scope: Dict[str, Any], context: bytes) -> Headers:
+        return [(b"x-request-id", context)]
+
+
+class MetricsMiddleware:  # pylint: disable=too-few-public-methods
+    """Records the count and latency of the requests per route, method and status."""
+
+    def __init__(self, app, registry=None):
+        self.app = app
+        self.registry = registry if registry is not None else metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope, use its
+            # template so the number of series stays bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            self.registry.inc(
+                "api_requests_total",
+                (("route", route), ("method", method), ("status", str(status[0]))),
+            )
+            self.registry.observe(
+                "api_request_duration_seconds",
+                (("route", route), ("method", method)),
+                time.perf_counter() - started,
+            )
+
+
+class ProfilerMiddleware:  # pylint: disable=too-few-public-methods
+    """Runs the requests selected by a profiler under its sampler."""
+
+    def __init__(self, app, profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = self.profiler.start()
+        if sampler is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.stop(sampler, scope, status[0], started)
+
+
+class AccessLogMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    Logs the requests to `api.access`, sampled per route.
+
+    `rates` maps a route template to the fraction of its requests logged, "*"
+    being the rate of the other routes. Server errors (5xx) are always logged.
+    The route, method, status, duration and request ID are passed as `extra`
+    fields, so they are separate keys in the JSON output.
+    """
+
+    def __init__(self, app, rates: Dict[str, float]):
+        self.app = app
+        self.rates = rates
+        self.default = rates.get("*", 0.0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            rate = self.rates.get(route, self.default)
+            if status[0] >= 500 or rate >= 1 or (rate > 0 and random.random() < rate):
+                self._log(scope, route, status[0], time.perf_counter() - started)
+
+    @staticmethod
+    def _log(scope: Dict[str, Any], route: str, status: int, elapsed: float) -> None:
+        """Logs one request."""
+        client = scope.get("client")
+        path = scope["path"]
+        if scope.get("query_string"):
+            path = f"{path}?{scope['query_string'].decode('latin-1')}"
+        access_logger.info(
+            '%s - "%s %s HTTP/%s" %d %.1fms',
+            f"{client[0]}:{client[1]}" if client else "-",
+            scope["method"],
+            path,
+            scope.get("http_version", "1.1"),
+            status,
+            elapsed * 1000,
+            extra={
+                "route": route,
+                "method": scope["method"],
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "request_id": scope.get("state", {}).get("request_id"),
+            },
+        )
@@ -0,0 +1,224 @@
+"""Profiler module."""
+
+import collections
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+Frame = Tuple[str, int, str]
+Stack = Tuple[Frame, ...]
+
+# Innermost frames of threads waiting for work, left out of the samples
+IDLE_FILES = frozenset({"threading.py", "selectors.py", "queue.py"})
+
+
+class _Sampler(threading.Thread):
+    """Thread sampling the stacks of the busy threads until stopped."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="api-profiler", daemon=True)
+        self.interval = interval
+        self.stacks: Dict[Stack, int] = collections.Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        # Random phase, so requests shorter than the interval are still
+        # sampled in proportion to their duration
+        delay = random.uniform(0, self.interval)
+        while not self._stopped.wait(delay):
+            self.sample(own)
+            delay = self.interval
+
+    def sample(self, own: int) -> None:
+        """Records the stack of every busy thread but this one."""
+        self.samples += 1
+        frames = sys._current_frames()  # pylint: disable=protected-access
+        for ident, frame in frames.items():
+            if ident == own or (
+                os.path.basename(frame.f_code.co_filename) in IDLE_FILES
+            ):
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        """Stops sampling and waits for the thread."""
+        self._stopped.set()
+        self.join()
+
+
+class Profiler:
+    """
+    Sampling profiler of selected requests.
+
+    A request is profiled when drawn with probability `rate`, or when it
+    carries `header` and `authorize` accepts its caller. While it runs, a
+    thread samples every `interval` seconds the stacks of the busy threads of
+    the process (the event loop, and the thread pool running sync handlers).
+    Concurrent requests are sampled too, so profile under moderate traffic.
+    Only one request is profiled at a time, the others run untouched.
+
+    The profiles of the last `capacity` requests are kept in a ring buffer
+    and can be exported as collapsed stacks (flame graph tools) or as a pstats
+    file, where call counts are sample counts and times are estimated from
+    them. Each worker process keeps its own buffer.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        enabled: bool = False,
+        rate: float = 0.0,
+        header: str = "X-Profile",
+        interval: float = 0.005,
+        capacity: int = 50,
+        authorize: Optional[Callable[[Request], bool]] = None,
+    ):
+        """
+        Initializes the profiler.
+
+        Args:
+            enabled (bool): Install the profiling middleware.
+            rate (float): Fraction of the requests profiled.
+            header (str): Header requesting the profiling of a request.
+            interval (float): Seconds between two samples.
+            capacity (int): Profiles kept.
+            authorize (Callable): Checks that the caller of a request carrying
+                the header may profile it, the header is ignored without it.
+        """
+        self.enabled = enabled
+        self.rate = rate
+        self.header = header.lower().encode("latin-1")
+        self.interval = interval
+        self.authorize = authorize
+        self.profiles: collections.deque = collections.deque(maxlen=capacity)
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        """
+        Returns the profiler configured through environment variables.
+
+        - API_PROFILE: enable the profiling of requests.
+        - API_PROFILE_RATE: fraction of the requests profiled (default: 0,
+          only the requests carrying the header).
+        - API_PROFILE_HEADER: header requesting a profile (default: X-Profile),
+          honored for admins only.
+        - API_PROFILE_INTERVAL: seconds between two samples (default: 0.005).
+        - API_PROFILE_BUFFER: profiles kept (default: 50).
+        """
+        return cls(
+            enabled=environ.get("API_PROFILE", "false").lower() == "true",
+            rate=float(environ.get("API_PROFILE_RATE", 0)),
+            header=environ.get("API_PROFILE_HEADER", "X-Profile"),
+            interval=float(environ.get("API_PROFILE_INTERVAL", 0.005)),
+            capacity=int(environ.get("API_PROFILE_BUFFER", 50)),
+        )
+
+    def wants(self, scope: Dict[str, Any]) -> bool:
+        """Checks if a request is selected for profiling."""
+        if self.rate and random.random() < self.rate:
+            return True
+        if self.authorize is None:
+            return False
+        for name, _ in scope["headers"]:
+            if name == self.header:
+                return self.authorize(Request(scope))
+        return False
+
+    def start(self) -> Optional[_Sampler]:
+        """Starts sampling, returns None if a request is already profiled."""
+        # Released by stop(), once the request is over
+        # pylint: disable-next=consider-using-with
+        if not self._busy.acquire(blocking=False):
+            return None
+        sampler = _Sampler(self.interval)
+        sampler.start()
+        return sampler
+
+    def stop(
+        self, sampler: _Sampler, scope: Dict[str, Any], status: int, started: float
+    ) -> None:
+        """Stops sampling and stores the profile of the request."""
+        try:
+            sampler.stop()
+        finally:
+            self._busy.release()
+        elapsed = time.perf_counter() - started
+        self.profiles.append(
+            {
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", "unmatched"),
+                "status": status,
+                "started": time.time() - elapsed,
+                "duration_ms": elapsed * 1000,
+                "samples": sampler.samples,
+                "stacks": dict(sampler.stacks),
+            }
+        )
+
+    def _stacks(self, route: Optional[str] = None) -> Dict[Stack, int]:
+        """Returns the stacks of the kept profiles, summed."""
+        stacks: Dict[Stack, int] = collections.Counter()
+        for profile in list(self.profiles):
+            if route is None or profile["route"] == route:
+                stacks.update(profile["stacks"])
+        return stacks
+
+    def summary(self, route: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Returns the kept profiles, without their stacks."""
+        return [
+            {key: value for key, value in profile.items() if key != "stacks"}
+            for profile in list(self.profiles)
+            if route is None or profile["route"] == route
+        ]
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Returns the stacks in the collapsed format ("a;b;c count" lines)."""
+        lines = [
+            ";".join(f"{name} ({filename}:{line})" for filename, line, name in stack)
+            + f" {count}"
+            for stack, count in self._stacks(route).items()
+        ]
+        return "\n".join(sorted(lines)) + "\n" if lines else ""
+
+    def pstats(self, route: Optional[str] = None) -> bytes:
+        """Returns the stacks as a file loadable by `pstats.Stats`."""
+        stats: Dict[Frame, List[Any]] = {}
+        for stack, count in self._stacks(route).items():
+            weight = count * self.interval
+            for depth, frame in enumerate(stack):
+                if frame in stack[:depth]:
+                    continue  # Recursion, already counted
+                entry = stats.setdefault(frame, [0, 0, 0.0, 0.0, {}])
+                own = weight if depth == len(stack) - 1 else 0.0
+                entry[0] += count
+                entry[1] += count
+                entry[2] += own
+                entry[3] += weight
+                if depth:
+                    caller = entry[4].setdefault(stack[depth - 1], [0, 0, 0.0, 0.0])
+                    caller[0] += count
+                    caller[1] += count
+                    caller[2] += own
+                    caller[3] += weight
+        return marshal.dumps(
+            {
+                frame: (cc, nc, tt, ct, {key: tuple(v) for key, v in callers.items()})
+                for frame, (cc, nc, tt, ct, callers) in stats.items()
+            }
+        )
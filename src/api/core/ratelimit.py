@@ -0,0 +1,223 @@
+"""RateLimiter module."""
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from os import environ
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+
+from .exceptions import ApiHttpException
+
+
+class BucketTable:
+    """
+    In-process table of token buckets.
+
+    A bucket left idle long enough to be full again is equivalent to a missing
+    one, so such entries are dropped lazily every `sweep_every` takes.
+    """
+
+    def __init__(self, sweep_every: int = 1024):
+        self.sweep_every = sweep_every
+        self._buckets: Dict[str, List[float]] = {}
+        self._takes = 0
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        """Takes `cost` tokens, returns 0 if allowed or the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            self._takes += 1
+            if self._takes % self.sweep_every == 0:
+                self._sweep(now)
+
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                # [tokens, updated_at, seconds to refill completely]
+                bucket = self._buckets[key] = [capacity, now, capacity / rate]
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / rate
+
+    def _sweep(self, now: float) -> None:
+        """Drops the buckets that refilled completely."""
+        expired = [
+            key
+            for key, (_, updated_at, refill) in self._buckets.items()
+            if now - updated_at >= refill
+        ]
+        for key in expired:
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SharedBucketTable:
+    """
+    Token buckets in a memory-mapped file shared by every worker on the host.
+
+    The file holds a fixed number of slots addressed by the hash of the key,
+    each slot being (key hash, tokens, updated_at). Updates are serialized with
+    an exclusive `flock`. Two keys landing on the same slot share it until one
+    of them overwrites it, which only makes the limiter more lenient.
+    """
+
+    SLOT = struct.Struct("<Qdd")
+
+    def __init__(self, filename: str, slots: int = 65536):
+        """
+        Opens (or creates) the shared table.
+
+        Args:
+            filename (str): Path of the table, ideally on a tmpfs like /dev/shm.
+            slots (int): Number of buckets in the table.
+        """
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        self._fcntl = fcntl
+        self.filename = filename
+        self.slots = slots
+        size = self.SLOT.size * slots
+        self._fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> float:
+        """Takes `cost` tokens, returns 0 if allowed or the seconds to wait."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        key_hash = int.from_bytes(digest, "little") or 1
+        offset = (key_hash % self.slots) * self.SLOT.size
+        now = time.time()
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                stored_hash, tokens, updated_at = self.SLOT.unpack_from(
+                    self._map, offset
+                )
+                if stored_hash != key_hash:
+                    tokens, updated_at = capacity, now
+                tokens = min(capacity, tokens + (now - updated_at) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self.SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+        return 0.0 if allowed else (cost - tokens) / rate
+
+    def close(self) -> None:
+        """Unmaps the table and closes its file."""
+        with self._lock:
+            self._map.close()
+            os.close(self._fd)
+
+
+class RateLimiter:
+    """
+    Per-route, per-identity rate limiter based on token buckets.
+
+    Rules map a route path (as declared, e.g. "/auth/login") to a budget of
+    `count` requests per `seconds`, "*" being the rule of every other route.
+    The identity is the client IP unless `identify` returns one (e.g. the
+    username of a valid token). The limiter is a FastAPI dependency, so it runs
+    before the handler and rejects with a 429 and a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        rules: Dict[str, Tuple[int, float]],
+        table=None,
+        identify: Optional[Callable[[Request], Optional[str]]] = None,
+    ):
+        """
+        Initializes the limiter.
+
+        Args:
+            rules (dict): Route path to (count, seconds).
+            table: Bucket table, BucketTable or SharedBucketTable.
+            identify (Callable): Returns the identity of a request, or None to
+                fall back to the client IP.
+        """
+        self.rules = {
+            path: (float(count), count / seconds)
+            for path, (count, seconds) in rules.items()
+        }
+        self.table = table if table is not None else BucketTable()
+        self.identify = identify
+        self.rejected = 0
+        self._rejected_lock = threading.Lock()
+
+    @staticmethod
+    def parse_rules(value: str) -> Dict[str, Tuple[int, float]]:
+        """Parses "path=count/seconds,..." into rules."""
+        rules = {}
+        for rule in filter(None, (item.strip() for item in value.split(","))):
+            path, budget = rule.rsplit("=", 1)
+            count, seconds = budget.split("/")
+            rules[path.strip()] = (int(count), float(seconds))
+        return rules
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Returns the limiter configured through environment variables.
+
+        - RATE_LIMITS: "path=count/seconds" rules, comma separated, e.g.
+          "/auth/get-token=10/60" (default: empty, the limiter is disabled).
+          Anonymous callers are keyed by client IP: behind a proxy, list it in
+          FORWARDED_ALLOW_IPS so uvicorn takes the IP from X-Forwarded-For,
+          otherwise every caller shares the budget of the proxy.
+        - RATE_LIMIT_SHARED: share the buckets between the workers of the host.
+        - RATE_LIMIT_FILE: shared table path (default: in /dev/shm if present).
+        """
+        rules = cls.parse_rules(environ.get("RATE_LIMITS", ""))
+        table = None
+        if environ.get("RATE_LIMIT_SHARED", "false").lower() == "true":
+            directory = (
+                "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            )
+            table = SharedBucketTable(
+                environ.get(
+                    "RATE_LIMIT_FILE", os.path.join(directory, "sample-api-ratelimit")
+                )
+            )
+        return cls(rules, table=table)
+
+    def check(self, request: Request) -> None:
+        """Consumes one token for the request or raises a 429."""
+        if not self.rules:
+            return
+        route = request.scope.get("route")
+        path = getattr(route, "path", request.url.path)
+        rule = self.rules.get(path) or self.rules.get("*")
+        if rule is None:
+            return
+
+        identity = self.identify(request) if self.identify else None
+        if identity is None:
+            identity = request.client.host if request.client else "unknown"
+        retry_after = self.table.take(f"{path}|{identity}", *rule)
+        if retry_after:
+            with self._rejected_lock:
+                self.rejected += 1
+            raise ApiHttpException(
+                status_code=429,
+                data="Too Many Requests",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+    async def __call__(self, request: Request) -> None:
+        self.check(request)
@@ -0,0 +1,56 @@
+"""Responses module."""
+
+import json
+from typing import Any, Optional, Set
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ApiJSONResponse(JSONResponse):
+    """
+    JSON response rendering its content to bytes in a single pass.
+
+    Pydantic models (ApiResponse) are serialized by their compiled serializer
+    straight to bytes, without building an intermediate dict. Other content is
+    encoded with orjson when it is installed (an optional dependency), the
+    stdlib json otherwise (or when orjson rejects it). Values JSON has no type
+    for raise TypeError like the stdlib does, keys that are not strings are
+    converted like the stdlib does.
+    """
+
+    def __init__(
+        self, content: Any, *args, exclude: Optional[Set[str]] = None, **kwargs
+    ):
+        """
+        Initializes the response.
+
+        Args:
+            content (Any): Content to render.
+            exclude (set): Fields of a model content to leave out.
+        """
+        self.exclude = exclude
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(
+                content, exclude=self.exclude
+            )
+        if orjson is not None:
+            try:
+                return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass  # e.g. integers over 64 bits, the stdlib decides
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
@@ -1,3 +1,5 @@
 """DB module."""
 
 from .__main__ import DBDriverFactory
+from .executor import ExecutorStore
+from .interface import AsyncDBInterface, DBInterface
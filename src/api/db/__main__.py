@@ -1,16 +1,92 @@
 """DBDriverFactory module."""
 
-from .interface import DBInterface
+from os import environ
+
+from .executor import ExecutorStore
+from .interface import AsyncDBInterface, DBInterface
 from .local import LocalStore
+from .log import LogStore
+from .sqlite import SQLiteStore
 
 
-class DBDriverFactory:  # pylint: disable=too-few-public-methods
+class DBDriverFactory:
     """Factory to select the appropriate DB driver."""
 
+    FILE_EXTENSIONS = {
+        "local": "json",
+        "log": "log",
+        "sqlite": "sqlite3",
+    }
+
+    # Driver of the named stores when DB_DRIVER is not set, the append-only
+    # log keeps the writes of each login O(1)
+    DEFAULT_DRIVERS = {
+        "refresh": "log",
+    }
+
+    # Fields indexed by default in each named store
+    DEFAULT_INDEXES = {
+        "users": "roles",
+        "refresh": "family,username",
+    }
+
     @staticmethod
     def get_driver(driver_type: str, *args, **kwargs) -> DBInterface:
         """Returns the appropriate DB driver based on the driver type."""
         driver_type = driver_type.lower()
         if driver_type == "local":
             return LocalStore(*args, **kwargs)
+        if driver_type == "log":
+            return LogStore(*args, **kwargs)
+        if driver_type == "sqlite":
+            return SQLiteStore(*args, **kwargs)
         raise ValueError(f"Unsupported driver type: {driver_type}")
+
+    @classmethod
+    def get_async_driver(
+        cls, driver_type: str, *args, max_workers: int = 4, **kwargs
+    ) -> AsyncDBInterface:
+        """Returns the driver wrapped so its blocking I/O runs on an executor."""
+        return ExecutorStore(
+            cls.get_driver(driver_type, *args, **kwargs), max_workers=max_workers
+        )
+
+    @classmethod
+    def from_env(cls, name: str = "users") -> DBInterface:
+        """
+        Returns the DB driver configured through environment variables.
+
+        - DB_DRIVER: driver type of every store (default: local, log for the
+          refresh tokens).
+        - DB_FILENAME: storage file of the users (default: users.db.<ext>).
+        - DB_CACHE: enable the in-memory cache of the local driver.
+        - DB_COMPACT_THRESHOLD: dead records before the log driver compacts.
+        - DB_INDEXES: comma separated fields with a secondary index (default:
+          roles). The local driver only keeps them with DB_CACHE=true, as the
+          index lives next to the cached data.
+
+        Other stores (e.g. name="revoked") read DB_<NAME>_DRIVER,
+        DB_<NAME>_FILENAME and DB_<NAME>_INDEXES instead, with the defaults of
+        DEFAULT_DRIVERS and DEFAULT_INDEXES.
+        """
+        prefix = "DB_" if name == "users" else f"DB_{name.upper()}_"
+        driver_type = (
+            environ.get(f"{prefix}DRIVER")
+            or environ.get("DB_DRIVER")
+            or cls.DEFAULT_DRIVERS.get(name, "local")
+        ).lower()
+        filename = environ.get(
+            f"{prefix}FILENAME",
+            f"{name}.db.{cls.FILE_EXTENSIONS.get(driver_type, driver_type)}",
+        )
+        indexes = environ.get(f"{prefix}INDEXES", cls.DEFAULT_INDEXES.get(name, ""))
+        options = {
+            "indexes": [field.strip() for field in indexes.split(",") if field.strip()]
+        }
+        if driver_type == "local":
+            options["cache"] = environ.get("DB_CACHE", "false").lower() == "true"
+        if driver_type == "log":
+            options["compact_threshold"] = int(
+                environ.get("DB_COMPACT_THRESHOLD", 1000)
+            )
+        return cls.get_driver(driver_type, filename, **options)
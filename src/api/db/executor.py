@@ -0,0 +1,109 @@
+"""ExecutorStore module."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple
+
+from .interface import AsyncDBInterface, DBInterface, check_limit
+
+
+class ExecutorStore(AsyncDBInterface):
+    """
+    Concrete implementation of AsyncDBInterface wrapping a synchronous driver.
+
+    The blocking I/O of the wrapped driver runs on a bounded thread pool, so the
+    event loop is never blocked by the store.
+    """
+
+    # Records fetched per executor call while scanning
+    scan_batch_size = 100
+
+    def __init__(self, store: DBInterface, max_workers: int = 4):
+        """
+        Initializes the store with the driver to wrap.
+
+        Args:
+            store (DBInterface): Synchronous driver doing the actual I/O.
+            max_workers (int): Maximum number of threads running store calls.
+        """
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db"
+        )
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        Runs a blocking call on the executor of the store.
+
+        Used for the wrapped driver, and for other store I/O of the callers so
+        it shares the same bound.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def close(self) -> None:
+        """Waits for the pending calls and shuts the executor down."""
+        self._executor.shutdown(wait=True)
+
+    async def create(self, key: str, data: Dict[str, Any]) -> None:
+        """Creates a new record in the database."""
+        await self.run(self.store.create, key, data)
+
+    async def read(self, key: str) -> Dict[str, Any]:
+        """Reads a record from the database."""
+        return await self.run(self.store.read, key)
+
+    async def update(self, key: str, data: Dict[str, Any]) -> None:
+        """Updates an existing record in the database."""
+        await self.run(self.store.update, key, data)
+
+    async def delete(self, key: str) -> None:
+        """Deletes a record from the database."""
+        await self.run(self.store.delete, key)
+
+    async def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lists all records in the database."""
+        return await self.run(self.store.list_all)
+
+    async def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """Replaces a record only if its fields still hold the expected values."""
+        return await self.run(self.store.update_if, key, expected, data)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+        return await self.run(self.store.get_many, list(keys))
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records at once."""
+        await self.run(self.store.put_many, records)
+
+    async def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Creates the records whose keys do not exist yet, returns the others."""
+        return await self.run(self.store.create_many, records)
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records at once and returns how many were deleted."""
+        return await self.run(self.store.delete_many, list(keys))
+
+    async def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (key, record) pairs in key order, fetched in small batches."""
+        check_limit(limit)
+        iterator = self.store.scan(after=after, limit=limit, exclude=exclude)
+        while True:
+            batch = await self.run(list, islice(iterator, self.scan_batch_size))
+            for item in batch:
+                yield item
+            if len(batch) < self.scan_batch_size:
+                return
+
+    async def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Returns the records whose field holds the value."""
+        return await self.run(self.store.find_by, field, value)
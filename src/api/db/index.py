@@ -0,0 +1,67 @@
+"""SecondaryIndex module."""
+
+from typing import Any, Dict, FrozenSet, Iterable, Set, Tuple
+
+
+def field_values(data: Dict[str, Any], field: str) -> FrozenSet[Any]:
+    """Returns the indexable values of a field, one per item for list fields."""
+    value = data.get(field)
+    if value is None:
+        return frozenset()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return frozenset(value)
+    return frozenset((value,))
+
+
+class SecondaryIndex:
+    """In-memory index mapping (field, value) to the keys holding that value."""
+
+    def __init__(self, fields: Iterable[str] = ()):
+        """
+        Initializes an empty index.
+
+        Args:
+            fields (Iterable[str]): Record fields to index.
+        """
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self._keys: Dict[str, Dict[Any, Set[str]]] = {
+            field: {} for field in self.fields
+        }
+        self._values: Dict[str, Dict[str, FrozenSet[Any]]] = {}
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._keys
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        """Indexes a record, replacing the entries of its previous version."""
+        if not self.fields:
+            return
+        self.discard(key)
+        values = {field: field_values(data, field) for field in self.fields}
+        for field, field_vals in values.items():
+            for value in field_vals:
+                self._keys[field].setdefault(value, set()).add(key)
+        self._values[key] = values
+
+    def discard(self, key: str) -> None:
+        """Removes a record from the index."""
+        values = self._values.pop(key, None)
+        if values is None:
+            return
+        for field, field_vals in values.items():
+            for value in field_vals:
+                keys = self._keys[field][value]
+                keys.discard(key)
+                if not keys:
+                    del self._keys[field][value]
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Rebuilds the whole index from the given records."""
+        self._keys = {field: {} for field in self.fields}
+        self._values = {}
+        for key, data in records.items():
+            self.put(key, data)
+
+    def lookup(self, field: str, value: Any) -> Set[str]:
+        """Returns the keys whose field holds the given value."""
+        return set(self._keys[field].get(value, ()))
@@ -1,7 +1,9 @@
 """DBInterface module."""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .index import field_values
 
 
 class DBInterface(ABC):
@@ -26,3 +28,186 @@ class DBInterface(ABC):
     @abstractmethod
     def list_all(self) -> Dict[str, Dict[str, Any]]:
         """Lists all records in the database."""
+
+    def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """
+        Replaces a record only if its fields still hold the expected values.
+
+        Drivers make the check and the write atomic, also between processes,
+        this fallback is not.
+
+        Returns:
+            bool: True if the record was replaced.
+
+        Raises:
+            KeyError: If the record does not exist.
+        """
+        current = self.read(key)
+        if any(current.get(field) != value for field, value in expected.items()):
+            return False
+        self.update(key, data)
+        return True
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+        records = {}
+        for key in keys:
+            try:
+                records[key] = self.read(key)
+            except KeyError:
+                pass
+        return records
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records at once."""
+        for key, data in records.items():
+            try:
+                self.update(key, data)
+            except KeyError:
+                self.create(key, data)
+
+    def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """
+        Creates the records whose keys do not exist yet, leaving the others alone.
+
+        Drivers check and write the whole batch atomically, this fallback
+        creates the records one by one.
+
+        Returns:
+            List[str]: Keys of the records that already existed.
+        """
+        existing = []
+        for key, data in records.items():
+            try:
+                self.create(key, data)
+            except KeyError:
+                existing.append(key)
+        return existing
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records at once and returns how many were deleted."""
+        deleted = 0
+        for key in keys:
+            try:
+                self.delete(key)
+                deleted += 1
+            except KeyError:
+                pass
+        return deleted
+
+    def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yields (key, record) pairs in key order.
+
+        Args:
+            after (str): Cursor, only keys greater than this one are returned.
+            limit (int): Maximum number of records to yield (0 or more).
+            exclude (Iterable[str]): Fields left out of every record.
+
+        Raises:
+            ValueError: If the limit is negative.
+        """
+        check_limit(limit)
+        records = self.list_all()
+        keys = sorted(key for key in records if after is None or key > after)
+        yield from project(
+            ((key, records[key]) for key in keys[:limit]), exclude=exclude
+        )
+
+    def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns the records whose field holds the value (or contains it, for lists).
+
+        Drivers use a secondary index when the field is indexed, this fallback
+        scans every record.
+        """
+        return {
+            key: data
+            for key, data in self.list_all().items()
+            if value in field_values(data, field)
+        }
+
+
+class AsyncDBInterface(ABC):
+    """Interface for the asynchronous database operations (CRUD)."""
+
+    @abstractmethod
+    async def create(self, key: str, data: Dict[str, Any]) -> None:
+        """Creates a new record in the database."""
+
+    @abstractmethod
+    async def read(self, key: str) -> Dict[str, Any]:
+        """Reads a record from the database."""
+
+    @abstractmethod
+    async def update(self, key: str, data: Dict[str, Any]) -> None:
+        """Updates an existing record in the database."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Deletes a record from the database."""
+
+    @abstractmethod
+    async def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lists all records in the database."""
+
+    @abstractmethod
+    async def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """Replaces a record only if its fields still hold the expected values."""
+
+    @abstractmethod
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+
+    @abstractmethod
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records at once."""
+
+    @abstractmethod
+    async def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Creates the records whose keys do not exist yet, returns the others."""
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records at once and returns how many were deleted."""
+
+    @abstractmethod
+    async def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (key, record) pairs in key order."""
+
+    @abstractmethod
+    async def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Returns the records whose field holds the value."""
+
+
+def check_limit(limit: Optional[int]) -> None:
+    """Rejects a negative scan limit, which slicing would count from the end."""
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be 0 or more, not {limit}")
+
+
+def project(
+    records: Iterable[Tuple[str, Dict[str, Any]]], exclude: Iterable[str] = ()
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yields the records without the excluded fields."""
+    exclude = frozenset(exclude)
+    for key, data in records:
+        if exclude:
+            data = {
+                field: value for field, value in data.items() if field not in exclude
+            }
+        yield key, data
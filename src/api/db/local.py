@@ -1,18 +1,53 @@
 """LocalStore module."""
 
+import copy
 import json
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 
-from .interface import DBInterface
+from .index import SecondaryIndex
+from .lock import FileLock
+from .interface import DBInterface, check_limit, project
+
+
+class _Cache:  # pylint: disable=too-few-public-methods
+    """Decoded data of the JSON file, valid while the file signature is unchanged."""
+
+    def __init__(self):
+        # Held by the readers (re)loading the data, writers hold the file lock
+        self.lock = threading.Lock()
+        self.data: Optional[Dict[str, Dict[str, Any]]] = None
+        self.signature: Optional[Tuple[int, int, int]] = None
+        self.hits = 0
+        self.misses = 0
 
 
 class LocalStore(DBInterface):
-    """Concrete implementation of DBInterface using a JSON file as storage."""
+    """
+    Concrete implementation of DBInterface using a JSON file as storage.
+
+    Reads hold the lock shared and writes exclusive, also between the processes
+    opening the file. The file is rewritten through a temporary file renamed
+    over it, so it is never seen half-written.
+    """
+
+    def __init__(self, filename: str, cache: bool = False, indexes: Iterable[str] = ()):
+        """
+        Initializes the store with a specific file.
 
-    def __init__(self, filename: str):
-        """Initializes the store with a specific file."""
+        Args:
+            filename (str): Path of the JSON file used as storage.
+            cache (bool): Keep the decoded data in memory and only reload it when
+                the file changes on disk (mtime, size or inode).
+            indexes (Iterable[str]): Record fields with a secondary index, kept
+                alongside the cached data (only used when the cache is enabled).
+        """
         self.filename = filename
+        self.cache = cache
+        self._cached = _Cache()
+        self._secondary = SecondaryIndex(indexes)
+        self._lock = FileLock(f"{filename}.lock")
         self._ensure_file_exists()
 
     def _ensure_file_exists(self):
@@ -21,47 +56,200 @@ class LocalStore(DBInterface):
             with open(self.filename, "w", encoding="utf-8") as f:
                 json.dump({}, f)
 
-    def _load_data(self) -> Dict[str, Dict[str, Any]]:
-        """Loads data from the JSON file."""
+    @staticmethod
+    def _signature(stat: os.stat_result) -> Tuple[int, int, int]:
+        """Returns the (mtime, size, inode) signature of the JSON file."""
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        """Reads and decodes the JSON file."""
         with open(self.filename, "r", encoding="utf-8") as f:
             return json.load(f)
 
+    def _load_data(self) -> Dict[str, Dict[str, Any]]:
+        """Loads data from the JSON file, or from the cache when enabled (lock held)."""
+        if not self.cache:
+            return self._read_file()
+
+        cached = self._cached
+        with cached.lock:
+            signature = self._signature(os.stat(self.filename))
+            if cached.data is not None and signature == cached.signature:
+                cached.hits += 1
+                return cached.data
+
+            cached.misses += 1
+            cached.data = self._read_file()
+            cached.signature = signature
+            self._secondary.rebuild(cached.data)
+            return cached.data
+
     def _save_data(self, data: Dict[str, Dict[str, Any]]) -> None:
         """Saves data to the JSON file."""
-        with open(self.filename, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        tmp_filename = f"{self.filename}.{os.getpid()}.tmp"
+        with self._lock.hold():
+            try:
+                with open(tmp_filename, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    # Signature of this very write, kept by the rename
+                    signature = self._signature(os.fstat(f.fileno()))
+                os.replace(tmp_filename, self.filename)
+            except Exception:
+                # The cached copy was already mutated in place, drop it
+                self._cached.data = None
+                if os.path.exists(tmp_filename):
+                    os.remove(tmp_filename)
+                raise
+
+            if self.cache:
+                self._cached.data = data
+                self._cached.signature = signature
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Returns the cache hit/miss counters."""
+        hits, misses = self._cached.hits, self._cached.misses
+        return {
+            "enabled": self.cache,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        }
 
     def create(self, key: str, data: Dict[str, Any]) -> None:
         """Creates a new record in the database."""
-        data_store = self._load_data()
-        if key in data_store:
-            raise KeyError(f"Record with key {key} already exists.")
-        data_store[key] = data
-        self._save_data(data_store)
+        with self._lock.hold():
+            data_store = self._load_data()
+            if key in data_store:
+                raise KeyError(f"Record with key {key} already exists.")
+            data_store[key] = copy.deepcopy(data) if self.cache else data
+            self._save_data(data_store)
+            if self.cache:
+                self._secondary.put(key, data_store[key])
 
     def read(self, key: str) -> Dict[str, Any]:
         """Reads a record from the database."""
-        data_store = self._load_data()
-        if key not in data_store:
-            raise KeyError(f"Record with key {key} not found.")
-        return data_store[key]
+        with self._lock.hold(shared=True):
+            data_store = self._load_data()
+            if key not in data_store:
+                raise KeyError(f"Record with key {key} not found.")
+            return copy.deepcopy(data_store[key]) if self.cache else data_store[key]
 
     def update(self, key: str, data: Dict[str, Any]) -> None:
         """Updates an existing record in the database."""
-        data_store = self._load_data()
-        if key not in data_store:
-            raise KeyError(f"Record with key {key} not found.")
-        data_store[key] = data
-        self._save_data(data_store)
+        with self._lock.hold():
+            data_store = self._load_data()
+            if key not in data_store:
+                raise KeyError(f"Record with key {key} not found.")
+            data_store[key] = copy.deepcopy(data) if self.cache else data
+            self._save_data(data_store)
+            if self.cache:
+                self._secondary.put(key, data_store[key])
+
+    def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """Replaces a record only if its fields still hold the expected values."""
+        with self._lock.hold():
+            data_store = self._load_data()
+            if key not in data_store:
+                raise KeyError(f"Record with key {key} not found.")
+            current = data_store[key]
+            if any(current.get(field) != value for field, value in expected.items()):
+                return False
+            data_store[key] = copy.deepcopy(data) if self.cache else data
+            self._save_data(data_store)
+            if self.cache:
+                self._secondary.put(key, data_store[key])
+            return True
 
     def delete(self, key: str) -> None:
         """Deletes a record from the database."""
-        data_store = self._load_data()
-        if key not in data_store:
-            raise KeyError(f"Record with key {key} not found.")
-        del data_store[key]
-        self._save_data(data_store)
+        with self._lock.hold():
+            data_store = self._load_data()
+            if key not in data_store:
+                raise KeyError(f"Record with key {key} not found.")
+            del data_store[key]
+            self._save_data(data_store)
+            if self.cache:
+                self._secondary.discard(key)
 
     def list_all(self) -> Dict[str, Dict[str, Any]]:
         """Lists all records in the database."""
-        return self._load_data()
+        with self._lock.hold(shared=True):
+            data_store = self._load_data()
+            return copy.deepcopy(data_store) if self.cache else data_store
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+        with self._lock.hold(shared=True):
+            data_store = self._load_data()
+            records = {key: data_store[key] for key in keys if key in data_store}
+            return copy.deepcopy(records) if self.cache else records
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records in a single load/save cycle."""
+        with self._lock.hold():
+            data_store = self._load_data()
+            data_store.update(copy.deepcopy(records) if self.cache else records)
+            self._save_data(data_store)
+            if self.cache:
+                for key in records:
+                    self._secondary.put(key, data_store[key])
+
+    def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Creates the missing records in a single load/save cycle."""
+        with self._lock.hold():
+            data_store = self._load_data()
+            existing = [key for key in records if key in data_store]
+            created = {
+                key: data for key, data in records.items() if key not in data_store
+            }
+            if created:
+                data_store.update(copy.deepcopy(created) if self.cache else created)
+                self._save_data(data_store)
+                if self.cache:
+                    for key in created:
+                        self._secondary.put(key, data_store[key])
+            return existing
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records in a single load/save cycle."""
+        with self._lock.hold():
+            data_store = self._load_data()
+            deleted = []
+            for key in keys:
+                if key in data_store:
+                    del data_store[key]
+                    deleted.append(key)
+            if deleted:
+                self._save_data(data_store)
+                if self.cache:
+                    for key in deleted:
+                        self._secondary.discard(key)
+            return len(deleted)
+
+    def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (key, record) pairs in key order."""
+        check_limit(limit)
+        with self._lock.hold(shared=True):
+            data_store = self._load_data()
+            keys = sorted(key for key in data_store if after is None or key > after)
+            # Writes replace whole records, these are copied lazily below
+            records = [(key, data_store[key]) for key in keys[:limit]]
+        for key, data in project(records, exclude=exclude):
+            yield key, copy.deepcopy(data) if self.cache else data
+
+    def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Returns the records whose field holds the value, using the index."""
+        if not self.cache or field not in self._secondary:
+            return super().find_by(field, value)
+        with self._lock.hold(shared=True):
+            data_store = self._load_data()
+            keys = self._secondary.lookup(field, value)
+            return {key: copy.deepcopy(data_store[key]) for key in sorted(keys)}
@@ -0,0 +1,128 @@
+"""FileLock module."""
+
+import contextlib
+import os
+import threading
+import weakref
+from typing import Iterator
+
+# Locks whose file descriptor must not be shared with a forked worker
+_locks: "weakref.WeakSet[FileLock]" = weakref.WeakSet()
+
+
+class FileLock:  # pylint: disable=too-many-instance-attributes
+    """
+    Readers-writer lock shared by the threads of a process and, through `flock`
+    on a side file, by the processes opening the same store.
+
+    Shared holds run concurrently (also between the threads of a process unless
+    `concurrent_readers` is False), an exclusive hold waits for every other
+    holder, and waiting writers go before new readers. Reentrant: a thread
+    holding the lock may hold it again in the same mode, or shared inside an
+    exclusive hold; only the outermost hold takes the file lock.
+
+    A forked child opens the side file again: `flock` locks belong to the open
+    file, so a descriptor inherited from the parent would not exclude it.
+    """
+
+    def __init__(self, filename: str, concurrent_readers: bool = True):
+        """
+        Opens (or creates) the lock file.
+
+        Args:
+            filename (str): Path of the lock file, next to the store.
+            concurrent_readers (bool): Let the threads of this process hold the
+                lock shared at the same time, False for stores whose reads use
+                state that is not thread-safe.
+        """
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        self._fcntl = fcntl
+        self.filename = filename
+        self._fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o600)
+        self._concurrent_readers = concurrent_readers
+        self._cond = threading.Condition()
+        # Threads holding the lock shared, or -1 while held exclusive
+        self._holders = 0
+        self._waiting_writers = 0
+        # Depth and mode of the holds of the current thread
+        self._local = threading.local()
+        _locks.add(self)
+
+    def _reopen(self) -> None:
+        """Replaces the side file inherited by a forked child, lock released."""
+        os.close(self._fd)
+        self._fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o600)
+        self._cond = threading.Condition()
+        self._holders = 0
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    def _acquire(self, shared: bool) -> None:
+        """Waits for the lock in this process, then takes the file lock."""
+        with self._cond:
+            if shared:
+                while (
+                    self._holders < 0
+                    or self._waiting_writers
+                    or (self._holders and not self._concurrent_readers)
+                ):
+                    self._cond.wait()
+                if not self._holders:
+                    self._fcntl.flock(self._fd, self._fcntl.LOCK_SH)
+                self._holders += 1
+                return
+
+            self._waiting_writers += 1
+            try:
+                while self._holders:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            self._holders = -1
+
+    def _release(self, shared: bool) -> None:
+        """Releases the lock, and the file lock with its last holder."""
+        with self._cond:
+            self._holders = self._holders - 1 if shared else 0
+            if not self._holders:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def hold(self, shared: bool = False) -> Iterator[None]:
+        """Holds the lock, shared (readers) or exclusive (writers)."""
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            if not shared and self._local.shared:
+                raise RuntimeError("A shared hold cannot become exclusive")
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+
+        self._acquire(shared)
+        self._local.depth, self._local.shared = 1, shared
+        try:
+            yield
+        finally:
+            self._local.depth = 0
+            self._release(shared)
+
+    def close(self) -> None:
+        """Closes the side file."""
+        _locks.discard(self)
+        os.close(self._fd)
+
+
+def _after_fork_in_child() -> None:
+    """Makes the locks of a forked worker open their own side files."""
+    for lock in list(_locks):
+        lock._reopen()  # pylint: disable=protected-access
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,387 @@
+"""LogStore module."""
+
+import contextlib
+import json
+import os
+import threading
+import weakref
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .index import SecondaryIndex
+from .lock import FileLock
+from .interface import DBInterface, check_limit, project
+
+# Stores whose file handles must not be reused by a forked worker
+_stores: "weakref.WeakSet[LogStore]" = weakref.WeakSet()
+
+
+class _Log:
+    """An open log file, with the index of the records replayed from it."""
+
+    def __init__(self, filename: str):
+        self.reader = open(filename, "rb")  # pylint: disable=consider-using-with
+        self.writer = open(filename, "ab")  # pylint: disable=consider-using-with
+        self.inode = os.fstat(self.reader.fileno()).st_ino
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self.records = 0
+        self.size = 0
+
+    def apply(self, line: bytes) -> Optional[Dict[str, Any]]:
+        """Applies a log line to the index, returns its record (None if torn)."""
+        if not line.endswith(b"\n"):
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+
+        if record["op"] == "put":
+            self.index[record["key"]] = (self.size, len(line))
+        else:
+            self.index.pop(record["key"], None)
+        self.records += 1
+        self.size += len(line)
+        return record
+
+    def close(self) -> None:
+        """Closes the file handles."""
+        self.reader.close()
+        self.writer.close()
+
+
+class LogStore(DBInterface):
+    """
+    Concrete implementation of DBInterface using an append-only log as storage.
+
+    Every create/update/delete appends one JSON line to the file. An in-memory
+    index maps each live key to the (offset, length) of its latest record and is
+    rebuilt by replaying the log on open. Once enough records are dead the log is
+    compacted in a background thread.
+
+    Several processes (e.g. API_WORKERS > 1) may share the log: operations hold
+    a `flock` on `<filename>.lock`, each process replays the records appended by
+    the others before using its index, and reopens the log once another process
+    has compacted it. A forked child reopens the log, the offset of the file
+    handles inherited from the parent would be shared with it.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        compact_threshold: int = 1000,
+        fsync: bool = False,
+        indexes: Iterable[str] = (),
+    ):
+        """
+        Initializes the store with a specific file.
+
+        Args:
+            filename (str): Path of the log file used as storage.
+            compact_threshold (int): Number of dead records that triggers a
+                background compaction (only once they outnumber live records).
+            fsync (bool): Call fsync after every append.
+            indexes (Iterable[str]): Record fields with a secondary index.
+        """
+        self.filename = filename
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        # Reads seek the shared file handles, one thread at a time
+        self._lock = FileLock(f"{filename}.lock", concurrent_readers=False)
+        self._secondary = SecondaryIndex(indexes)
+        self._compacting = threading.Lock()
+        with self._lock.hold():
+            with open(self.filename, "ab"):
+                pass
+            self._log = self._load()
+        _stores.add(self)
+
+    def _forget_log(self) -> None:
+        """Makes a forked child reopen the log on its next operation."""
+        self._compacting = threading.Lock()
+        self._log.inode = None
+
+    @property
+    def dead_records(self) -> int:
+        """Number of records in the log that are no longer referenced."""
+        return self._log.records - len(self._log.index)
+
+    def _load(self) -> _Log:
+        """Opens the log file and rebuilds the indexes by replaying it."""
+        log = _Log(self.filename)
+        self._secondary.rebuild({})
+        self._catch_up(log)
+        return log
+
+    def _replay(self, log: _Log, lines: Iterable[bytes]) -> None:
+        """Applies log lines to the indexes, up to the first torn one."""
+        for line in lines:
+            record = log.apply(line)
+            if record is None:
+                break
+            if record["op"] == "put":
+                self._secondary.put(record["key"], record["data"])
+            else:
+                self._secondary.discard(record["key"])
+
+    def _catch_up(self, log: _Log) -> None:
+        """Replays the records appended to the log since it was last read."""
+        log.reader.seek(log.size)
+        self._replay(log, log.reader)
+
+        # Drop a torn record left behind by a crash in the middle of an append,
+        # appends are made under the exclusive lock so none can be in progress
+        if os.fstat(log.writer.fileno()).st_size != log.size:
+            log.writer.truncate(log.size)
+
+    def _sync(self) -> None:
+        """Catches up with the appends and compactions of other processes (lock held)."""
+        if os.stat(self.filename).st_ino != self._log.inode:
+            self._log.close()
+            self._log = self._load()
+        elif os.fstat(self._log.reader.fileno()).st_size != self._log.size:
+            self._catch_up(self._log)
+
+    @contextlib.contextmanager
+    def _reading(self) -> Iterator[None]:
+        """Holds the shared lock, with the index up to date."""
+        with self._lock.hold(shared=True):
+            self._sync()
+            yield
+
+    @contextlib.contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Holds the exclusive lock, with the index up to date."""
+        with self._lock.hold():
+            self._sync()
+            yield
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        """Encodes a record as a single log line."""
+        return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def _append(self, *records: Dict[str, Any]) -> None:
+        """Appends records to the log in a single write and updates the index."""
+        lines = [self._encode(record) for record in records]
+        self._log.writer.write(b"".join(lines))
+        self._log.writer.flush()
+        if self.fsync:
+            os.fsync(self._log.writer.fileno())
+        self._replay(self._log, lines)
+        self._maybe_compact()
+
+    def _read_record(self, key: str) -> Dict[str, Any]:
+        """Reads the latest record of a key from the log."""
+        offset, length = self._log.index[key]
+        self._log.reader.seek(offset)
+        return json.loads(self._log.reader.read(length))["data"]
+
+    def _needs_compaction(self) -> bool:
+        """Checks if enough records are dead to compact the log."""
+        dead = self.dead_records
+        return dead >= self.compact_threshold and dead > len(self._log.index)
+
+    def _maybe_compact(self) -> None:
+        """Starts a background compaction if enough records are dead."""
+        if not self._needs_compaction():
+            return
+        # pylint: disable-next=consider-using-with
+        if not self._compacting.acquire(blocking=False):
+            return  # Already running
+
+        def compact():
+            try:
+                # Records appended while copying are carried over as they are,
+                # go again when they left too many dead records behind
+                self._compact()
+                while self._needs_compaction():
+                    self._compact()
+            finally:
+                self._compacting.release()
+
+        threading.Thread(target=compact, name="logstore-compactor", daemon=True).start()
+
+    def compact(self) -> None:
+        """Rewrites the log keeping only the live records."""
+        with self._compacting:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrites the log keeping only the live records (compaction lock held)."""
+        with self._reading():
+            log = self._log
+            snapshot = dict(log.index)
+            end = log.size
+
+        # Each process writes its own copy, only one of them can be installed
+        tmp_filename = f"{self.filename}.compact.{os.getpid()}"
+        index: Dict[str, Tuple[int, int]] = {}
+        try:
+            with open(tmp_filename, "wb") as out, open(self.filename, "rb") as src:
+                if os.fstat(src.fileno()).st_ino != log.inode:
+                    return  # Compacted by another process in the meantime
+
+                # Copy the live records without blocking writers
+                for key, (offset, length) in snapshot.items():
+                    src.seek(offset)
+                    index[key] = (out.tell(), length)
+                    out.write(src.read(length))
+
+                with self._writing():
+                    if self._log is not log:
+                        return  # Compacted by another process in the meantime
+
+                    # Carry over whatever was appended while copying
+                    src.seek(end)
+                    tail = src.read(log.size - end)
+                    compacted = _Log(tmp_filename)
+                    compacted.index = index
+                    compacted.records = len(index)
+                    compacted.size = out.tell()
+                    for line in tail.splitlines(keepends=True):
+                        compacted.apply(line)
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+
+                    os.replace(tmp_filename, self.filename)
+                    log.close()
+                    self._log = compacted
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+
+    def close(self) -> None:
+        """Waits for a running compaction and closes the log file."""
+        with self._compacting, self._lock.hold():
+            self._log.close()
+        self._lock.close()
+        _stores.discard(self)
+
+    def create(self, key: str, data: Dict[str, Any]) -> None:
+        """Creates a new record in the database."""
+        with self._writing():
+            if key in self._log.index:
+                raise KeyError(f"Record with key {key} already exists.")
+            self._append({"op": "put", "key": key, "data": data})
+
+    def read(self, key: str) -> Dict[str, Any]:
+        """Reads a record from the database."""
+        with self._reading():
+            if key not in self._log.index:
+                raise KeyError(f"Record with key {key} not found.")
+            return self._read_record(key)
+
+    def update(self, key: str, data: Dict[str, Any]) -> None:
+        """Updates an existing record in the database."""
+        with self._writing():
+            if key not in self._log.index:
+                raise KeyError(f"Record with key {key} not found.")
+            self._append({"op": "put", "key": key, "data": data})
+
+    def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """Replaces a record only if its fields still hold the expected values."""
+        with self._writing():
+            if key not in self._log.index:
+                raise KeyError(f"Record with key {key} not found.")
+            current = self._read_record(key)
+            if any(current.get(field) != value for field, value in expected.items()):
+                return False
+            self._append({"op": "put", "key": key, "data": data})
+            return True
+
+    def delete(self, key: str) -> None:
+        """Deletes a record from the database."""
+        with self._writing():
+            if key not in self._log.index:
+                raise KeyError(f"Record with key {key} not found.")
+            self._append({"op": "del", "key": key})
+
+    def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lists all records in the database."""
+        with self._reading():
+            return {key: self._read_record(key) for key in self._log.index}
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+        with self._reading():
+            return {
+                key: self._read_record(key) for key in keys if key in self._log.index
+            }
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records with a single append."""
+        if not records:
+            return
+        with self._writing():
+            self._append(
+                *(
+                    {"op": "put", "key": key, "data": data}
+                    for key, data in records.items()
+                )
+            )
+
+    def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Creates the missing records with a single append."""
+        with self._writing():
+            existing = [key for key in records if key in self._log.index]
+            if len(existing) < len(records):
+                self._append(
+                    *(
+                        {"op": "put", "key": key, "data": data}
+                        for key, data in records.items()
+                        if key not in self._log.index
+                    )
+                )
+            return existing
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records with a single append."""
+        with self._writing():
+            keys = [key for key in dict.fromkeys(keys) if key in self._log.index]
+            if keys:
+                self._append(*({"op": "del", "key": key} for key in keys))
+            return len(keys)
+
+    def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (key, record) pairs in key order, reading records lazily."""
+        check_limit(limit)
+        with self._reading():
+            keys = sorted(
+                key for key in self._log.index if after is None or key > after
+            )
+
+        def records():
+            for key in keys[:limit]:
+                with self._reading():
+                    if key not in self._log.index:
+                        continue  # Deleted while scanning
+                    data = self._read_record(key)
+                yield key, data
+
+        yield from project(records(), exclude=exclude)
+
+    def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Returns the records whose field holds the value, using the index."""
+        if field not in self._secondary:
+            return super().find_by(field, value)
+        with self._reading():
+            keys = self._secondary.lookup(field, value)
+            return {key: self._read_record(key) for key in sorted(keys)}
+
+
+def _after_fork_in_child() -> None:
+    """Makes the stores of a forked worker open their own file handles."""
+    for store in list(_stores):
+        store._forget_log()  # pylint: disable=protected-access
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
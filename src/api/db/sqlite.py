@@ -0,0 +1,318 @@
+"""SQLiteStore module."""
+
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .interface import DBInterface, check_limit, project
+
+# Stores whose connections must not be reused by a forked worker
+_stores: "weakref.WeakSet[SQLiteStore]" = weakref.WeakSet()
+
+
+class SQLiteStore(DBInterface):
+    """
+    Concrete implementation of DBInterface using SQLite as storage.
+
+    The database runs in WAL mode so readers never block the writer, and each
+    worker thread reuses its own connection (with its prepared statement cache).
+    Connections are keyed by a weak reference to their thread, and those of
+    exited threads are closed as new ones are opened.
+    Secondary indexes live in the record_index table, kept up to date by
+    triggers so every write path maintains them in the same transaction.
+    """
+
+    SQL_CREATE_TABLE = (
+        "CREATE TABLE IF NOT EXISTS records ("
+        "key TEXT PRIMARY KEY NOT NULL, data TEXT NOT NULL) WITHOUT ROWID"
+    )
+    SQL_INSERT = "INSERT INTO records (key, data) VALUES (?, ?)"
+    SQL_INSERT_IGNORE = "INSERT OR IGNORE INTO records (key, data) VALUES (?, ?)"
+    SQL_SELECT = "SELECT data FROM records WHERE key = ?"
+    SQL_UPDATE = "UPDATE records SET data = ? WHERE key = ?"
+    SQL_DELETE = "DELETE FROM records WHERE key = ?"
+    SQL_SELECT_ALL = "SELECT key, data FROM records ORDER BY key"
+    SQL_SCAN = "SELECT key, data FROM records WHERE key > ? ORDER BY key LIMIT ?"
+    SQL_UPSERT = (
+        "INSERT INTO records (key, data) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET data = excluded.data"
+    )
+    SQL_CREATE_INDEX_TABLES = (
+        "CREATE TABLE IF NOT EXISTS record_index ("
+        "field TEXT NOT NULL, value NOT NULL, key TEXT NOT NULL, "
+        "PRIMARY KEY (field, value, key)) WITHOUT ROWID",
+        "CREATE INDEX IF NOT EXISTS record_index_key ON record_index (key)",
+        "CREATE TABLE IF NOT EXISTS indexed_fields (field TEXT PRIMARY KEY NOT NULL)",
+        "CREATE TRIGGER IF NOT EXISTS records_index_delete AFTER DELETE ON records "
+        "BEGIN DELETE FROM record_index WHERE key = OLD.key; END",
+    )
+    SQL_INDEX_ENTRIES = (
+        "SELECT '{field}', json_each.value, {row}.key "
+        "FROM {source}json_each({row}.data, '$.{field}') "
+        "WHERE json_each.type NOT IN ('object', 'array', 'null')"
+    )
+    SQL_FIND_BY = (
+        "SELECT records.key, records.data FROM record_index "
+        "JOIN records ON records.key = record_index.key "
+        "WHERE record_index.field = ? AND record_index.value = ? "
+        "ORDER BY records.key"
+    )
+    # Stay below the default SQLITE_MAX_VARIABLE_NUMBER of older releases
+    BATCH_SIZE = 500
+
+    def __init__(
+        self, filename: str, timeout: float = 5.0, indexes: Iterable[str] = ()
+    ):
+        """
+        Initializes the store with a specific database file.
+
+        Args:
+            filename (str): Path of the SQLite database file.
+            timeout (float): Seconds to wait for a locked database.
+            indexes (Iterable[str]): Record fields with a secondary index.
+        """
+        self.filename = filename
+        self.timeout = timeout
+        self.indexes = tuple(indexes)
+        self._local = threading.local()
+        # Connection of each thread, by weak reference to the thread
+        self._connections: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        _stores.add(self)
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Workers starting together set the schema up one after the other
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            conn.execute(self.SQL_CREATE_TABLE)
+            for statement in self.SQL_CREATE_INDEX_TABLES:
+                conn.execute(statement)
+            self._sync_indexes(conn)
+
+    def _sync_indexes(self, conn: sqlite3.Connection) -> None:
+        """Creates the triggers of new indexed fields and drops the stale ones."""
+        for field in self.indexes:
+            if not field.isidentifier():
+                raise ValueError(f"Invalid index field: {field}")
+
+        current = {row[0] for row in conn.execute("SELECT field FROM indexed_fields")}
+        for field in current - set(self.indexes):
+            conn.execute(f"DROP TRIGGER IF EXISTS records_index_{field}_insert")
+            conn.execute(f"DROP TRIGGER IF EXISTS records_index_{field}_update")
+            conn.execute("DELETE FROM record_index WHERE field = ?", (field,))
+            conn.execute("DELETE FROM indexed_fields WHERE field = ?", (field,))
+
+        for field in set(self.indexes) - current:
+            entries_new = self.SQL_INDEX_ENTRIES.format(
+                field=field, row="NEW", source=""
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS records_index_{field}_insert "
+                f"AFTER INSERT ON records "
+                f"BEGIN INSERT OR IGNORE INTO record_index {entries_new}; END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS records_index_{field}_update "
+                f"AFTER UPDATE ON records "
+                f"BEGIN DELETE FROM record_index WHERE key = OLD.key "
+                f"AND field = '{field}'; "
+                f"INSERT OR IGNORE INTO record_index {entries_new}; END"
+            )
+            # Backfill the records written before the index existed
+            entries_all = self.SQL_INDEX_ENTRIES.format(
+                field=field, row="records", source="records, "
+            )
+            conn.execute(f"INSERT OR IGNORE INTO record_index {entries_all}")
+            conn.execute(
+                "INSERT OR IGNORE INTO indexed_fields (field) VALUES (?)", (field,)
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Returns the connection of the current thread, opening it if needed."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.filename, timeout=self.timeout, check_same_thread=False
+            )
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                for thread, stale in list(self._connections.items()):
+                    if not thread.is_alive():
+                        stale.close()
+                        del self._connections[thread]
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _forget_connections(self) -> None:
+        """Drops the inherited connections in a forked child, they belong to the parent."""
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakKeyDictionary()
+        self._local = threading.local()
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def create(self, key: str, data: Dict[str, Any]) -> None:
+        """Creates a new record in the database."""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(self.SQL_INSERT, (key, json.dumps(data)))
+        except sqlite3.IntegrityError as err:
+            raise KeyError(f"Record with key {key} already exists.") from err
+
+    def read(self, key: str) -> Dict[str, Any]:
+        """Reads a record from the database."""
+        row = self._connection().execute(self.SQL_SELECT, (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"Record with key {key} not found.")
+        return json.loads(row[0])
+
+    def update(self, key: str, data: Dict[str, Any]) -> None:
+        """Updates an existing record in the database."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(self.SQL_UPDATE, (json.dumps(data), key))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Record with key {key} not found.")
+
+    def update_if(
+        self, key: str, expected: Dict[str, Any], data: Dict[str, Any]
+    ) -> bool:
+        """Replaces a record only if its fields still hold the expected values."""
+        for field in expected:
+            if not field.isidentifier():
+                raise ValueError(f"Invalid field: {field}")
+        # One UPDATE checking the fields, atomic between every connection
+        conditions = "".join(
+            f" AND json_extract(data, '$.{field}') IS json_extract(?, '$')"
+            for field in expected
+        )
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                f"{self.SQL_UPDATE}{conditions}",
+                (
+                    json.dumps(data),
+                    key,
+                    *(json.dumps(value) for value in expected.values()),
+                ),
+            )
+            if cursor.rowcount:
+                return True
+            exists = conn.execute(self.SQL_SELECT, (key,)).fetchone() is not None
+        if not exists:
+            raise KeyError(f"Record with key {key} not found.")
+        return False
+
+    def delete(self, key: str) -> None:
+        """Deletes a record from the database."""
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(self.SQL_DELETE, (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Record with key {key} not found.")
+
+    def list_all(self) -> Dict[str, Dict[str, Any]]:
+        """Lists all records in the database."""
+        rows = self._connection().execute(self.SQL_SELECT_ALL)
+        return {key: json.loads(data) for key, data in rows}
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Reads several records at once, missing keys are left out."""
+        conn = self._connection()
+        keys = list(keys)
+        records = {}
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start : start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, data FROM records WHERE key IN ({placeholders})", batch
+            )
+            records.update((key, json.loads(data)) for key, data in rows)
+        return records
+
+    def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Creates or replaces several records in a single transaction."""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                self.SQL_UPSERT,
+                ((key, json.dumps(data)) for key, data in records.items()),
+            )
+
+    def create_many(self, records: Dict[str, Dict[str, Any]]) -> List[str]:
+        """Creates the missing records in a single transaction."""
+        conn = self._connection()
+        existing = []
+        with conn:
+            for key, data in records.items():
+                cursor = conn.execute(self.SQL_INSERT_IGNORE, (key, json.dumps(data)))
+                if cursor.rowcount == 0:
+                    existing.append(key)
+        return existing
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """Deletes several records in a single transaction."""
+        conn = self._connection()
+        with conn:
+            # rowcount leaves out the index rows removed by the triggers
+            cursor = conn.executemany(self.SQL_DELETE, ((key,) for key in keys))
+        return cursor.rowcount
+
+    def scan(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        exclude: Iterable[str] = (),
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yields (key, record) pairs in key order, one batch in memory at a time."""
+        check_limit(limit)
+
+        def records():
+            cursor, remaining = after or "", limit
+            while remaining is None or remaining > 0:
+                size = (
+                    self.BATCH_SIZE
+                    if remaining is None
+                    else min(remaining, self.BATCH_SIZE)
+                )
+                rows = (
+                    self._connection().execute(self.SQL_SCAN, (cursor, size)).fetchall()
+                )
+                for key, data in rows:
+                    yield key, json.loads(data)
+                if len(rows) < size:
+                    return
+                cursor = rows[-1][0]
+                if remaining is not None:
+                    remaining -= len(rows)
+
+        yield from project(records(), exclude=exclude)
+
+    def find_by(self, field: str, value: Any) -> Dict[str, Dict[str, Any]]:
+        """Returns the records whose field holds the value, using the index."""
+        if field not in self.indexes:
+            return super().find_by(field, value)
+        rows = self._connection().execute(self.SQL_FIND_BY, (field, value))
+        return {key: json.loads(data) for key, data in rows}
+
+
+def _after_fork_in_child() -> None:
+    """Makes the stores of a forked worker open their own connections."""
+    for store in list(_stores):
+        store._forget_connections()  # pylint: disable=protected-access
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,218 @@
+"""Launcher module."""
+
+import importlib
+import importlib.util
+import logging
+import logging.config
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from multiprocessing.connection import wait
+from os import environ
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+from api.core import LOG_CONFIG, metrics
+
+logger = logging.getLogger("api.launcher")
+
+
+def _optional_int(name: str) -> Optional[int]:
+    """Read an optional integer environment variable."""
+    value = environ.get(name, "")
+    return int(value) if value else None
+
+
+class Launcher:
+    """
+    Production launcher, running the API in supervised worker processes.
+
+    The supervisor imports the application before forking, so the workers
+    share the loaded modules and routes copy-on-write, while the stores open
+    their lock files, log handles and SQLite connections again in each worker
+    after the fork. Each worker binds its own SO_REUSEPORT
+    socket, so the kernel balances the connections between them (without
+    SO_REUSEPORT the supervisor binds a single socket shared by all workers).
+    Workers that crash, or exit after serving API_MAX_REQUESTS requests, are
+    started again.
+
+    Environment variables (next to API_HOST and API_PORT):
+    - API_WORKERS: worker processes (default: CPU count).
+    - API_LOOP: auto, uvloop or asyncio (auto picks uvloop when installed).
+    - API_HTTP: auto, httptools or h11 (auto picks httptools when installed).
+    - API_BACKLOG: listen backlog of the socket.
+    - API_KEEP_ALIVE: seconds an idle keep-alive connection stays open.
+    - API_LIMIT_CONCURRENCY: connections/tasks per worker before 503s.
+    - API_MAX_REQUESTS: requests served before a worker is recycled, plus up
+      to API_MAX_REQUESTS_JITTER so workers do not restart together.
+    - API_REUSE_PORT: bind one SO_REUSEPORT socket per worker.
+    - API_GRACEFUL_TIMEOUT: seconds workers get to finish on shutdown.
+    """
+
+    APP = "api.__main__:api.app"
+    HOST = environ.get("API_HOST", "0.0.0.0")
+    PORT = int(environ.get("API_PORT", 3000))
+    WORKERS = int(environ.get("API_WORKERS", os.cpu_count() or 1))
+    LOOP = environ.get("API_LOOP", "auto")
+    HTTP = environ.get("API_HTTP", "auto")
+    BACKLOG = int(environ.get("API_BACKLOG", 2048))
+    KEEP_ALIVE = int(environ.get("API_KEEP_ALIVE", 5))
+    LIMIT_CONCURRENCY = _optional_int("API_LIMIT_CONCURRENCY")
+    MAX_REQUESTS = _optional_int("API_MAX_REQUESTS")
+    MAX_REQUESTS_JITTER = int(environ.get("API_MAX_REQUESTS_JITTER", 0))
+    REUSE_PORT = environ.get("API_REUSE_PORT", "true").lower() == "true"
+    GRACEFUL_TIMEOUT = float(environ.get("API_GRACEFUL_TIMEOUT", 30))
+
+    @staticmethod
+    def _select(requested: str, fast: str, fallback: str) -> str:
+        """Resolve auto (or an unavailable fast choice) to an installed one."""
+        if requested not in ("auto", fast):
+            return requested
+        if importlib.util.find_spec(fast) is not None:
+            return fast
+        if requested == fast:
+            logger.warning("%s is not installed, using %s", fast, fallback)
+        return fallback
+
+    @classmethod
+    def loop(cls) -> str:
+        """Returns the event loop the workers use."""
+        return cls._select(cls.LOOP, "uvloop", "asyncio")
+
+    @classmethod
+    def http(cls) -> str:
+        """Returns the HTTP parser the workers use."""
+        return cls._select(cls.HTTP, "httptools", "h11")
+
+    @classmethod
+    def reuse_port(cls) -> bool:
+        """Checks if each worker can bind its own SO_REUSEPORT socket."""
+        return cls.REUSE_PORT and hasattr(socket, "SO_REUSEPORT")
+
+    @classmethod
+    def bind(cls, reuse_port: bool) -> socket.socket:
+        """Creates the listening socket."""
+        family = socket.AF_INET6 if ":" in cls.HOST else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((cls.HOST, cls.PORT))
+        sock.listen(cls.BACKLOG)
+        sock.set_inheritable(True)
+        return sock
+
+    @classmethod
+    def config(cls) -> Dict[str, Any]:
+        """Returns the uvicorn settings of a worker."""
+        max_requests = cls.MAX_REQUESTS
+        if max_requests and cls.MAX_REQUESTS_JITTER:
+            max_requests += random.randint(0, cls.MAX_REQUESTS_JITTER)
+        return {
+            "loop": cls.loop(),
+            "http": cls.http(),
+            "backlog": cls.BACKLOG,
+            "timeout_keep_alive": cls.KEEP_ALIVE,
+            "limit_concurrency": cls.LIMIT_CONCURRENCY,
+            "limit_max_requests": max_requests,
+            "server_header": False,
+            "log_config": LOG_CONFIG,
+            # Requests are logged, sampled, by the AccessLogMiddleware
+            "access_log": False,
+        }
+
+    @classmethod
+    def serve(cls, sock: Optional[socket.socket] = None) -> None:
+        """Runs one worker, on `sock` or on its own SO_REUSEPORT socket."""
+        # Drop the supervisor handlers, uvicorn installs its own once running
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        if sock is None:
+            sock = cls.bind(reuse_port=True)
+        config = uvicorn.Config(cls.APP, **cls.config())
+        uvicorn.Server(config).run(sockets=[sock])
+
+    @classmethod
+    def supervise(cls) -> None:
+        """Starts the workers and keeps them running until SIGINT/SIGTERM."""
+        context = multiprocessing.get_context("fork")
+        shared = None if cls.reuse_port() else cls.bind(reuse_port=False)
+        stopping = []
+
+        def stop(signum, _):
+            logger.info("Received %s, stopping workers", signal.Signals(signum).name)
+            stopping.append(signum)
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        # Loaded once here, the workers find it in sys.modules
+        importlib.import_module(cls.APP.split(":", 1)[0])
+        if metrics.directory is not None:
+            metrics.clear()  # Totals of the previous run
+
+        def start(slot: int):
+            process = context.Process(
+                target=cls.serve, args=(shared,), name=f"api-worker-{slot}"
+            )
+            process.start()
+            logger.info("Started worker %s (pid %s)", slot, process.pid)
+            return process, time.monotonic()
+
+        logger.info(
+            "Serving %s on %s:%s with %s workers (loop=%s, http=%s, reuse_port=%s)",
+            cls.APP,
+            cls.HOST,
+            cls.PORT,
+            cls.WORKERS,
+            cls.loop(),
+            cls.http(),
+            shared is None,
+        )
+        workers = {slot: start(slot) for slot in range(cls.WORKERS)}
+        backoff = 0.0
+        while not stopping:
+            wait([process.sentinel for process, _ in workers.values()], timeout=1.0)
+            for slot, (process, started_at) in list(workers.items()):
+                if process.is_alive() or stopping:
+                    continue
+                if metrics.directory is not None:
+                    metrics.archive([process.pid])
+                if process.exitcode == 0:
+                    logger.info("Worker %s recycled after max requests", slot)
+                    backoff = 0.0
+                else:
+                    logger.error("Worker %s exited with %s", slot, process.exitcode)
+                    # Back off when workers die right after starting
+                    quick = time.monotonic() - started_at < 1.0
+                    backoff = min(max(backoff * 2, 0.5), 30.0) if quick else 0.0
+                    time.sleep(backoff)
+                workers[slot] = start(slot)
+
+        for process, _ in workers.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + cls.GRACEFUL_TIMEOUT
+        for process, _ in workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if metrics.directory is not None:
+            metrics.archive(process.pid for process, _ in workers.values())
+
+
+if __name__ == "__main__":
+    logging.config.dictConfig(
+        {
+            **LOG_CONFIG,
+            "loggers": {
+                **LOG_CONFIG["loggers"],
+                "api": {"level": "INFO", "handlers": ["default"], "propagate": False},
+            },
+        }
+    )
+    Launcher.supervise()
@@ -1,9 +1,12 @@
 """Auth module."""
 
-from .__main__ import Register, GetToken
+from .__main__ import Register, GetToken, Refresh, Logout, BulkImport
 
 resources = [
     ["/auth/register", Register],
     ["/auth/login", GetToken],
     ["/auth/get-token", GetToken],
+    ["/auth/refresh", Refresh],
+    ["/auth/logout", Logout],
+    ["/auth/bulk-import", BulkImport],
 ]
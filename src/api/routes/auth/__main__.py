@@ -1,21 +1,131 @@
 """Auth module."""
 
-from api.core import ApiResource
-from api.security import Authentication
-from api.schemas import User
+import json
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi import Depends, Request
+
+from api.core import ApiHttpException, ApiJSONResponse, ApiResource, ApiResponse
+from api.security import Authentication, get_current_user, require_roles
+from api.schemas import RefreshToken, User
 
 
 class Register(ApiResource):  # pylint: disable=too-few-public-methods
     """Register resource."""
 
-    def post(self, user: User):
+    async def post(self, user: User):
         """Register a new user."""
-        return Authentication.register_user(user.username, user.password)
+        return await Authentication.register_user_async(user.username, user.password)
 
 
 class GetToken(ApiResource):  # pylint: disable=too-few-public-methods
     """GetToken resource."""
 
-    def post(self, user: User):
+    async def post(self, user: User):
         """Get a token for a user."""
-        return Authentication.verify_user(user.username, user.password)
+        return await Authentication.verify_user_async(user.username, user.password)
+
+
+class Refresh(ApiResource):  # pylint: disable=too-few-public-methods
+    """Refresh resource."""
+
+    def post(self, body: RefreshToken):
+        """Exchange a refresh token for a new access token."""
+        return Authentication.refresh_access_token(body.refresh_token)
+
+
+class Logout(ApiResource):  # pylint: disable=too-few-public-methods
+    """Logout resource."""
+
+    def post(self, current_user: dict = Depends(get_current_user)):
+        """Revoke the token used for the request."""
+        if "jti" not in current_user:
+            raise ApiHttpException(status_code=400, data="Token can not be revoked")
+        Authentication.revoke_token(current_user)
+        return ApiResponse(status_code=200, data="Token revoked")
+
+
+class BulkImport(ApiResource):  # pylint: disable=too-few-public-methods
+    """BulkImport resource."""
+
+    chunk_size = 500
+
+    @staticmethod
+    def _parse_line(line: bytes) -> Optional[dict]:
+        """Parse and validate one NDJSON user record, None if invalid."""
+        try:
+            user = json.loads(line)
+        except ValueError:
+            return None
+        if not isinstance(user, dict) or not isinstance(user.get("username"), str):
+            return None
+        if "password" not in user and "hashed_password" not in user:
+            return None
+        roles = user.get("roles")
+        if roles is not None and (
+            not isinstance(roles, list)
+            or not all(isinstance(role, str) for role in roles)
+        ):
+            return None
+        return user
+
+    @classmethod
+    async def _read_ndjson(
+        cls, request: Request
+    ) -> AsyncIterator[Tuple[int, Optional[dict]]]:
+        """Yield the line number and user (None if invalid) of each record."""
+        buffer = b""
+        line_number = 0
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_number += 1
+                if line.strip():
+                    yield line_number, cls._parse_line(line)
+        if buffer.strip():
+            yield line_number + 1, cls._parse_line(buffer)
+
+    async def post(self, request: Request, _: dict = Depends(require_roles("admin"))):
+        """
+        Import users from an NDJSON body, one user per line.
+
+        Users are imported in chunks while the body streams in. An invalid
+        line stops the import: the users before it are kept and the response
+        is a 207 with the line to resume from, or a 400 if there were none.
+
+        @example Request Body (NDJSON)
+        ```
+        {"username": "john", "password": "secret", "roles": ["user"]}
+        {"username": "jane", "hashed_password": "$2b$12$...", "roles": ["admin"]}
+        ```
+        """
+        result = {"imported": 0, "skipped": []}
+        chunk, seen = [], False
+
+        async def flush():
+            imported = await Authentication.import_users_async(chunk)
+            result["imported"] += imported["imported"]
+            result["skipped"] += imported["skipped"]
+            chunk.clear()
+
+        async for line_number, user in self._read_ndjson(request):
+            if user is None:
+                if not seen:
+                    raise ApiHttpException(
+                        status_code=400, data=f"Invalid record on line {line_number}"
+                    )
+                await flush()
+                result["failed_at_line"] = line_number
+                return ApiJSONResponse(
+                    content=ApiResponse(status_code=207, data=result),
+                    status_code=207,
+                )
+            seen = True
+            chunk.append(user)
+            if len(chunk) >= self.chunk_size:
+                await flush()
+        if chunk:
+            await flush()
+
+        return ApiResponse(status_code=200, data=result)
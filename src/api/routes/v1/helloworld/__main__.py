@@ -5,7 +5,7 @@ from fastapi_utils import set_responses
 
 from pydantic import BaseModel
 
-from api.core import ApiResource, ApiResponse
+from api.core import ApiResource, ApiResponse, cache_response
 
 
 class HelloWorld(BaseModel):
@@ -17,7 +17,10 @@ class HelloWorld(BaseModel):
 class V1HelloWorld(ApiResource):
     """Example resource with GET and POST methods."""
 
+    metadata = True
+
     @set_responses(ApiResponse)
+    @cache_response(ttl=60)
     async def get(self) -> ApiResponse:
         """
         Handles GET requests.
@@ -1,3 +1,8 @@
 """Admin module."""
 
-from .__main__ import V1AlphaAdmin
+from .__main__ import V1AlphaAdmin, V1AlphaAdminProfile
+
+resources = [
+    ["/apis/v1alpha/admin", V1AlphaAdmin],
+    ["/apis/v1alpha/admin/profile", V1AlphaAdminProfile],
+]
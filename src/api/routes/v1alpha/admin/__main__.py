@@ -1,26 +1,57 @@
 """Admin module."""
 
-from typing import List
-from fastapi import Depends
+from typing import Optional
 
-from api.core import ApiResource, ApiResponse
-from api.security import get_current_user
+from fastapi import Depends, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from api.core import Api, ApiHttpException, ApiResource, ApiResponse
+from api.security import require_roles
+
+admin_required = require_roles("admin")
 
 
 class V1AlphaAdmin(ApiResource):  # pylint: disable=too-few-public-methods
     """Admin resource."""
 
-    def get(
-        self,
-        current_user: dict = Depends(get_current_user),
-        required_roles: List[str] = Depends(lambda: ["admin"]),
-    ):
+    def get(self, current_user: dict = Depends(admin_required)):
         """Get the admin resource."""
         return ApiResponse(
             status_code=200,
             data={
                 "username": current_user["username"],
                 "roles": current_user["roles"],
-                "required_roles": required_roles,
+                "required_roles": admin_required.required_roles,
             },
         )
+
+
+class V1AlphaAdminProfile(ApiResource):  # pylint: disable=too-few-public-methods
+    """Profiles of the sampled requests, kept by this worker."""
+
+    def get(
+        self,
+        output: str = Query("json", alias="format"),
+        route: Optional[str] = None,
+        _: dict = Depends(admin_required),
+    ):
+        """
+        Download the profiles, optionally of one route (e.g. "/apis/v1/secure").
+
+        Formats: json (the list of profiles), collapsed (stacks for flame
+        graph tools) or pstats (for `python -m pstats` and its viewers).
+        """
+        profiler = Api.profiler
+        if not profiler.enabled:
+            raise ApiHttpException(status_code=404, data="Profiling is disabled")
+        if output == "json":
+            return ApiResponse(status_code=200, data=profiler.summary(route))
+        if output == "collapsed":
+            return PlainTextResponse(profiler.collapsed(route))
+        if output == "pstats":
+            return Response(
+                profiler.pstats(route),
+                media_type="application/octet-stream",
+                headers={"Content-Disposition": 'attachment; filename="api.pstats"'},
+            )
+        raise ApiHttpException(status_code=400, data=f"Unknown format: {output}")
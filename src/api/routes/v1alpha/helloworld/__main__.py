@@ -3,13 +3,14 @@
 from fastapi import Request
 from fastapi_utils import set_responses
 
-from api.core import ApiResource, ApiResponse, ApiHttpException
+from api.core import ApiResource, ApiResponse, ApiHttpException, cache_response
 
 
 class V1AlphaHelloWorld(ApiResource):
     """Example resource with GET and POST methods."""
 
     @set_responses(ApiResponse)
+    @cache_response(ttl=60)
     async def get(self) -> ApiResponse:
         """
         Handles GET requests.
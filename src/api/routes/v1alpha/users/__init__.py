@@ -0,0 +1,3 @@
+"""Users module."""
+
+from .__main__ import V1AlphaUsers
@@ -0,0 +1,66 @@
+"""Users module."""
+
+import json
+from typing import AsyncIterator, Optional, Tuple
+
+from fastapi import Depends, Query
+from fastapi.responses import StreamingResponse
+
+from api.core import ApiResource
+from api.security import Authentication, require_roles
+
+
+class V1AlphaUsers(ApiResource):  # pylint: disable=too-few-public-methods
+    """Users resource."""
+
+    @staticmethod
+    async def _users(
+        after: Optional[str], limit: Optional[int], role: Optional[str]
+    ) -> AsyncIterator[Tuple[str, dict]]:
+        """Yield (username, data) pairs in username order, without passwords."""
+        if role is None:
+            async for username, data in Authentication.adb.scan(
+                after=after, limit=limit, exclude=("password",)
+            ):
+                yield username, data
+            return
+
+        # Served from the roles secondary index, only matching users are read
+        matches = await Authentication.adb.find_by("roles", role)
+        usernames = [name for name in sorted(matches) if after is None or name > after]
+        for username in usernames[:limit]:
+            data = matches[username]
+            yield username, {key: data[key] for key in data if key != "password"}
+
+    @classmethod
+    async def _ndjson(
+        cls, after: Optional[str], limit: Optional[int], role: Optional[str]
+    ) -> AsyncIterator[bytes]:
+        """Yield one NDJSON line per user."""
+        async for username, data in cls._users(after, limit, role):
+            yield json.dumps({"username": username, **data}).encode("utf-8") + b"\n"
+
+    async def get(
+        self,
+        after: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=0),
+        role: Optional[str] = None,
+        _: dict = Depends(require_roles("admin")),
+    ):
+        """
+        Stream the users as NDJSON, in username order.
+
+        @param after - Cursor, only users after this username are returned.
+        @param limit - Maximum number of users to return.
+        @param role - Only return the users holding this role.
+
+        @example Response (NDJSON)
+        ```
+        {"username": "jane", "roles": ["admin"]}
+        {"username": "john", "roles": ["user"]}
+        ```
+        Pass the last username as `after` to get the next page.
+        """
+        return StreamingResponse(
+            self._ndjson(after, limit, role), media_type="application/x-ndjson"
+        )
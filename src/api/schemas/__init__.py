@@ -1,3 +1,4 @@
 """Schemas module."""
 
+from .token import RefreshToken
 from .user import User
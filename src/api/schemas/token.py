@@ -0,0 +1,9 @@
+"""Token module."""
+
+from pydantic import BaseModel
+
+
+class RefreshToken(BaseModel):
+    """RefreshToken model."""
+
+    refresh_token: str
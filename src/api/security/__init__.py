@@ -1,5 +1,17 @@
 """Security module."""
 
-from .__main__ import get_current_user, check_permissions
+from .__main__ import (
+    cache_variant,
+    get_current_user,
+    check_permissions,
+    identify_user,
+    may_profile,
+    require_roles,
+)
 from .authentication import Authentication
 from .authorization import Authorization
+from .cache import TokenCache
+from .hashing import PasswordHasher
+from .keyring import KeyRing
+from .refresh import RefreshTokens
+from .revocation import BloomFilter, RevocationList
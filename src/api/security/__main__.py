@@ -1,6 +1,6 @@
 """Security module."""
 
-from typing import List
+from typing import Callable, List, Optional
 from fastapi import Depends, Request
 
 from api.core import ApiHttpException
@@ -8,17 +8,79 @@ from .authentication import Authentication
 from .authorization import Authorization
 
 
-def get_current_user(request: Request):
-    """Get the current user from the request headers."""
+async def get_current_user(request: Request):
+    """
+    Get the current user from the request headers.
+
+    Declared async so FastAPI runs it on the event loop instead of taking a
+    threadpool slot, it only does CPU-bound token checks. The revocation store
+    is only read for tokens the revocation filter matches, on the executor.
+    """
     authorization = request.headers.get("Authorization")
     if not authorization:
         raise ApiHttpException(status_code=401, data="Authorization token missing")
 
     token = Authentication.extract_token_from_header(authorization)
-    user_data = Authentication.verify_token(token)
+    user_data = await Authentication.verify_token_cached_async(token)
     return user_data
 
 
+def identify_user(request: Request) -> Optional[str]:
+    """
+    Identify the caller of a request for rate limiting.
+
+    Returns the username of a valid token, or None to let the rate limiter fall
+    back to the client IP. Tokens are verified through the token cache, so a
+    known token costs a dictionary lookup.
+    """
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        return None
+    try:
+        token = Authentication.extract_token_from_header(authorization)
+        return f"user:{Authentication.verify_token_cached(token)['username']}"
+    except ApiHttpException:
+        return None
+
+
+def cache_variant(request: Request, vary: str) -> Optional[str]:
+    """
+    Key the response cache stores the response to a request under.
+
+    Returns the username (vary="user") or the sorted roles (vary="role") of
+    the caller, "anonymous" without a token, or None for an invalid token so
+    the request bypasses the cache.
+    """
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        return "anonymous"
+    try:
+        token = Authentication.extract_token_from_header(authorization)
+        payload = Authentication.verify_token_cached(token)
+    except ApiHttpException:
+        return None
+    if vary == "user":
+        return f"user:{payload['username']}"
+    return f"roles:{','.join(sorted(payload['roles']))}"
+
+
+def may_profile(request: Request) -> bool:
+    """
+    Check that the caller of a request may ask for it to be profiled.
+
+    Only admins may, as profiles expose the internals of the server.
+    """
+    authorization = request.headers.get("Authorization")
+    if not authorization:
+        return False
+    try:
+        token = Authentication.extract_token_from_header(authorization)
+        check_permissions(Authentication.verify_token_cached(token))
+    except ApiHttpException:
+        return False
+    return True
+
+
 def check_permissions(  # pylint: disable=dangerous-default-value
     current_user: dict = Depends(get_current_user),
     required_roles: List[str] = ["admin"],
@@ -26,3 +88,23 @@ def check_permissions(  # pylint: disable=dangerous-default-value
     """Check if the user has the required roles."""
     user_roles = current_user["roles"]
     Authorization.authorize(user_roles, required_roles)
+
+
+def require_roles(*roles: str) -> Callable:
+    """
+    Build a dependency admitting the users holding any of `roles`.
+
+    The roles are compiled into a mask once, when the resource declaring the
+    requirement is defined, so each request only does one mask check.
+
+    Returns:
+        Callable: Dependency returning the current user.
+    """
+    required = Authorization.compile(roles)
+
+    async def dependency(current_user: dict = Depends(get_current_user)) -> dict:
+        Authorization.authorize(current_user["roles"], required)
+        return current_user
+
+    dependency.required_roles = list(roles)
+    return dependency
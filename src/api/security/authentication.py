@@ -1,14 +1,20 @@
 """Authentication module."""
 
 import datetime
+import uuid
 from os import environ
+from typing import List
 
 import jwt
 import pytz
-from passlib.hash import bcrypt
 
-from api.core import ApiHttpException, ApiResponse
-from api.db import DBDriverFactory
+from api.core import ApiHttpException, ApiResponse, metrics
+from api.db import DBDriverFactory, ExecutorStore
+from .cache import TokenCache
+from .hashing import PasswordHasher
+from .keyring import KeyRing
+from .refresh import RefreshTokens
+from .revocation import RevocationList
 
 
 class Authentication:
@@ -17,44 +23,150 @@ class Authentication:
     secret = environ.get(
         "SECRET_KEY", "SECRET_KEY_PLACEHOLDER"
     )  # Replace with a real secret key
+    # Signing keys, hot-reloaded from SECRET_KEYS_FILE when it is set
+    keyring = KeyRing(
+        secret,
+        filename=environ.get("SECRET_KEYS_FILE"),
+        reload_interval=float(environ.get("SECRET_KEYS_RELOAD_INTERVAL", 5)),
+    )
     tz = pytz.timezone("Europe/Madrid")
+    token_lifetime = datetime.timedelta(
+        minutes=float(environ.get("ACCESS_TOKEN_MINUTES", 10))
+    )
 
     # Instantiate the database driver
-    db = DBDriverFactory.get_driver("local", "users.db.json")  # db_driver, db_filename
+    db = DBDriverFactory.from_env()  # DB_DRIVER, DB_FILENAME
+    # Same driver for async callers, its I/O runs on a bounded executor
+    adb = ExecutorStore(db, max_workers=int(environ.get("DB_ASYNC_WORKERS", 4)))
+
+    # Password hashing backend: inline, thread or process
+    hasher = PasswordHasher(
+        backend=environ.get("PASSWORD_HASH_BACKEND", "thread").lower(),
+        max_workers=int(environ.get("PASSWORD_HASH_WORKERS", 0)) or None,
+        max_queue=int(environ.get("PASSWORD_HASH_QUEUE", 16)),
+    )
+
+    # Verified token payloads, kept until the token expires
+    token_cache = TokenCache(max_size=int(environ.get("TOKEN_CACHE_SIZE", 10000)))
+    # Tokens signed with a removed key must be verified again
+    keyring.on_change(token_cache.clear)
+
+    # Revoked tokens, persisted in their own store
+    revocations = RevocationList(
+        DBDriverFactory.from_env("revoked"),
+        capacity=int(environ.get("REVOCATION_CAPACITY", 100000)),
+    )
+
+    # Rotating refresh tokens (default lifetime: 7 days)
+    refresh_tokens = RefreshTokens(
+        DBDriverFactory.from_env("refresh"),
+        lifetime=float(environ.get("REFRESH_TOKEN_MINUTES", 7 * 24 * 60)) * 60,
+    )
 
     @classmethod
     def generate_hash(cls, text: str) -> str:
         """Generate a hashed password"""
-        return bcrypt.hash(text)
+        with metrics.time("api_bcrypt_duration_seconds", op="hash"):
+            return cls.hasher.hash(text)
 
     @classmethod
     def verify_hash(cls, passwd: str, hashed: str) -> bool:
         """Verify if the password matches the hash"""
-        return bcrypt.verify(passwd, hashed)
+        with metrics.time("api_bcrypt_duration_seconds", op="verify"):
+            return cls.hasher.verify(passwd, hashed)
+
+    @classmethod
+    async def generate_hash_async(cls, text: str) -> str:
+        """Generate a hashed password without blocking the event loop"""
+        with metrics.time("api_bcrypt_duration_seconds", op="hash"):
+            return await cls.hasher.hash_async(text)
+
+    @classmethod
+    async def verify_hash_async(cls, passwd: str, hashed: str) -> bool:
+        """Verify if the password matches the hash without blocking the event loop"""
+        with metrics.time("api_bcrypt_duration_seconds", op="verify"):
+            return await cls.hasher.verify_async(passwd, hashed)
 
     @classmethod
     def generate_token(cls, username: str, roles: list) -> str:
         """Generate JWT token"""
         payload = {
             "iat": datetime.datetime.now(tz=cls.tz),
-            "exp": datetime.datetime.now(tz=cls.tz) + datetime.timedelta(minutes=10),
+            "exp": datetime.datetime.now(tz=cls.tz) + cls.token_lifetime,
+            "jti": uuid.uuid4().hex,
             "username": username,
             "roles": roles,
         }
-        return jwt.encode(payload, cls.secret, algorithm="HS256")
+        kid, key = cls.keyring.active
+        with metrics.time("api_jwt_duration_seconds", op="encode"):
+            return jwt.encode(payload, key, algorithm="HS256", headers={"kid": kid})
 
     @classmethod
     def verify_token(cls, token: str) -> dict:
         """Verify JWT token"""
+        payload = cls._decode_token(token)
+        cls.check_revocation(payload)
+        return payload
+
+    @classmethod
+    def _decode_token(cls, token: str) -> dict:
+        """Check the signature and expiry of a JWT token, returns its payload"""
         try:
-            payload = jwt.decode(token, cls.secret, algorithms=["HS256"])
-            return payload
+            key = cls.keyring.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise jwt.InvalidSignatureError("Unknown signing key")
+            with metrics.time("api_jwt_duration_seconds", op="decode"):
+                payload = jwt.decode(token, key, algorithms=["HS256"])
         except jwt.ExpiredSignatureError as err:
             raise ApiHttpException(status_code=401, data="Token has expired") from err
         except jwt.InvalidSignatureError as err:
             raise ApiHttpException(status_code=401, data="Token is invalid") from err
         except Exception as err:
             raise ApiHttpException(status_code=400, data=str(err)) from err
+        return payload
+
+    @classmethod
+    def verify_token_cached(cls, token: str) -> dict:
+        """Verify JWT token, reusing the payload of an already verified token"""
+        cls.keyring.maybe_reload()
+        payload = cls.token_cache.get(token)
+        if payload is None:
+            payload = cls.verify_token(token)
+            cls.token_cache.put(token, payload)
+        else:
+            cls.check_revocation(payload)
+        return payload
+
+    @classmethod
+    async def verify_token_cached_async(cls, token: str) -> dict:
+        """Verify JWT token like verify_token_cached, without blocking the event loop"""
+        cls.keyring.maybe_reload()
+        payload = cls.token_cache.get(token)
+        if payload is None:
+            payload = cls._decode_token(token)
+            cls.token_cache.put(token, payload)
+        await cls.check_revocation_async(payload)
+        return payload
+
+    @classmethod
+    def check_revocation(cls, payload: dict) -> None:
+        """Reject the payload of a revoked token"""
+        if cls.revocations.is_revoked(payload):
+            raise ApiHttpException(status_code=401, data="Token has been revoked")
+
+    @classmethod
+    async def check_revocation_async(cls, payload: dict) -> None:
+        """Reject the payload of a revoked token, reading the store off the event loop"""
+        revocations = cls.revocations
+        if revocations.may_be_revoked(payload) and await cls.adb.run(
+            revocations.confirm, payload
+        ):
+            raise ApiHttpException(status_code=401, data="Token has been revoked")
+
+    @classmethod
+    def revoke_token(cls, payload: dict) -> None:
+        """Revoke a verified token until it expires"""
+        cls.revocations.revoke_token(payload["jti"], payload["exp"])
 
     @classmethod
     def extract_token_from_header(cls, authorization: str) -> str:
@@ -67,6 +179,11 @@ class Authentication:
                 status_code=401, data="Authorization token missing"
             ) from err
 
+    @staticmethod
+    def _user_exists(username: str) -> ApiHttpException:
+        """Error of a registration whose username is taken"""
+        return ApiHttpException(status_code=400, data=f"User {username} already exists")
+
     @classmethod
     def register_user(cls, username: str, password: str, roles: list = None) -> dict:
         """Register a new user"""
@@ -76,31 +193,41 @@ class Authentication:
         # Check if the user already exists in the database
         try:
             cls.db.read(username)
-            raise ApiHttpException(
-                status_code=400, data=f"User {username} already exists"
-            )
+            raise cls._user_exists(username)
         except KeyError:
             pass
 
         # Create a hash for the password
         hashed_password = cls.generate_hash(password)
 
-        # Save the new user in the database
+        # Save the new user in the database, unless registered in the meantime
         user_data = {"password": hashed_password, "roles": roles}
-        cls.db.create(username, user_data)
+        try:
+            cls.db.create(username, user_data)
+        except KeyError as err:
+            raise cls._user_exists(username) from err
 
         return ApiResponse(status_code=200, data="User registered successfully")
 
+    @classmethod
+    def _revoke_user_tokens(cls, username: str) -> None:
+        """Revoke the access and refresh tokens already issued to a user"""
+        cls.revocations.revoke_user(username, cls.token_lifetime.total_seconds())
+        cls.refresh_tokens.revoke_user(username)
+
     @classmethod
     def unregister_user(cls, username: str) -> dict:
         """Unregister (delete) a user"""
         # Remove the user from the database
         try:
             cls.db.delete(username)
-            return {"message": "User unregistered successfully"}
         except KeyError as err:
             raise ApiHttpException(status_code=404, data="User not found") from err
 
+        # Tokens already issued to the user stop being valid
+        cls._revoke_user_tokens(username)
+        return {"message": "User unregistered successfully"}
+
     @classmethod
     def verify_user(cls, username: str, password: str) -> dict:
         """Verify a user by username and password"""
@@ -115,4 +242,110 @@ class Authentication:
 
         # Generate a token if credentials are correct
         token = cls.generate_token(username, user_data["roles"])
-        return {"token": token}
+        refresh_token = cls.refresh_tokens.issue(username)
+        return {"token": token, "refresh_token": refresh_token}
+
+    @classmethod
+    def refresh_access_token(cls, refresh_token: str) -> dict:
+        """Exchange a refresh token for a new access token, without bcrypt"""
+        try:
+            username, refresh_token = cls.refresh_tokens.rotate(refresh_token)
+            user_data = cls.db.read(username)
+        except KeyError as err:
+            raise ApiHttpException(
+                status_code=401, data="Refresh token is invalid"
+            ) from err
+
+        # Roles are read again so changes apply on the next renewal
+        token = cls.generate_token(username, user_data["roles"])
+        return {"token": token, "refresh_token": refresh_token}
+
+    # Async versions of the user operations, for the request handlers: store
+    # I/O runs on the bounded executor of adb and hashing on the hasher
+
+    @classmethod
+    async def register_user_async(
+        cls, username: str, password: str, roles: list = None
+    ) -> dict:
+        """Register a new user without blocking the event loop"""
+        if roles is None:
+            roles = ["user"]  # Default role
+
+        # Check if the user already exists in the database
+        try:
+            await cls.adb.read(username)
+            raise cls._user_exists(username)
+        except KeyError:
+            pass
+
+        # Create a hash for the password outside of the event loop
+        hashed_password = await cls.generate_hash_async(password)
+
+        # Save the new user in the database, unless registered in the meantime
+        user_data = {"password": hashed_password, "roles": roles}
+        try:
+            await cls.adb.create(username, user_data)
+        except KeyError as err:
+            raise cls._user_exists(username) from err
+
+        return ApiResponse(status_code=200, data="User registered successfully")
+
+    @classmethod
+    async def unregister_user_async(cls, username: str) -> dict:
+        """Unregister (delete) a user without blocking the event loop"""
+        try:
+            await cls.adb.delete(username)
+        except KeyError as err:
+            raise ApiHttpException(status_code=404, data="User not found") from err
+
+        # Tokens already issued to the user stop being valid
+        await cls.adb.run(cls._revoke_user_tokens, username)
+        return {"message": "User unregistered successfully"}
+
+    @classmethod
+    async def verify_user_async(cls, username: str, password: str) -> dict:
+        """Verify a user by username and password without blocking the event loop"""
+        try:
+            user_data = await cls.adb.read(username)
+        except KeyError as err:
+            raise ApiHttpException(status_code=404, data="User not found") from err
+
+        hashed_password = user_data["password"]
+        if not await cls.verify_hash_async(password, hashed_password):
+            raise ApiHttpException(status_code=400, data="Invalid password")
+
+        # Generate a token if credentials are correct
+        token = cls.generate_token(username, user_data["roles"])
+        refresh_token = await cls.adb.run(cls.refresh_tokens.issue, username)
+        return {"token": token, "refresh_token": refresh_token}
+
+    @classmethod
+    async def import_users_async(cls, users: List[dict]) -> dict:
+        """
+        Register a batch of users with a single read and a single write.
+
+        Each user needs a "username" and either a plain "password" or an already
+        computed bcrypt "hashed_password". Users that already exist are skipped,
+        also when they are registered while the passwords are being hashed.
+        """
+        usernames = [user["username"] for user in users]
+        # Saves hashing the passwords of the users known to exist
+        existing = await cls.adb.get_many(usernames)
+
+        records, skipped = {}, []
+        for user in users:
+            username = user["username"]
+            if username in existing or username in records:
+                skipped.append(username)
+                continue
+            hashed_password = user.get("hashed_password")
+            if hashed_password is None:
+                hashed_password = await cls.generate_hash_async(user["password"])
+            records[username] = {
+                "password": hashed_password,
+                "roles": user.get("roles") or ["user"],
+            }
+
+        created_meanwhile = await cls.adb.create_many(records)
+        skipped += created_meanwhile
+        return {"imported": len(records) - len(created_meanwhile), "skipped": skipped}
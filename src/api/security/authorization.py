@@ -1,22 +1,108 @@
 """Authorization module."""
 
-from typing import List
+import threading
+from os import environ
+from typing import Dict, Iterable, List, Tuple, Union
 
 from api.core import ApiHttpException
 
+Roles = Union[Iterable[str], int]
+
 
 class Authorization:
-    """Authorization class."""
+    """
+    Authorization class.
+
+    Role names are interned into bits of an integer mask. The role hierarchy
+    (ROLE_HIERARCHY, "parent>child" pairs, comma separated, e.g. "admin>user")
+    is flattened once so every role maps to the mask of the roles it grants,
+    and a permission check is a single AND between the mask granted to the
+    user and the precompiled mask of the required roles (any of them).
+    """
+
+    _bits: Dict[str, int] = {}
+    _grants: Dict[str, int] = {}
+    _granted_cache: Dict[Tuple[str, ...], int] = {}
+    _cache_size = 1024
+    _lock = threading.Lock()
 
     @classmethod
-    def has_permission(cls, roles: List[str], required_roles: List[str]) -> bool:
+    def _bit(cls, role: str) -> int:
+        """Returns the bit of a role, interning it on first use."""
+        bit = cls._bits.get(role)
+        if bit is None:
+            with cls._lock:
+                bit = cls._bits.setdefault(role, 1 << len(cls._bits))
+        return bit
+
+    @staticmethod
+    def parse_hierarchy(value: str) -> Dict[str, List[str]]:
+        """Parses "parent>child,..." pairs into the roles each role implies."""
+        hierarchy: Dict[str, List[str]] = {}
+        for pair in filter(None, (item.strip() for item in value.split(","))):
+            parent, child = (role.strip() for role in pair.split(">"))
+            hierarchy.setdefault(parent, []).append(child)
+        return hierarchy
+
+    @classmethod
+    def configure(cls, hierarchy: Dict[str, List[str]]) -> None:
+        """
+        Flattens a role hierarchy into the mask granted by each role.
+
+        Args:
+            hierarchy (dict): Role to the roles it directly implies.
+        """
+
+        def flatten(role: str, seen: frozenset) -> int:
+            mask = cls._bit(role)
+            for child in hierarchy.get(role, ()):
+                if child not in seen:
+                    mask |= flatten(child, seen | {child})
+            return mask
+
+        grants = {role: flatten(role, frozenset({role})) for role in hierarchy}
+        with cls._lock:
+            cls._grants = grants
+            cls._granted_cache = {}
+
+    @classmethod
+    def compile(cls, roles: Roles) -> int:
+        """Compiles required roles into a mask, masks are returned as is."""
+        if isinstance(roles, int):
+            return roles
+        mask = 0
+        for role in roles:
+            mask |= cls._bit(role)
+        return mask
+
+    @classmethod
+    def granted(cls, roles: Iterable[str]) -> int:
+        """Returns the mask of the roles granted to a user, hierarchy included."""
+        key = tuple(roles)
+        mask = cls._granted_cache.get(key)
+        if mask is None:
+            mask = 0
+            for role in key:
+                mask |= cls._grants.get(role) or cls._bit(role)
+            if len(cls._granted_cache) >= cls._cache_size:
+                cls._granted_cache = {}
+            cls._granted_cache[key] = mask
+        return mask
+
+    @classmethod
+    def has_permission(cls, roles: Iterable[str], required_roles: Roles) -> bool:
         """Check if the user has any of the required roles"""
-        return any(role in required_roles for role in roles)
+        return bool(cls.granted(roles) & cls.compile(required_roles))
 
     @classmethod
-    def authorize(cls, user_roles: List[str], required_roles: List[str]):
+    def authorize(cls, user_roles: Iterable[str], required_roles: Roles):
         """Check if the user has permissions to access the resource"""
         if not cls.has_permission(user_roles, required_roles):
             raise ApiHttpException(
                 status_code=403, data="User does not have sufficient permissions"
             )
+
+
+Authorization.configure(
+    Authorization.parse_hierarchy(environ.get("ROLE_HIERARCHY", "admin>user"))
+)
@@ -0,0 +1,134 @@
+"""Hashing module."""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from os import cpu_count
+from typing import Any, Callable, Optional
+
+from passlib.hash import bcrypt
+
+from api.core import ApiHttpException
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a dedicated, bounded backend.
+
+    Backends:
+    - inline: run in the calling thread (only the concurrency limit applies).
+    - thread: run on a dedicated thread pool.
+    - process: run on a process pool, so hashing scales with the CPU cores
+      instead of contending for the GIL.
+
+    At most `max_workers + max_queue` operations are accepted at once, any
+    further request fails fast with a 503 instead of piling up. Keep that sum
+    below the concurrency of the server (e.g. the 40 threads of the Starlette
+    thread pool), otherwise the server saturates before the hasher does.
+    """
+
+    BACKENDS = ("inline", "thread", "process")
+
+    def __init__(
+        self,
+        backend: str = "inline",
+        max_workers: Optional[int] = None,
+        max_queue: int = 16,
+    ):
+        """
+        Initializes the hasher, the worker pool is started on first use.
+
+        Args:
+            backend (str): One of "inline", "thread" or "process".
+            max_workers (int): Pool size (default: number of CPUs).
+            max_queue (int): Operations allowed to wait for a free worker.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported hashing backend: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers or cpu_count() or 1
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """Returns the worker pool, starting it if needed."""
+        with self._lock:
+            if self._executor is None:
+                if self.backend == "process":
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="hasher"
+                    )
+            return self._executor
+
+    def _acquire(self) -> None:
+        """Takes a slot or rejects the operation when the hasher is saturated."""
+        # pylint: disable-next=consider-using-with
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise ApiHttpException(
+                status_code=503,
+                data="Password hashing is saturated, retry later",
+                headers={"Retry-After": "1"},
+            )
+
+    def _submit(self, func: Callable, *args) -> Future:
+        """Submits an operation to the pool, releasing its slot once done."""
+        self._acquire()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run(self, func: Callable, *args) -> Any:
+        """Runs an operation and waits for its result."""
+        if self.backend == "inline":
+            self._acquire()
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+        return self._submit(func, *args).result()
+
+    async def _run_async(self, func: Callable, *args) -> Any:
+        """Runs an operation without blocking the event loop."""
+        if self.backend == "inline":
+            self._acquire()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, func, *args
+                )
+            finally:
+                self._slots.release()
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def hash(self, text: str) -> str:
+        """Generate a hashed password"""
+        return self._run(bcrypt.hash, text)
+
+    def verify(self, passwd: str, hashed: str) -> bool:
+        """Verify if the password matches the hash"""
+        return self._run(bcrypt.verify, passwd, hashed)
+
+    async def hash_async(self, text: str) -> str:
+        """Generate a hashed password without blocking the event loop"""
+        return await self._run_async(bcrypt.hash, text)
+
+    async def verify_async(self, passwd: str, hashed: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await self._run_async(bcrypt.verify, passwd, hashed)
+
+    def shutdown(self) -> None:
+        """Stops the worker pool."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
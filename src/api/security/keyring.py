@@ -0,0 +1,126 @@
+"""KeyRing module."""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("api")
+
+
+class KeyRing:
+    """
+    Set of JWT signing keys indexed by their `kid`.
+
+    Tokens are signed with the active key and verified with the key named by
+    their `kid` header, so older keys keep validating the tokens they issued
+    while a new key is rolled out.
+
+    Keys are read from a JSON file and reloaded when it changes:
+
+    ```json
+    {
+        "active": "2024-02",
+        "keys": {"2024-01": "old secret", "2024-02": "new secret"}
+    }
+    ```
+
+    Without a file the ring holds a single key, `default_secret` under the
+    `default_kid`.
+    """
+
+    def __init__(
+        self,
+        default_secret: str,
+        filename: Optional[str] = None,
+        reload_interval: float = 5.0,
+        default_kid: str = "default",
+    ):
+        """
+        Initializes the ring, loading the keys file if there is one.
+
+        Args:
+            default_secret (str): Key used when no file is configured.
+            filename (str): Path of the JSON keys file.
+            reload_interval (float): Minimum seconds between two file checks.
+            default_kid (str): Identifier of the default key.
+        """
+        self.filename = filename
+        self.reload_interval = reload_interval
+        # (keys, active kid), swapped as a whole on reload
+        self._state: Tuple[Dict[str, bytes], str] = (
+            {default_kid: default_secret.encode("utf-8")},
+            default_kid,
+        )
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        if filename:
+            self.reload()
+
+    def on_change(self, listener: Callable[[], None]) -> None:
+        """Registers a callback run when keys are removed from the ring."""
+        self._listeners.append(listener)
+
+    @staticmethod
+    def _parse(content: Any) -> Tuple[Dict[str, bytes], str]:
+        """Validates the content of the keys file, returns (keys, active kid)."""
+        if not isinstance(content, dict) or not isinstance(content.get("keys"), dict):
+            raise ValueError('Expected an object with a "keys" object')
+        if not all(isinstance(secret, str) for secret in content["keys"].values()):
+            raise ValueError("Expected string keys")
+        active = content.get("active")
+        if not isinstance(active, str) or active not in content["keys"]:
+            raise ValueError(f"Active key {active} is not in the ring")
+        keys = {kid: secret.encode("utf-8") for kid, secret in content["keys"].items()}
+        return keys, active
+
+    def reload(self) -> None:
+        """Loads the keys file if it changed since the last load."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            stat = os.stat(self.filename)
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature == self._signature:
+                return
+
+            with open(self.filename, "r", encoding="utf-8") as f:
+                keys, active = self._parse(json.load(f))
+
+            removed = any(
+                keys.get(kid) != secret for kid, secret in self._state[0].items()
+            )
+            self._state = (keys, active)
+            self._signature = signature
+
+        if removed:
+            for listener in self._listeners:
+                listener()
+
+    def maybe_reload(self) -> None:
+        """Reloads the keys file at most once every `reload_interval` seconds."""
+        if not self.filename:
+            return
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        try:
+            self.reload()
+        except (OSError, ValueError) as err:
+            # Keep serving with the previous keys until the file is fixed
+            logger.error("Unable to reload keys from %s: %s", self.filename, err)
+
+    @property
+    def active(self) -> Tuple[str, bytes]:
+        """Returns the (kid, key) pair used to sign new tokens."""
+        self.maybe_reload()
+        keys, kid = self._state
+        return kid, keys[kid]
+
+    def get(self, kid: Optional[str]) -> Optional[bytes]:
+        """Returns the key of a kid (the active one if None), or None if unknown."""
+        self.maybe_reload()
+        keys, active = self._state
+        return keys.get(active if kid is None else kid)
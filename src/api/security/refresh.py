@@ -0,0 +1,114 @@
+"""Refresh module."""
+
+import hashlib
+import secrets
+import threading
+import time
+from typing import Optional, Tuple
+
+from api.db import DBInterface
+
+
+class RefreshTokens:
+    """
+    Server-side store of rotating refresh tokens.
+
+    Only the SHA-256 digest of each token is stored, with its user, expiration
+    and family (the chain of tokens rotated from the same login). Every token
+    can be used once: using it marks it as used and issues the next token of
+    the family. Presenting a used token again means it leaked, so the whole
+    family is revoked.
+    """
+
+    def __init__(
+        self, store: DBInterface, lifetime: float, prune_interval: float = 300.0
+    ):
+        """
+        Initializes the refresh tokens on top of a store.
+
+        Args:
+            store (DBInterface): Store persisting the tokens (indexed by family
+                and username for revocations).
+            lifetime (float): Seconds a refresh token stays valid.
+            prune_interval (float): Seconds between two removals of the expired
+                tokens from the store.
+        """
+        self.store = store
+        self.lifetime = lifetime
+        self.prune_interval = prune_interval
+        self._pruned_at = time.monotonic()
+        self._pruner: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        """Returns the store key of a token."""
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def issue(self, username: str, family: Optional[str] = None) -> str:
+        """Issues a new refresh token, starting a new family if none is given."""
+        token = secrets.token_urlsafe(32)
+        key = self._key(token)
+        self.store.create(
+            key,
+            {
+                "username": username,
+                "family": family or key,
+                "exp": time.time() + self.lifetime,
+                "used": False,
+            },
+        )
+        self._maybe_prune()
+        return token
+
+    def rotate(self, token: str) -> Tuple[str, str]:
+        """
+        Consumes a refresh token and issues the next one of its family.
+
+        Returns:
+            tuple: The username the token belongs to and the new refresh token.
+
+        Raises:
+            KeyError: If the token is unknown, expired or was already used.
+        """
+        key = self._key(token)
+        data = self.store.read(key)
+        if data["exp"] <= time.time():
+            self.store.delete_many([key])
+            raise KeyError("Refresh token expired")
+        # Marking the token used is atomic in the store, so only one of the
+        # requests (or workers) presenting it concurrently wins the rotation
+        if data["used"] or not self.store.update_if(
+            key, {"used": False}, {**data, "used": True}
+        ):
+            self.revoke_family(data["family"])
+            raise KeyError("Refresh token reused")
+        return data["username"], self.issue(data["username"], data["family"])
+
+    def revoke_family(self, family: str) -> int:
+        """Revokes every token rotated from the same login."""
+        return self.store.delete_many(self.store.find_by("family", family))
+
+    def revoke_user(self, username: str) -> int:
+        """Revokes every refresh token of a user."""
+        return self.store.delete_many(self.store.find_by("username", username))
+
+    def prune(self) -> int:
+        """Removes the expired tokens from the store."""
+        now = time.time()
+        expired = [key for key, data in self.store.scan() if data["exp"] <= now]
+        self._pruned_at = time.monotonic()
+        return self.store.delete_many(expired) if expired else 0
+
+    def _maybe_prune(self) -> None:
+        """Starts a background prune once `prune_interval` has elapsed."""
+        if time.monotonic() - self._pruned_at < self.prune_interval:
+            return
+        with self._lock:
+            if self._pruner is not None and self._pruner.is_alive():
+                return
+            self._pruned_at = time.monotonic()
+            self._pruner = threading.Thread(
+                target=self.prune, name="refresh-prune", daemon=True
+            )
+            self._pruner.start()
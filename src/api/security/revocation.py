@@ -0,0 +1,208 @@
+"""Revocation module."""
+
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from api.db import DBInterface
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter, answers "definitely absent" or "maybe present"."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initializes an empty filter.
+
+        Args:
+            capacity (int): Number of items the filter is sized for.
+            error_rate (float): False positive rate once `capacity` items are added.
+        """
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(
+            8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Yields the bit positions of an item (double hashing)."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> None:
+        """Adds an item to the filter."""
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class _Refresher:  # pylint: disable=too-few-public-methods
+    """Runs a refresh in a background thread, at most once per interval."""
+
+    def __init__(self, target: Callable[[], None], interval: float):
+        self.target = target
+        self.interval = interval
+        self.refreshed_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def maybe_start(self, force: bool = False) -> None:
+        """Starts a refresh once the interval is over (or if forced)."""
+        if not force and time.monotonic() - self.refreshed_at <= self.interval:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.refreshed_at = time.monotonic()
+            self._thread = threading.Thread(
+                target=self.target, name="revocation-refresh", daemon=True
+            )
+            self._thread.start()
+
+
+class RevocationList:
+    """
+    Denylist of revoked tokens, persisted through a DBInterface store.
+
+    Two kinds of entries are kept, both until the tokens they cover expire:
+    - "jti:<id>": a single revoked token.
+    - "user:<username>": every token of the user issued up to that moment.
+
+    A Bloom filter of the entry keys sits in front of the store, so checking a
+    token that was never revoked costs a few hash probes and no store access.
+    The filter is rebuilt from the store every `refresh_interval` seconds (to
+    pick up revocations made by other workers) and expired entries are pruned
+    from the store at the same time.
+    """
+
+    def __init__(
+        self,
+        store: DBInterface,
+        capacity: int = 100000,
+        error_rate: float = 0.01,
+        refresh_interval: float = 5.0,
+    ):
+        """
+        Initializes the list from the entries already in the store.
+
+        Args:
+            store (DBInterface): Store persisting the revoked entries.
+            capacity (int): Entries the Bloom filter is sized for.
+            error_rate (float): Target false positive rate of the filter.
+            refresh_interval (float): Seconds between two rebuilds of the filter.
+        """
+        self.store = store
+        self.capacity = capacity
+        self.counters: Counter = Counter(checks=0, false_positives=0)
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._refresher = _Refresher(self.refresh, refresh_interval)
+        self._recent: Set[str] = set()
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Prunes the expired entries and rebuilds the filter from the store."""
+        with self._lock:
+            # Entries added while scanning are carried over to the new filter
+            self._recent = set()
+        now = time.time()
+        live, expired = [], []
+        for key, data in self.store.scan():
+            (live if data["exp"] > now else expired).append(key)
+        if expired:
+            self.store.delete_many(expired)
+
+        # Grow the filter if more entries are live than it was sized for
+        bloom = BloomFilter(max(self.capacity, 2 * len(live)), self._bloom.error_rate)
+        for key in live:
+            bloom.add(key)
+        with self._lock:
+            for key in self._recent:
+                bloom.add(key)
+            self._bloom = bloom
+            self._refresher.refreshed_at = time.monotonic()
+
+    def _maybe_refresh(self) -> None:
+        """Starts a background refresh once the filter is stale or full."""
+        self._refresher.maybe_start(force=self._bloom.count >= self._bloom.capacity)
+
+    def _add(self, key: str, data: Dict[str, Any]) -> None:
+        """Persists an entry and adds it to the filter."""
+        self.store.put_many({key: data})
+        with self._lock:
+            self._bloom.add(key)
+            self._recent.add(key)
+        self._maybe_refresh()
+
+    def revoke_token(self, jti: str, exp: float) -> None:
+        """Revokes a single token until it expires."""
+        self._add(f"jti:{jti}", {"exp": exp})
+
+    def revoke_user(self, username: str, lifetime: float) -> None:
+        """
+        Revokes every token of a user issued up to now.
+
+        Args:
+            username (str): User whose tokens are revoked.
+            lifetime (float): Maximum lifetime of a token, in seconds.
+        """
+        # Whole seconds, like the "iat" claim of the tokens: every token issued
+        # up to the end of this second is revoked
+        now = int(time.time())
+        self._add(f"user:{username}", {"exp": now + lifetime, "revoked_at": now})
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns a live entry, going to the store only if the filter matches."""
+        if key not in self._bloom:
+            return None
+        try:
+            data = self.store.read(key)
+        except KeyError:
+            self.counters["false_positives"] += 1
+            return None
+        return data if data["exp"] > time.time() else None
+
+    def may_be_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Checks the filter only, False means not revoked without any store access."""
+        self.counters["checks"] += 1
+        self._maybe_refresh()
+        jti = payload.get("jti")
+        keys = [f"user:{payload.get('username')}"]
+        if jti is not None:
+            keys.append(f"jti:{jti}")
+        return any(key in self._bloom for key in keys)
+
+    def confirm(self, payload: Dict[str, Any]) -> bool:
+        """Reads the store to check a payload the filter matched (blocking I/O)."""
+        jti = payload.get("jti")
+        if jti is not None and self._lookup(f"jti:{jti}") is not None:
+            return True
+        entry = self._lookup(f"user:{payload.get('username')}")
+        return entry is not None and payload.get("iat", 0) <= int(entry["revoked_at"])
+
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        """Checks if a verified token payload has been revoked."""
+        return self.may_be_revoked(payload) and self.confirm(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the filter fill and check counters."""
+        return {
+            "entries": self._bloom.count,
+            "capacity": self.capacity,
+            **self.counters,
+        }
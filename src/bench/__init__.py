@@ -0,0 +1,3 @@
+"""Benchmarks module."""
+
+from .runner import Runner, compare
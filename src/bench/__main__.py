@@ -0,0 +1,114 @@
+"""Benchmarks entrypoint."""
+
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _commit() -> str:
+    """Returns the current git commit, if any."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line."""
+    parser = argparse.ArgumentParser(
+        prog="bench", description="Run the API benchmarks."
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="short runs, 1k users only"
+    )
+    parser.add_argument("--filter", default="", help="only run matching benchmarks")
+    parser.add_argument(
+        "--output", default="bench-results.json", help="results file (JSON)"
+    )
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (JSON)")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown flagged as a regression (default: 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Runs the benchmarks, writes the results and compares them to the baseline."""
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        # Throwaway stores, and no rate limit on the login benchmark
+        for name in ("", "REVOKED_", "REFRESH_"):
+            os.environ[f"DB_{name}FILENAME"] = os.path.join(
+                directory, f"{name.lower() or 'users_'}db.json"
+            )
+        os.environ["RATE_LIMITS"] = ""
+        # Keep the route loading logs out of the report
+        logging.getLogger("api").setLevel(logging.WARNING)
+
+        # pylint: disable=import-outside-toplevel
+        from . import asgi, micro
+        from .runner import Runner, compare
+
+        runner = Runner(
+            min_time=0.2 if args.quick else 1.0,
+            min_iterations=3 if args.quick else 5,
+            name_filter=args.filter,
+        )
+        micro.run(runner, (1000,) if args.quick else micro.USER_COUNTS)
+        asgi.run(runner)
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": runner.results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, nothing to compare")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Compared to {args.baseline} ({baseline['meta'].get('commit')}):")
+    regressions = compare(runner.results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
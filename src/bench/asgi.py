@@ -0,0 +1,114 @@
+"""ASGI benchmarks module."""
+
+import json
+from typing import Dict, List, Optional, Tuple
+
+from api import api
+from api.core import ApiHttpException
+from api.security import Authentication
+
+from .runner import Runner
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+class Client:  # pylint: disable=too-few-public-methods
+    """Calls the application in-process, with no socket nor HTTP parsing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: bytes = b"",
+    ) -> Tuple[int, bytes]:
+        """Sends a request, returns the status and the body of the response."""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in (headers or {}).items()
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        sent = []
+        chunks: List[bytes] = []
+        status = [0]
+
+        async def receive():
+            if sent:
+                return {"type": "http.disconnect"}
+            sent.append(True)
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status[0], b"".join(chunks)
+
+
+def _expect(client: Client, status: int, *args, **kwargs):
+    """Returns a coroutine function sending a request, checking its status."""
+
+    async def call():
+        code, body = await client.request(*args, **kwargs)
+        if code != status:
+            raise RuntimeError(f"{args[:2]} returned {code}: {body[:200]!r}")
+
+    return call
+
+
+def run(runner: Runner) -> None:
+    """Runs the request benchmarks against the application."""
+    client = Client(api.app)
+    try:
+        Authentication.register_user(USERNAME, PASSWORD)
+    except ApiHttpException:
+        pass  # Already registered
+    token = Authentication.generate_token(USERNAME, ["user"])
+    credentials = json.dumps({"username": USERNAME, "password": PASSWORD}).encode()
+
+    runner.run_async("asgi.GET /", _expect(client, 200, "GET", "/"))
+    runner.run_async(
+        "asgi.GET /apis/v1/helloworld",
+        _expect(client, 200, "GET", "/apis/v1/helloworld"),
+    )
+    runner.run_async(
+        "asgi.GET /apis/v1/secure",
+        _expect(
+            client,
+            200,
+            "GET",
+            "/apis/v1/secure",
+            headers={"Authorization": f"Bearer {token}"},
+        ),
+    )
+    # Dominated by bcrypt, far fewer iterations fit in the budget
+    runner.run_async(
+        "asgi.POST /auth/login",
+        _expect(
+            client,
+            200,
+            "POST",
+            "/auth/login",
+            headers={"Content-Type": "application/json"},
+            body=credentials,
+        ),
+    )
@@ -0,0 +1,84 @@
+"""Micro-benchmarks module."""
+
+import itertools
+import os
+import tempfile
+
+from api.core import ApiJSONResponse, ApiResponse
+from api.db import DBDriverFactory
+from api.security import Authentication, Authorization
+
+from .runner import Runner
+
+USER_COUNTS = (1000, 10000, 100000)
+
+
+def _user(i: int) -> dict:
+    """Returns a user record shaped like the registered ones."""
+    return {"username": f"user{i}", "password": "x" * 60, "roles": ["user"]}
+
+
+def bench_local_store(runner: Runner, count: int) -> None:
+    """LocalStore CRUD on a file of `count` users (with the mtime cache)."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = DBDriverFactory.get_driver(
+            "local", os.path.join(directory, "users.db.json"), cache=True
+        )
+        store.put_many({f"user{i}": _user(i) for i in range(count)})
+        keys = itertools.cycle([f"user{i}" for i in range(0, count, 7)])
+        new_keys = itertools.count(count)
+
+        def create_delete():
+            key = f"user{next(new_keys)}"
+            store.create(key, _user(0))
+            store.delete(key)
+
+        runner.run(f"localstore.read[{count}]", lambda: store.read(next(keys)), 100)
+        runner.run(
+            f"localstore.update[{count}]",
+            lambda: store.update(next(keys), {"roles": ["user"]}),
+        )
+        runner.run(f"localstore.create_delete[{count}]", create_delete)
+
+
+def bench_tokens(runner: Runner) -> None:
+    """JWT verification, uncached and through the token cache."""
+    token = Authentication.generate_token("bench", ["user"])
+    runner.run("verify_token", lambda: Authentication.verify_token(token), 10)
+    runner.run(
+        "verify_token_cached",
+        lambda: Authentication.verify_token_cached(token),
+        100,
+    )
+
+
+def bench_authorize(runner: Runner) -> None:
+    """Role checks, against role names and against a precompiled mask."""
+    roles = ["admin"]
+    mask = Authorization.compile(["user"])
+    runner.run(
+        "authorize.names", lambda: Authorization.authorize(roles, ["user"]), 1000
+    )
+    runner.run("authorize.mask", lambda: Authorization.authorize(roles, mask), 1000)
+
+
+def bench_serialization(runner: Runner) -> None:
+    """ApiResponse rendering, with and without the metadata."""
+    small = ApiResponse(status_code=200, data={"message": "Hello World"})
+    large = ApiResponse(status_code=200, data=[_user(i) for i in range(1000)])
+    runner.run("serialize.small", lambda: ApiJSONResponse(content=small).body, 1000)
+    runner.run(
+        "serialize.small_no_metadata",
+        lambda: ApiJSONResponse(content=small, exclude={"metatata"}).body,
+        1000,
+    )
+    runner.run("serialize.large", lambda: ApiJSONResponse(content=large).body, 10)
+
+
+def run(runner: Runner, user_counts=USER_COUNTS) -> None:
+    """Runs all the micro-benchmarks."""
+    for count in user_counts:
+        bench_local_store(runner, count)
+    bench_tokens(runner)
+    bench_authorize(runner)
+    bench_serialization(runner)
@@ -0,0 +1,120 @@
+"""Runner module."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+Result = Dict[str, Any]
+
+
+class Runner:
+    """
+    Times benchmarks for a time budget and summarizes their latencies.
+
+    Each benchmark runs at least `min_iterations` times and until `min_time`
+    seconds have elapsed. Very fast operations are timed in batches of
+    `batch` calls, so the timer overhead does not dominate the samples.
+    """
+
+    def __init__(self, min_time: float = 1.0, min_iterations: int = 5, name_filter=""):
+        """
+        Initializes the runner.
+
+        Args:
+            min_time (float): Seconds each benchmark runs for (at least).
+            min_iterations (int): Samples each benchmark takes (at least).
+            name_filter (str): Only run the benchmarks whose name contains it.
+        """
+        self.min_time = min_time
+        self.min_iterations = min_iterations
+        self.name_filter = name_filter
+        self.results: Dict[str, Result] = {}
+
+    def wants(self, name: str) -> bool:
+        """Checks if a benchmark is selected."""
+        return self.name_filter in name
+
+    @staticmethod
+    def summarize(samples: List[float], batch: int) -> Result:
+        """Returns the throughput and latency percentiles of timed samples."""
+        samples = sorted(sample / batch for sample in samples)
+        total = sum(samples)
+        return {
+            "iterations": len(samples) * batch,
+            "ops_per_sec": len(samples) / total if total else float("inf"),
+            "mean_us": total / len(samples) * 1e6,
+            "p50_us": samples[len(samples) // 2] * 1e6,
+            "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+        }
+
+    def _record(self, name: str, samples: List[float], batch: int) -> Result:
+        """Stores and prints the summary of a benchmark."""
+        result = self.results[name] = self.summarize(samples, batch)
+        print(
+            f"{name:<45} {result['ops_per_sec']:>12,.0f} ops/s"
+            f"  p50 {result['p50_us']:>10.1f} us  p99 {result['p99_us']:>10.1f} us",
+            flush=True,
+        )
+        return result
+
+    def run(
+        self, name: str, func: Callable[[], Any], batch: int = 1
+    ) -> Optional[Result]:
+        """Times a function."""
+        if not self.wants(name):
+            return None
+        clock = time.perf_counter
+        samples = []
+        deadline = clock() + self.min_time
+        while len(samples) < self.min_iterations or clock() < deadline:
+            started = clock()
+            for _ in range(batch):
+                func()
+            samples.append(clock() - started)
+        return self._record(name, samples, batch)
+
+    def run_async(
+        self, name: str, func: Callable[[], Awaitable[Any]]
+    ) -> Optional[Result]:
+        """Times a coroutine function, each call awaited in a single event loop."""
+        if not self.wants(name):
+            return None
+        clock = time.perf_counter
+
+        async def measure() -> List[float]:
+            samples = []
+            deadline = clock() + self.min_time
+            while len(samples) < self.min_iterations or clock() < deadline:
+                started = clock()
+                await func()
+                samples.append(clock() - started)
+            return samples
+
+        return self._record(name, asyncio.run(measure()), 1)
+
+
+def compare(
+    results: Dict[str, Result], baseline: Dict[str, Result], threshold: float
+) -> List[str]:
+    """
+    Compares the throughput of results against a baseline.
+
+    Args:
+        results (dict): Results of this run, by benchmark name.
+        baseline (dict): Results of the baseline, by benchmark name.
+        threshold (float): Relative slowdown flagged as a regression.
+
+    Returns:
+        list: The names of the regressed benchmarks.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["ops_per_sec"] / baseline[name]["ops_per_sec"]
+        flag = ""
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<45} {ratio:>8.2f}x baseline{flag}")
+    return regressions
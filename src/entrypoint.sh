@@ -4,4 +4,9 @@ PROJECT_DIR=$(dirname "$(realpath "$0")")
 export PYTHONPATH="$PROJECT_DIR:$PYTHONPATH"
 
 echo "[entrypoint.sh] - $(date +%Y-%m-%dT%H:%M:%S.%3N%:z) - Starting API"
-python -m api
\ No newline at end of file
+if [ "${API_IS_DEV:-false}" = "true" ]; then
+    # Single process with reload
+    exec python -m api
+fi
+# Supervised workers, see api/launcher.py for the API_* settings
+exec python -m api.launcher
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Test the authentication endpoints."""
 
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from api.core import ApiHttpException
 from api.security import Authentication
@@ -18,7 +18,8 @@ def test_register_user():
     # Mock the behavior of Authentication.register_user to simulate successful registration
     with patch.object(
         Authentication,
-        "register_user",
+        "register_user_async",
+        new_callable=AsyncMock,
         return_value={"message": "User registered successfully"},
     ) as mock_register:
         # Prepare user data
@@ -32,7 +33,7 @@ def test_register_user():
         assert response.json() == {"message": "User registered successfully"}
 
         # Verify that the register_user method was called with the correct parameters
-        mock_register.assert_called_once_with(
+        mock_register.assert_awaited_once_with(
             user_data["username"], user_data["password"]
         )
 
@@ -42,7 +43,10 @@ def test_get_token_success():
     """Test the GetToken endpoint (POST) - success case."""
     # Mock the behavior of Authentication.verify_user to simulate successful token generation
     with patch.object(
-        Authentication, "verify_user", return_value={"token": "valid_token"}
+        Authentication,
+        "verify_user_async",
+        new_callable=AsyncMock,
+        return_value={"token": "valid_token"},
     ) as mock_verify:
         # Prepare user data
         user_data = {"username": "testuser", "password": "password123"}
@@ -55,7 +59,7 @@ def test_get_token_success():
         assert "token" in response.json()
 
         # Verify that the verify_user method was called with the correct parameters
-        mock_verify.assert_called_once_with(
+        mock_verify.assert_awaited_once_with(
             user_data["username"], user_data["password"]
         )
 
@@ -66,7 +70,8 @@ def test_get_token_invalid_credentials():
     # Mock the behavior of Authentication.verify_user to simulate invalid credentials
     with patch.object(
         Authentication,
-        "verify_user",
+        "verify_user_async",
+        new_callable=AsyncMock,
         side_effect=ApiHttpException(status_code=400, data="Invalid password"),
     ):
         # Prepare user data with invalid credentials
@@ -0,0 +1,62 @@
+"""Test the async Authentication helpers."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from api.core import ApiHttpException
+from api.security import Authentication
+
+
+def test_register_and_verify_user_async(async_db):  # pylint: disable=unused-argument
+    """Test registering and logging in through the async helpers."""
+    with patch.object(
+        Authentication,
+        "generate_hash_async",
+        AsyncMock(side_effect=lambda text: f"hashed-{text}"),
+    ), patch.object(
+        Authentication,
+        "verify_hash_async",
+        AsyncMock(side_effect=lambda passwd, hashed: hashed == f"hashed-{passwd}"),
+    ):
+        asyncio.run(Authentication.register_user_async("alice", "secret"))
+        result = asyncio.run(Authentication.verify_user_async("alice", "secret"))
+        assert Authentication.verify_token(result["token"])["username"] == "alice"
+
+        with pytest.raises(ApiHttpException) as exc:
+            asyncio.run(Authentication.verify_user_async("alice", "wrong"))
+        assert exc.value.status_code == 400
+
+
+def test_unregister_user_async_not_found(async_db):  # pylint: disable=unused-argument
+    """Test unregistering a user that does not exist."""
+    with pytest.raises(ApiHttpException) as exc:
+        asyncio.run(Authentication.unregister_user_async("nobody"))
+    assert exc.value.status_code == 404
+
+
+def test_sync_helpers_inside_event_loop(async_db):
+    """Test that the sync helpers also work while an event loop is running."""
+
+    async def register_and_unregister():
+        Authentication.register_user("bob", "secret")
+        assert await async_db.read("bob") == {"password": "hashed", "roles": ["user"]}
+        return Authentication.unregister_user("bob")
+
+    with patch.object(Authentication, "db", async_db.store), patch.object(
+        Authentication, "generate_hash", return_value="hashed"
+    ):
+        result = asyncio.run(register_and_unregister())
+    assert result == {"message": "User unregistered successfully"}
+
+
+def test_concurrent_duplicate_registration(async_db):
+    """Test that losing a registration race is reported as an existing user."""
+    with patch.object(
+        Authentication, "generate_hash_async", AsyncMock(return_value="hashed")
+    ), patch.object(async_db, "create", AsyncMock(side_effect=KeyError("alice"))):
+        with pytest.raises(ApiHttpException) as exc:
+            asyncio.run(Authentication.register_user_async("alice", "secret"))
+    assert exc.value.status_code == 400
+    assert exc.value.data == "User alice already exists"
@@ -0,0 +1,49 @@
+"""Test the Authorization role model."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import api
+from api.core import ApiHttpException
+from api.security import Authorization
+
+PREFIX_PATH = "/apis"
+
+client = TestClient(api.app)
+
+
+def test_parse_hierarchy():
+    """Test parsing the ROLE_HIERARCHY format."""
+    assert Authorization.parse_hierarchy("admin>user, admin>auditor,user>guest") == {
+        "admin": ["user", "auditor"],
+        "user": ["guest"],
+    }
+
+
+def test_hierarchy_is_flattened():
+    """Test that admin grants user, but not the other way around."""
+    assert Authorization.has_permission(["admin"], ["user"])
+    assert Authorization.has_permission(["user"], ["user", "admin"])
+    assert not Authorization.has_permission(["user"], ["admin"])
+    assert not Authorization.has_permission(["guest"], ["user"])
+
+
+def test_precompiled_requirement():
+    """Test checking against a compiled mask."""
+    required = Authorization.compile(["admin"])
+    Authorization.authorize(["admin"], required)
+    with pytest.raises(ApiHttpException) as exc:
+        Authorization.authorize(["user"], required)
+    assert exc.value.status_code == 403
+
+
+def test_admin_resource_requires_admin(auth_header):
+    """Test the declarative requirement of the admin resource."""
+    response = client.get(f"{PREFIX_PATH}/v1alpha/admin", headers=auth_header(["user"]))
+    assert response.status_code == 403
+
+    response = client.get(
+        f"{PREFIX_PATH}/v1alpha/admin", headers=auth_header(["admin"])
+    )
+    assert response.status_code == 200
+    assert response.json()["data"]["required_roles"] == ["admin"]
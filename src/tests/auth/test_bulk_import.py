@@ -0,0 +1,102 @@
+"""Test the bulk import endpoint."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from api.routes.auth import BulkImport
+from api import api
+
+app = api.app
+client = TestClient(app)
+
+
+def test_bulk_import(async_db, auth_header):
+    """Test importing users from an NDJSON body."""
+    body = "\n".join(
+        [
+            '{"username": "john", "hashed_password": "h1"}',
+            "",
+            '{"username": "jane", "hashed_password": "h2", "roles": ["admin"]}',
+            '{"username": "john", "hashed_password": "h3"}',
+        ]
+    )
+    response = client.post(
+        "/auth/bulk-import", content=body, headers=auth_header(["admin"])
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"] == {"imported": 2, "skipped": ["john"]}
+    assert async_db.store.read("jane") == {"password": "h2", "roles": ["admin"]}
+
+
+def test_bulk_import_invalid_first_record(async_db, auth_header):
+    """Test that a malformed first line is rejected with its line number."""
+    body = '["john"]\n{"username": "jane", "hashed_password": "h2"}'
+    response = client.post(
+        "/auth/bulk-import", content=body, headers=auth_header(["admin"])
+    )
+
+    assert response.status_code == 400
+    assert response.json()["data"] == "Invalid record on line 1"
+    assert asyncio.run(async_db.list_all()) == {}
+
+
+def test_bulk_import_invalid_roles(async_db, auth_header):
+    """Test that roles which are not a list of strings are rejected."""
+    for roles in ('"admin"', '["admin", 1]', "{}"):
+        body = f'{{"username": "jane", "hashed_password": "h2", "roles": {roles}}}'
+        response = client.post(
+            "/auth/bulk-import", content=body, headers=auth_header(["admin"])
+        )
+        assert response.status_code == 400
+    assert asyncio.run(async_db.list_all()) == {}
+
+
+def test_bulk_import_user_registered_meanwhile(async_db, auth_header):
+    """Test that a user registered after the existence check is not replaced."""
+    async_db.store.create("john", {"password": "mine", "roles": ["user"]})
+    body = '{"username": "john", "hashed_password": "h1", "roles": ["admin"]}'
+    with patch.object(async_db, "get_many", AsyncMock(return_value={})):
+        response = client.post(
+            "/auth/bulk-import", content=body, headers=auth_header(["admin"])
+        )
+
+    assert response.json()["data"] == {"imported": 0, "skipped": ["john"]}
+    assert async_db.store.read("john") == {"password": "mine", "roles": ["user"]}
+
+
+def test_bulk_import_invalid_record_after_a_chunk(async_db, auth_header):
+    """Test that the users imported before a malformed line are reported."""
+    body = "\n".join(
+        [
+            '{"username": "john", "hashed_password": "h1"}',
+            '{"username": "joe", "hashed_password": "h2"}',
+            '{"username": "jack", "hashed_password": "h3"}',
+            '{"username": "jane"}',
+            '{"username": "jim", "hashed_password": "h4"}',
+        ]
+    )
+    with patch.object(BulkImport, "chunk_size", 2):
+        response = client.post(
+            "/auth/bulk-import", content=body, headers=auth_header(["admin"])
+        )
+
+    assert response.status_code == 207
+    assert response.json()["data"] == {
+        "imported": 3,
+        "skipped": [],
+        "failed_at_line": 4,
+    }
+    assert sorted(asyncio.run(async_db.list_all())) == ["jack", "joe", "john"]
+
+
+def test_bulk_import_requires_admin(
+    async_db, auth_header
+):  # pylint: disable=unused-argument
+    """Test that only admins can import users."""
+    response = client.post(
+        "/auth/bulk-import", content="", headers=auth_header(["user"])
+    )
+    assert response.status_code == 403
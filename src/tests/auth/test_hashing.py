@@ -0,0 +1,78 @@
+"""Test the PasswordHasher backends."""
+
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from api.core import ApiHttpException
+from api.security import PasswordHasher
+
+
+def test_hasher_rejects_unknown_backend():
+    """Test that only the known backends are accepted."""
+    with pytest.raises(ValueError):
+        PasswordHasher(backend="gpu")
+
+
+@pytest.mark.parametrize("backend", ["inline", "thread"])
+def test_hasher_runs_operations(backend):
+    """Test that hash/verify are delegated to bcrypt on every backend."""
+    hasher = PasswordHasher(backend=backend, max_workers=2)
+    with patch("api.security.hashing.bcrypt") as bcrypt:
+        bcrypt.hash.return_value = "hashed"
+        bcrypt.verify.return_value = True
+        assert hasher.hash("secret") == "hashed"
+        assert hasher.verify("secret", "hashed") is True
+    hasher.shutdown()
+
+
+def test_hasher_fails_fast_when_saturated():
+    """Test that a full queue answers 503 instead of waiting."""
+    hasher = PasswordHasher(backend="thread", max_workers=1, max_queue=0)
+    release = threading.Event()
+    with patch("api.security.hashing.bcrypt") as bcrypt:
+        bcrypt.hash.side_effect = lambda _: release.wait() and "hashed"
+        # pylint: disable-next=protected-access
+        future = hasher._submit(bcrypt.hash, "first")
+
+        with pytest.raises(ApiHttpException) as exc:
+            hasher.hash("second")
+        assert exc.value.status_code == 503
+        assert exc.value.headers == {"Retry-After": "1"}
+        assert hasher.rejected == 1
+
+        release.set()
+        assert future.result() == "hashed"
+        assert hasher.hash("third") == "hashed"
+    hasher.shutdown()
+
+
+def test_hasher_process_backend():
+    """Test that the process backend hashes and verifies in worker processes."""
+    hasher = PasswordHasher(backend="process", max_workers=1)
+    try:
+        hashed = asyncio.run(hasher.hash_async("secret"))
+        assert asyncio.run(hasher.verify_async("secret", hashed)) is True
+        assert hasher.verify("wrong", hashed) is False
+    finally:
+        hasher.shutdown()
+
+
+def test_hasher_counts_rejections_across_threads():
+    """Test that concurrent rejections are all counted."""
+    hasher = PasswordHasher(backend="inline", max_workers=1, max_queue=0)
+    hasher._slots.acquire()  # pylint: disable=protected-access,consider-using-with
+
+    def reject():
+        for _ in range(1000):
+            with pytest.raises(ApiHttpException):
+                hasher.hash("secret")
+
+    threads = [threading.Thread(target=reject) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert hasher.rejected == 4000
@@ -0,0 +1,88 @@
+"""Test the signing key ring."""
+
+import json
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from api.core import ApiHttpException
+from api.security import Authentication, KeyRing
+
+
+def write_keys(path, active: str, keys: dict):
+    """Write a keys file."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"active": active, "keys": keys}, f)
+
+
+@pytest.fixture(name="keys_file")
+def fixture_keys_file(tmp_path):
+    """Swap the Authentication key ring for one backed by a temporary file."""
+    path = tmp_path / "keys.json"
+    write_keys(path, "k1", {"k1": "first secret"})
+    keyring = KeyRing("unused", filename=str(path), reload_interval=0)
+    keyring.on_change(Authentication.token_cache.clear)
+    with patch.object(Authentication, "keyring", keyring):
+        yield path
+
+
+def test_default_key_ring():
+    """Test that without a file the ring holds the default secret."""
+    keyring = KeyRing("secret")
+    assert keyring.active == ("default", b"secret")
+    assert keyring.get(None) == b"secret"
+    assert keyring.get("other") is None
+
+
+def test_tokens_carry_kid(keys_file):  # pylint: disable=unused-argument
+    """Test that tokens are signed with the active key."""
+    token = Authentication.generate_token("alice", ["user"])
+    assert jwt.get_unverified_header(token)["kid"] == "k1"
+    assert (
+        jwt.decode(token, "first secret", algorithms=["HS256"])["username"] == "alice"
+    )
+
+
+def test_key_rotation(keys_file):
+    """Test that old tokens stay valid until their key leaves the ring."""
+    old_token = Authentication.generate_token("alice", ["user"])
+
+    write_keys(keys_file, "k2", {"k1": "first secret", "k2": "second secret"})
+    new_token = Authentication.generate_token("alice", ["user"])
+    assert jwt.get_unverified_header(new_token)["kid"] == "k2"
+    assert Authentication.verify_token_cached(old_token)["username"] == "alice"
+    assert Authentication.verify_token_cached(new_token)["username"] == "alice"
+
+    write_keys(keys_file, "k2", {"k2": "second secret"})
+    with pytest.raises(ApiHttpException) as exc:
+        Authentication.verify_token_cached(old_token)
+    assert exc.value.status_code == 401
+    assert Authentication.verify_token_cached(new_token)["username"] == "alice"
+
+
+def test_invalid_keys_file_keeps_previous_keys(keys_file):
+    """Test that a broken keys file does not drop the loaded keys."""
+    token = Authentication.generate_token("alice", ["user"])
+    with open(keys_file, "w", encoding="utf-8") as f:
+        f.write("{not json")
+
+    assert Authentication.verify_token(token)["username"] == "alice"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        [],
+        {"keys": []},
+        {"active": ["k1"], "keys": {"k1": "x"}},
+        {"active": "k1", "keys": {"k1": 1}},
+    ],
+)
+def test_malformed_keys_file_keeps_previous_keys(keys_file, content):
+    """Test that a keys file of the wrong shape is rejected, not crashing."""
+    token = Authentication.generate_token("alice", ["user"])
+    with open(keys_file, "w", encoding="utf-8") as f:
+        json.dump(content, f)
+
+    assert Authentication.verify_token(token)["username"] == "alice"
@@ -0,0 +1,121 @@
+"""Test the refresh token flow."""
+
+import multiprocessing
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.db import DBDriverFactory
+from api.security import Authentication, RefreshTokens
+from api import api
+
+app = api.app
+client = TestClient(app)
+
+
+@pytest.fixture(name="refresh_tokens")
+def fixture_refresh_tokens(tmp_path):
+    """Swap the Authentication stores for temporary ones."""
+    users = DBDriverFactory.get_driver("local", str(tmp_path / "users.db.json"))
+    users.create("alice", {"password": "hash", "roles": ["user"]})
+    store = DBDriverFactory.get_driver(
+        "sqlite", str(tmp_path / "refresh.db"), indexes=["family", "username"]
+    )
+    refresh_tokens = RefreshTokens(store, lifetime=60)
+    with patch.object(Authentication, "db", users), patch.object(
+        Authentication, "refresh_tokens", refresh_tokens
+    ):
+        yield refresh_tokens
+    store.close()
+
+
+def test_rotate(refresh_tokens):
+    """Test that a refresh token is replaced by a new one of the same family."""
+    token = refresh_tokens.issue("alice")
+    username, new_token = refresh_tokens.rotate(token)
+
+    assert username == "alice"
+    assert new_token != token
+    assert refresh_tokens.rotate(new_token)[0] == "alice"
+
+
+def test_reuse_revokes_family(refresh_tokens):
+    """Test that presenting a used token revokes every token of its family."""
+    token = refresh_tokens.issue("alice")
+    other = refresh_tokens.issue("alice")
+    _, new_token = refresh_tokens.rotate(token)
+
+    with pytest.raises(KeyError):
+        refresh_tokens.rotate(token)
+    with pytest.raises(KeyError):
+        refresh_tokens.rotate(new_token)
+    assert refresh_tokens.rotate(other)[0] == "alice"
+
+
+def _rotate(log_path: str, token: str, results) -> None:
+    """Rotates a refresh token from another process."""
+    store = DBDriverFactory.get_driver("log", log_path, indexes=["family", "username"])
+    try:
+        RefreshTokens(store, lifetime=60).rotate(token)
+        results.put("rotated")
+    except KeyError:
+        results.put("rejected")
+    store.close()
+
+
+def test_concurrent_rotations(tmp_path):
+    """Test that two workers presenting the same token can not both rotate it."""
+    log_path = str(tmp_path / "refresh.db.log")
+    store = DBDriverFactory.get_driver("log", log_path, indexes=["family", "username"])
+    token = RefreshTokens(store, lifetime=60).issue("alice")
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_rotate, args=(log_path, token, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    outcomes = sorted(results.get(timeout=5) for _ in workers)
+    assert outcomes == ["rejected", "rejected", "rejected", "rotated"]
+    store.close()
+
+
+def test_expired_token(refresh_tokens):
+    """Test that expired tokens are rejected and pruned."""
+    refresh_tokens.lifetime = -1
+    token = refresh_tokens.issue("alice")
+    assert refresh_tokens.prune() == 1
+    with pytest.raises(KeyError):
+        refresh_tokens.rotate(token)
+
+
+def test_refresh_endpoint(refresh_tokens):
+    """Test exchanging a refresh token without verifying the password again."""
+    token = refresh_tokens.issue("alice")
+    with patch.object(Authentication, "verify_hash") as verify_hash:
+        response = client.post("/auth/refresh", json={"refresh_token": token})
+        verify_hash.assert_not_called()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert Authentication.verify_token(body["token"])["roles"] == ["user"]
+
+    response = client.post(
+        "/auth/refresh", json={"refresh_token": body["refresh_token"]}
+    )
+    assert response.status_code == 200
+
+
+def test_refresh_endpoint_invalid_token(
+    refresh_tokens,
+):  # pylint: disable=unused-argument
+    """Test that an unknown refresh token is rejected."""
+    response = client.post("/auth/refresh", json={"refresh_token": "unknown"})
+    assert response.status_code == 401
+    assert response.json()["data"] == "Refresh token is invalid"
@@ -0,0 +1,102 @@
+"""Test the token revocation list."""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.core import ApiHttpException
+from api.db import DBDriverFactory
+from api.security import Authentication, BloomFilter, RevocationList
+from api import api
+
+app = api.app
+client = TestClient(app)
+
+
+@pytest.fixture(name="revocations")
+def fixture_revocations(tmp_path):
+    """Swap the Authentication revocation list for a temporary one."""
+    store = DBDriverFactory.get_driver("local", str(tmp_path / "revoked.db.json"))
+    revocations = RevocationList(store, capacity=100)
+    with patch.object(Authentication, "revocations", revocations):
+        yield revocations
+
+
+def test_bloom_filter():
+    """Test that added items are always found."""
+    bloom = BloomFilter(capacity=1000)
+    for i in range(1000):
+        bloom.add(f"item-{i}")
+
+    assert all(f"item-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_revoke_token(revocations):
+    """Test that only the revoked token is rejected."""
+    revocations.revoke_token("abc", time.time() + 60)
+
+    assert revocations.is_revoked({"jti": "abc", "username": "alice"})
+    assert not revocations.is_revoked({"jti": "def", "username": "alice"})
+
+
+def test_revoke_user(revocations):
+    """Test that tokens issued before the user revocation are rejected."""
+    issued = int(time.time()) - 1
+    revocations.revoke_user("alice", lifetime=60)
+
+    assert revocations.is_revoked({"username": "alice", "iat": issued})
+    assert not revocations.is_revoked({"username": "alice", "iat": issued + 3600})
+    # Up to the end of the second of the revocation
+    assert revocations.is_revoked({"username": "alice", "iat": issued + 1})
+    assert not revocations.is_revoked({"username": "bob", "iat": issued})
+
+
+def test_refresh_prunes_expired_entries(revocations):
+    """Test that expired entries are removed from the store."""
+    revocations.revoke_token("old", time.time() - 1)
+    revocations.revoke_token("new", time.time() + 60)
+    revocations.refresh()
+
+    assert list(revocations.store.list_all()) == ["jti:new"]
+    assert not revocations.is_revoked({"jti": "old"})
+
+
+def test_refresh_sees_other_workers(revocations):
+    """Test that entries written by another worker are picked up."""
+    revocations.store.create("jti:remote", {"exp": time.time() + 60})
+    assert not revocations.is_revoked({"jti": "remote"})
+
+    revocations.refresh()
+    assert revocations.is_revoked({"jti": "remote"})
+
+
+def test_logout_revokes_token(revocations):  # pylint: disable=unused-argument
+    """Test that a token stops working after logout."""
+    token = Authentication.generate_token("alice", ["user"])
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/apis/v1/secure", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+
+    response = client.get("/apis/v1/secure", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["data"] == "Token has been revoked"
+
+
+def test_async_check_reads_the_store_on_the_executor(revocations):
+    """Test that the async check only goes to the executor on a filter match."""
+    revocations.revoke_token("abc", time.time() + 60)
+    run = AsyncMock(side_effect=lambda func, *args: func(*args))
+    with patch.object(Authentication.adb, "run", run):
+        asyncio.run(Authentication.check_revocation_async({"jti": "def"}))
+        run.assert_not_awaited()
+
+        with pytest.raises(ApiHttpException) as exc:
+            asyncio.run(Authentication.check_revocation_async({"jti": "abc"}))
+    assert exc.value.status_code == 401
+    run.assert_awaited_once_with(revocations.confirm, {"jti": "abc"})
@@ -0,0 +1,53 @@
+"""Test the verified token cache."""
+
+import time
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api.security import Authentication, TokenCache
+from api import api
+
+app = api.app
+client = TestClient(app)
+
+
+def test_token_cache_hit_and_expiry():
+    """Test that payloads are served until the token expires."""
+    cache = TokenCache(max_size=10)
+    cache.put("valid", {"username": "alice", "exp": time.time() + 60})
+    cache.put("expired", {"username": "bob", "exp": time.time() - 1})
+
+    assert cache.get("valid")["username"] == "alice"
+    assert cache.get("expired") is None
+    assert cache.get("unknown") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_token_cache_lru_eviction():
+    """Test that the least recently used token is evicted first."""
+    cache = TokenCache(max_size=2)
+    exp = time.time() + 60
+    cache.put("a", {"exp": exp})
+    cache.put("b", {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_secure_route_verifies_token_once():
+    """Test that repeated requests with the same token skip jwt.decode."""
+    token = Authentication.generate_token("alice", ["user"])
+    headers = {"Authorization": f"Bearer {token}"}
+    # pylint: disable-next=protected-access
+    decode = Authentication._decode_token
+    with patch.object(Authentication, "_decode_token", wraps=decode) as verify:
+        for _ in range(3):
+            response = client.get("/apis/v1/secure", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["data"]["username"] == "alice"
+        verify.assert_called_once_with(token)
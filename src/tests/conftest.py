@@ -0,0 +1,54 @@
+"""Fixtures shared by the tests."""
+
+import atexit
+import os
+import shutil
+import tempfile
+from typing import Callable
+from unittest.mock import patch
+
+import pytest
+
+# The stores opened when the api is imported, and the routes manifest, go to a
+# temporary directory, not the working tree (set before the first import of
+# the api)
+_STORES = tempfile.mkdtemp(prefix="api-tests-")
+atexit.register(shutil.rmtree, _STORES, ignore_errors=True)
+os.environ.setdefault("DB_FILENAME", os.path.join(_STORES, "users.db.json"))
+os.environ.setdefault("DB_REVOKED_FILENAME", os.path.join(_STORES, "revoked.db"))
+os.environ.setdefault("DB_REFRESH_FILENAME", os.path.join(_STORES, "refresh.db"))
+os.environ.setdefault(
+    "API_ROUTES_MANIFEST", os.path.join(_STORES, "routes-manifest.json")
+)
+
+# pylint: disable=wrong-import-position
+from api.db import DBDriverFactory
+from api.security import Authentication
+
+
+@pytest.fixture(name="auth_header")
+def fixture_auth_header() -> Callable[[list], dict]:
+    """Builds the Authorization header of a user holding the given roles."""
+
+    def auth_header(roles: list) -> dict:
+        token = Authentication.generate_token("admin", roles)
+        return {"Authorization": f"Bearer {token}"}
+
+    return auth_header
+
+
+@pytest.fixture(name="async_db_driver")
+def fixture_async_db_driver() -> str:
+    """Driver of the temporary Authentication store, override to change it."""
+    return "local"
+
+
+@pytest.fixture(name="async_db")
+def fixture_async_db(tmp_path, async_db_driver):
+    """Swap the Authentication store for a temporary one."""
+    store = DBDriverFactory.get_async_driver(
+        async_db_driver, str(tmp_path / f"users.db.{async_db_driver}")
+    )
+    with patch.object(Authentication, "adb", store):
+        yield store
+    store.close()
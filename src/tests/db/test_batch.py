@@ -0,0 +1,120 @@
+"""Test the batch operations of every DB driver."""
+
+import pytest
+
+from api.db import DBDriverFactory
+
+
+@pytest.fixture(name="store", params=["local", "log", "sqlite"])
+def fixture_store(request, tmp_path):
+    """Temporary store for each driver."""
+    store = DBDriverFactory.get_driver(request.param, str(tmp_path / "users.db"))
+    yield store
+    if hasattr(store, "close"):
+        store.close()
+
+
+def test_put_many_and_get_many(store):
+    """Test that put_many upserts and get_many skips missing keys."""
+    store.create("alice", {"roles": ["user"]})
+    store.put_many(
+        {f"user-{i}": {"roles": ["user"]} for i in range(10)}
+        | {"alice": {"roles": ["admin"]}}
+    )
+
+    records = store.get_many(["alice", "user-3", "missing"])
+    assert records == {"alice": {"roles": ["admin"]}, "user-3": {"roles": ["user"]}}
+    assert len(store.list_all()) == 11
+
+
+def test_create_many(store):
+    """Test that create_many leaves existing records alone and reports them."""
+    store.create("alice", {"roles": ["user"]})
+
+    existing = store.create_many(
+        {"alice": {"roles": ["admin"]}, "bob": {"roles": ["user"]}}
+    )
+    assert existing == ["alice"]
+    assert store.list_all() == {
+        "alice": {"roles": ["user"]},
+        "bob": {"roles": ["user"]},
+    }
+    assert not store.create_many({})
+
+
+def test_delete_many(store):
+    """Test that delete_many removes existing keys and counts them."""
+    store.put_many({f"user-{i}": {"roles": ["user"]} for i in range(5)})
+
+    assert store.delete_many(["user-0", "user-1", "missing"]) == 2
+    assert sorted(store.list_all()) == ["user-2", "user-3", "user-4"]
+
+
+def test_update_if(store):
+    """Test that update_if only replaces records holding the expected values."""
+    store.create("token", {"used": False, "family": "a"})
+
+    assert store.update_if("token", {"used": False}, {"used": True, "family": "a"})
+    assert not store.update_if("token", {"used": False}, {"used": True, "family": "b"})
+    assert store.read("token") == {"used": True, "family": "a"}
+    with pytest.raises(KeyError):
+        store.update_if("missing", {"used": False}, {"used": True})
+
+
+def test_scan(store):
+    """Test that scan pages through records in key order."""
+    store.put_many(
+        {f"user-{i}": {"password": "hash", "roles": ["user"]} for i in range(7)}
+    )
+
+    page = list(store.scan(limit=3, exclude=("password",)))
+    assert page == [(f"user-{i}", {"roles": ["user"]}) for i in range(3)]
+
+    page = list(store.scan(after=page[-1][0], limit=3))
+    assert [key for key, _ in page] == ["user-3", "user-4", "user-5"]
+    assert page[0][1]["password"] == "hash"
+
+    assert [key for key, _ in store.scan(after="user-5")] == ["user-6"]
+
+
+def test_scan_rejects_negative_limit(store):
+    """Test that a negative limit is an error instead of counting from the end."""
+    store.put_many({f"user-{i}": {"roles": ["user"]} for i in range(3)})
+    assert not list(store.scan(limit=0))
+    with pytest.raises(ValueError):
+        list(store.scan(limit=-1))
+
+
+@pytest.mark.parametrize(
+    "driver, options",
+    [
+        ("local", {"cache": True}),
+        ("local", {}),
+        ("log", {}),
+        ("sqlite", {}),
+    ],
+)
+def test_find_by_roles_index(tmp_path, driver, options):
+    """Test that the roles index follows creates, updates and deletes."""
+    filename = str(tmp_path / "users.db")
+    store = DBDriverFactory.get_driver(driver, filename, indexes=["roles"], **options)
+    store.create("alice", {"roles": ["admin", "user"]})
+    store.create("bob", {"roles": ["user"]})
+    store.put_many({"carol": {"roles": ["admin"]}, "dave": {"roles": ["user"]}})
+
+    assert sorted(store.find_by("roles", "admin")) == ["alice", "carol"]
+
+    store.update("alice", {"roles": ["user"]})
+    store.delete("carol")
+    store.delete_many(["dave"])
+    assert store.find_by("roles", "admin") == {}
+    assert sorted(store.find_by("roles", "user")) == ["alice", "bob"]
+    if hasattr(store, "close"):
+        store.close()
+
+    # The index is rebuilt (or backfilled) when the store is reopened
+    store = DBDriverFactory.get_driver(driver, filename, indexes=["roles"], **options)
+    store.update("bob", {"roles": ["admin"]})
+    assert store.find_by("roles", "admin") == {"bob": {"roles": ["admin"]}}
+    if hasattr(store, "close"):
+        store.close()
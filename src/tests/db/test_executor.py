@@ -0,0 +1,41 @@
+"""Test the ExecutorStore async driver."""
+
+import asyncio
+
+import pytest
+
+from api.db import DBDriverFactory
+
+
+def test_executor_store_crud(tmp_path):
+    """Test the async CRUD operations."""
+    store = DBDriverFactory.get_async_driver(
+        "local", str(tmp_path / "users.db.json"), max_workers=2
+    )
+
+    async def scenario():
+        await store.create("alice", {"roles": ["user"]})
+        await store.update("alice", {"roles": ["admin"]})
+        assert await store.read("alice") == {"roles": ["admin"]}
+        assert await store.list_all() == {"alice": {"roles": ["admin"]}}
+        await store.delete("alice")
+        with pytest.raises(KeyError):
+            await store.read("alice")
+
+    asyncio.run(scenario())
+    store.close()
+
+
+def test_executor_store_concurrent_reads(tmp_path):
+    """Test that many concurrent reads are served through the executor."""
+    store = DBDriverFactory.get_async_driver(
+        "sqlite", str(tmp_path / "users.db.sqlite3"), max_workers=2
+    )
+
+    async def scenario():
+        await store.create("alice", {"roles": ["user"]})
+        results = await asyncio.gather(*(store.read("alice") for _ in range(20)))
+        assert all(result == {"roles": ["user"]} for result in results)
+
+    asyncio.run(scenario())
+    store.close()
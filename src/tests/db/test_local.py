@@ -0,0 +1,133 @@
+"""Test the LocalStore driver."""
+
+import fcntl
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from api.db import DBDriverFactory
+from api.db.lock import FileLock
+
+
+@pytest.fixture(name="store_path")
+def fixture_store_path(tmp_path):
+    """Path to a temporary JSON store."""
+    return str(tmp_path / "users.db.json")
+
+
+def test_local_store_crud(store_path):
+    """Test the basic CRUD operations."""
+    store = DBDriverFactory.get_driver("local", store_path)
+    store.create("alice", {"password": "hash", "roles": ["user"]})
+
+    assert store.read("alice") == {"password": "hash", "roles": ["user"]}
+
+    store.update("alice", {"password": "hash", "roles": ["admin"]})
+    assert store.list_all() == {"alice": {"password": "hash", "roles": ["admin"]}}
+
+    store.delete("alice")
+    with pytest.raises(KeyError):
+        store.read("alice")
+
+
+def test_local_store_cache_hits(store_path):
+    """Test that cached reads are served from memory."""
+    store = DBDriverFactory.get_driver("local", store_path, cache=True)
+    store.create("alice", {"password": "hash", "roles": ["user"]})
+
+    for _ in range(3):
+        assert store.read("alice")["roles"] == ["user"]
+
+    stats = store.cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 3
+
+
+def test_local_store_cache_returns_copies(store_path):
+    """Test that mutating a returned record does not alter the cache."""
+    store = DBDriverFactory.get_driver("local", store_path, cache=True)
+    store.create("alice", {"password": "hash", "roles": ["user"]})
+
+    store.read("alice")["roles"].append("admin")
+    assert store.read("alice")["roles"] == ["user"]
+
+
+def test_local_store_cache_sees_external_writes(store_path):
+    """Test that changes made by another writer invalidate the cache."""
+    store = DBDriverFactory.get_driver("local", store_path, cache=True)
+    store.create("alice", {"password": "hash", "roles": ["user"]})
+    store.read("alice")
+
+    with open(store_path, "w", encoding="utf-8") as f:
+        json.dump({"bob": {"password": "other", "roles": ["admin", "user"]}}, f)
+
+    assert store.read("bob")["roles"] == ["admin", "user"]
+    with pytest.raises(KeyError):
+        store.read("alice")
+
+
+def test_local_store_replaces_the_file(store_path):
+    """Test that saving renames a new file over the store, never truncating it."""
+    store = DBDriverFactory.get_driver("local", store_path)
+    inode = os.stat(store_path).st_ino
+    store.create("alice", {"roles": ["user"]})
+    assert os.stat(store_path).st_ino != inode
+    assert sorted(os.listdir(os.path.dirname(store_path))) == [
+        "users.db.json",
+        "users.db.json.lock",
+    ]
+
+
+def test_file_lock_readers_share(tmp_path):
+    """Test that readers hold the lock together and a writer waits for them."""
+    lock = FileLock(str(tmp_path / "store.lock"))
+    events = []
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.hold(shared=True):
+            both_reading.wait()  # Times out unless the holds overlap
+            time.sleep(0.05)
+            events.append("read")
+
+    def writer():
+        with lock.hold():
+            events.append("write")
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=writer))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+    lock.close()
+    assert events == ["read", "read", "write"]
+
+
+def _try_lock(lock: FileLock) -> None:
+    """Exits with 1 if the inherited lock can be taken while the parent holds it."""
+    try:
+        # pylint: disable-next=protected-access
+        fcntl.flock(lock._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os._exit(0)
+    os._exit(1)
+
+
+def test_file_lock_excludes_forked_processes(tmp_path):
+    """Test that a lock opened before a fork still excludes the child."""
+    lock = FileLock(str(tmp_path / "store.lock"))
+    with lock.hold():
+        child = multiprocessing.get_context("fork").Process(
+            target=_try_lock, args=(lock,)
+        )
+        child.start()
+        child.join()
+    assert child.exitcode == 0
+    lock.close()
@@ -0,0 +1,159 @@
+"""Test the LogStore driver."""
+
+import multiprocessing
+
+import pytest
+
+from api.db import DBDriverFactory
+
+
+@pytest.fixture(name="log_path")
+def fixture_log_path(tmp_path):
+    """Path to a temporary log file."""
+    return str(tmp_path / "users.db.log")
+
+
+def test_log_store_crud(log_path):
+    """Test the basic CRUD operations."""
+    store = DBDriverFactory.get_driver("log", log_path)
+    store.create("alice", {"password": "hash", "roles": ["user"]})
+    with pytest.raises(KeyError):
+        store.create("alice", {"password": "hash", "roles": ["user"]})
+
+    store.update("alice", {"password": "hash", "roles": ["admin"]})
+    assert store.read("alice") == {"password": "hash", "roles": ["admin"]}
+
+    store.delete("alice")
+    with pytest.raises(KeyError):
+        store.read("alice")
+    assert store.list_all() == {}
+    store.close()
+
+
+def test_log_store_replay(log_path):
+    """Test that the index is rebuilt when the log is reopened."""
+    store = DBDriverFactory.get_driver("log", log_path)
+    store.create("alice", {"roles": ["user"]})
+    store.create("bob", {"roles": ["user"]})
+    store.update("bob", {"roles": ["admin"]})
+    store.delete("alice")
+    store.close()
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    assert store.list_all() == {"bob": {"roles": ["admin"]}}
+    assert store.dead_records == 3
+    store.close()
+
+
+def test_log_store_torn_record(log_path):
+    """Test that a partially written record is discarded on open."""
+    store = DBDriverFactory.get_driver("log", log_path)
+    store.create("alice", {"roles": ["user"]})
+    store.close()
+
+    with open(log_path, "ab") as f:
+        f.write(b'{"op":"put","key":"bob","da')
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    assert store.list_all() == {"alice": {"roles": ["user"]}}
+    store.create("bob", {"roles": ["user"]})
+    store.close()
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    assert sorted(store.list_all()) == ["alice", "bob"]
+    store.close()
+
+
+def test_log_store_compaction(log_path):
+    """Test that dead records are dropped by the compaction."""
+    store = DBDriverFactory.get_driver("log", log_path, compact_threshold=10)
+    store.create("alice", {"version": 0})
+    for version in range(1, 50):
+        store.update("alice", {"version": version})
+    store.close()
+
+    assert store.dead_records < 10
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    assert store.read("alice") == {"version": 49}
+    store.close()
+
+
+def test_log_store_shared_between_stores(log_path):
+    """Test that stores opened by several workers see each other's changes."""
+    first = DBDriverFactory.get_driver("log", log_path)
+    second = DBDriverFactory.get_driver("log", log_path)
+    first.create("alice", {"version": 0})
+    assert second.read("alice") == {"version": 0}
+    with pytest.raises(KeyError):
+        second.create("alice", {"version": 1})
+
+    second.update("alice", {"version": 1})
+    second.create("bob", {"version": 0})
+    second.compact()
+    assert first.read("alice") == {"version": 1}
+    first.delete("bob")
+    assert second.list_all() == {"alice": {"version": 1}}
+    first.close()
+    second.close()
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    assert store.list_all() == {"alice": {"version": 1}}
+    assert store.dead_records == 2  # bob and its deletion
+    store.close()
+
+
+def _create_users(log_path: str, prefix: str) -> None:
+    """Creates users, compacting often, from another process."""
+    store = DBDriverFactory.get_driver("log", log_path, compact_threshold=5)
+    for i in range(100):
+        store.create(f"{prefix}{i}", {"version": 0})
+        store.update(f"{prefix}{i}", {"version": 1})
+    store.close()
+
+
+def test_log_store_concurrent_processes(log_path):
+    """Test that appends and compactions of several processes are all kept."""
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_create_users, args=(log_path, prefix))
+        for prefix in ("a", "b", "c")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    store = DBDriverFactory.get_driver("log", log_path)
+    records = store.list_all()
+    assert len(records) == 300
+    assert all(record == {"version": 1} for record in records.values())
+    store.close()
+
+
+def _create_users_inherited(store, prefix: str) -> None:
+    """Creates users, compacting often, through a store opened by the parent."""
+    for i in range(100):
+        store.create(f"{prefix}{i}", {"version": 0})
+        store.update(f"{prefix}{i}", {"version": 1})
+
+
+def test_log_store_inherited_by_forked_processes(log_path):
+    """Test that forked workers sharing a store opened before the fork keep every write."""
+    store = DBDriverFactory.get_driver("log", log_path, compact_threshold=5)
+    context = multiprocessing.get_context("fork")
+    workers = [
+        context.Process(target=_create_users_inherited, args=(store, prefix))
+        for prefix in ("a", "b", "c")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    records = store.list_all()
+    assert len(records) == 300
+    assert all(record == {"version": 1} for record in records.values())
+    store.close()
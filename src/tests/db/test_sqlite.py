@@ -0,0 +1,102 @@
+"""Test the SQLiteStore driver."""
+
+import threading
+
+import pytest
+
+from api.db import DBDriverFactory
+
+
+@pytest.fixture(name="store")
+def fixture_store(tmp_path):
+    """Temporary SQLite store."""
+    store = DBDriverFactory.get_driver("sqlite", str(tmp_path / "users.db.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_sqlite_store_crud(store):
+    """Test the basic CRUD operations."""
+    store.create("alice", {"roles": ["user"]})
+    with pytest.raises(KeyError):
+        store.create("alice", {"roles": ["admin"]})
+
+    store.update("alice", {"roles": ["user", "admin"]})
+    assert store.read("alice") == {"roles": ["user", "admin"]}
+    assert store.list_all() == {"alice": {"roles": ["user", "admin"]}}
+
+    store.delete("alice")
+    with pytest.raises(KeyError):
+        store.read("alice")
+    with pytest.raises(KeyError):
+        store.update("alice", {})
+    with pytest.raises(KeyError):
+        store.delete("alice")
+
+
+def test_sqlite_store_delete_many_counts_records(tmp_path):
+    """Test that the index rows deleted by the triggers are not counted."""
+    store = DBDriverFactory.get_driver(
+        "sqlite", str(tmp_path / "users.db.sqlite3"), indexes=["roles"]
+    )
+    store.put_many({f"user-{i}": {"roles": ["user", "admin"]} for i in range(3)})
+    assert store.delete_many(["user-0", "user-1", "missing"]) == 2
+    store.close()
+
+
+def test_sqlite_store_concurrent_setup(tmp_path):
+    """Test that stores opened together on a new database all start."""
+    filename = str(tmp_path / "users.db.sqlite3")
+    errors = []
+
+    def open_store():
+        try:
+            DBDriverFactory.get_driver(
+                "sqlite", filename, indexes=["roles", "team"]
+            ).close()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            errors.append(err)
+
+    threads = [threading.Thread(target=open_store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_sqlite_store_wal_mode(store):
+    """Test that the database runs in WAL mode."""
+    mode = store._connection().execute(  # pylint: disable=protected-access
+        "PRAGMA journal_mode"
+    )
+    assert mode.fetchone()[0] == "wal"
+
+
+def test_sqlite_store_concurrent_creates(store):
+    """Test that concurrent writers do not lose each other's records."""
+
+    def register(worker: int):
+        for i in range(25):
+            store.create(f"user-{worker}-{i}", {"roles": ["user"]})
+
+    threads = [threading.Thread(target=register, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store.list_all()) == 100
+
+
+def test_sqlite_store_releases_connections_of_exited_threads(store):
+    """Test that the connections of exited threads do not pile up."""
+    threads = []
+    for _ in range(5):
+        threads.append(threading.Thread(target=store.list_all))
+        threads[-1].start()
+        threads[-1].join()
+
+    # Each new connection closes those of the threads that exited before it
+    connections = store._connections  # pylint: disable=protected-access
+    assert set(connections) == {threading.current_thread(), threads[-1]}
@@ -0,0 +1,25 @@
+"""Test the benchmark runner."""
+
+from bench import Runner, compare
+
+
+def test_runner_batches():
+    """Test that batched samples are reported per call."""
+    calls = []
+    runner = Runner(min_time=0, min_iterations=4)
+    result = runner.run("noop", lambda: calls.append(1), batch=10)
+    assert len(calls) == result["iterations"] == 40
+    assert result["p50_us"] <= result["p99_us"]
+    assert runner.results == {"noop": result}
+    assert Runner(name_filter="other").run("noop", lambda: None) is None
+
+
+def test_compare_flags_regressions():
+    """Test that only slowdowns above the threshold are flagged."""
+    baseline = {"a": {"ops_per_sec": 100}, "b": {"ops_per_sec": 100}}
+    results = {
+        "a": {"ops_per_sec": 80},
+        "b": {"ops_per_sec": 60},
+        "new": {"ops_per_sec": 1},
+    }
+    assert compare(results, baseline, 0.25) == ["b"]
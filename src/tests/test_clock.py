@@ -0,0 +1,74 @@
+"""Test the cached clock and the response timestamps."""
+
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api.core import ApiJSONResponse, ApiResource, ApiResponse
+from api.core.clock import CachedClock
+from api import api
+
+
+def test_cached_clock_format():
+    """Test that the clock formats like strftime, reusing the second prefix."""
+    clock = CachedClock()
+    with patch("api.core.clock.time.time", return_value=1700000000.25):
+        first = clock.now()
+    with patch("api.core.clock.time.time", return_value=1700000000.5):
+        second = clock.now()
+    expected = datetime.fromtimestamp(1700000000).strftime("%Y-%m-%dT%H:%M:%S.")
+    assert first == f"{expected}250000"
+    assert second == f"{expected}500000"
+
+
+def test_response_timestamp_is_per_response():
+    """Test that each response is stamped when serialized."""
+    response = ApiResponse(status_code=200, data=None)
+    with patch("api.core.clock.time.time", return_value=1700000000.0):
+        first = response.model_dump()["metatata"]
+    with patch("api.core.clock.time.time", return_value=1700000001.0):
+        second = response.model_dump()["metatata"]
+    assert first["timestamp"] != second["timestamp"]
+
+
+def test_excluded_metadata_skips_the_clock():
+    """Test that the clock is not read for responses without metadata."""
+    response = ApiResponse(status_code=200, data="ok")
+    with patch("api.core.__main__.clock") as clock:
+        body = ApiJSONResponse(content=response, exclude={"metatata"}).body
+    clock.now.assert_not_called()
+    assert json.loads(body) == {"data": "ok", "status_code": 200}
+
+
+def test_resource_metadata_is_opt_in():
+    """Test that resources leave the metadata out unless they opt in."""
+
+    class Resource(ApiResource):  # pylint: disable=too-few-public-methods
+        """Test resource."""
+
+        def get(self):
+            """Handler."""
+            return ApiResponse(status_code=200, data="ok")
+
+    class WithMetadata(Resource):  # pylint: disable=too-few-public-methods
+        """Test resource inheriting its handler."""
+
+        metadata = True
+
+    class WithoutMetadata(WithMetadata):  # pylint: disable=too-few-public-methods
+        """Test resource opting out again."""
+
+        metadata = False
+
+    assert json.loads(Resource().get().body) == {"data": "ok", "status_code": 200}
+    assert "timestamp" in json.loads(WithMetadata().get().body)["metatata"]
+    assert "metatata" not in json.loads(WithoutMetadata().get().body)
+
+
+def test_error_responses_follow_the_metadata_setting():
+    """Test that the exception handlers leave the metadata out by default."""
+    response = TestClient(api.app).get("/apis/v1/missing")
+    assert response.status_code == 404
+    assert "metatata" not in response.json()
@@ -0,0 +1,56 @@
+"""Test the production launcher."""
+
+# pylint: disable=protected-access
+
+import socket
+from unittest.mock import patch
+
+import pytest
+
+from api.db import DBDriverFactory
+from api.db.sqlite import _after_fork_in_child
+from api.launcher import Launcher
+
+
+def test_select_fast_implementations():
+    """Test choosing uvloop/httptools only when they are installed."""
+    with patch("api.launcher.importlib.util.find_spec", return_value=None):
+        assert Launcher._select("auto", "uvloop", "asyncio") == "asyncio"
+        assert Launcher._select("uvloop", "uvloop", "asyncio") == "asyncio"
+    with patch("api.launcher.importlib.util.find_spec", return_value=object()):
+        assert Launcher._select("auto", "httptools", "h11") == "httptools"
+    assert Launcher._select("h11", "httptools", "h11") == "h11"
+
+
+def test_config_max_requests_jitter():
+    """Test that workers get a jittered request budget."""
+    with patch.object(Launcher, "MAX_REQUESTS", 1000), patch.object(
+        Launcher, "MAX_REQUESTS_JITTER", 50
+    ):
+        config = Launcher.config()
+    assert 1000 <= config["limit_max_requests"] <= 1050
+    assert config["server_header"] is False
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="no SO_REUSEPORT")
+def test_bind_reuse_port():
+    """Test that two workers can bind the same port with SO_REUSEPORT."""
+    with patch.object(Launcher, "HOST", "127.0.0.1"), patch.object(Launcher, "PORT", 0):
+        first = Launcher.bind(reuse_port=True)
+        with patch.object(Launcher, "PORT", first.getsockname()[1]):
+            second = Launcher.bind(reuse_port=True)
+    assert first.getsockname() == second.getsockname()
+    first.close()
+    second.close()
+
+
+def test_sqlite_connections_dropped_after_fork(tmp_path):
+    """Test that a forked worker opens its own SQLite connections."""
+    store = DBDriverFactory.get_driver("sqlite", str(tmp_path / "users.db"))
+    store.create("alice", {"roles": ["user"]})
+    inherited = store._connection()
+    _after_fork_in_child()
+    assert store._connection() is not inherited
+    assert store.read("alice") == {"roles": ["user"]}
+    store.close()
+    inherited.close()
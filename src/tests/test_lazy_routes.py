@@ -0,0 +1,89 @@
+"""Test the lazy route loading."""
+
+import asyncio
+import logging
+import threading
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi_utils import Api as FastRestApi
+
+from api import api
+from api.core import Api
+from api.core.lazy import LazyEndpoint, LazyRoute
+
+ROUTES = [
+    {
+        "path": "/apis/v1/helloworld",
+        "module": "v1.helloworld",
+        "class": "V1HelloWorld",
+        "publish": True,
+    },
+    {
+        "path": "/apis/v1/secure",
+        "module": "v1.secure",
+        "class": "V1Secure",
+        "publish": True,
+    },
+]
+
+
+@pytest.fixture(name="app")
+def fixture_app():
+    """Swap the Api app for an empty one."""
+    app = FastAPI()
+    app.logger = logging.getLogger("api")
+    with patch.object(Api, "app", app), patch.object(
+        Api, "api", FastRestApi(app)
+    ), patch.object(Api, "_lazy_routes", {}):
+        yield app
+
+
+def lazy_paths(app):
+    """Return the paths still served by placeholders."""
+    return [route.path for route in app.router.routes if isinstance(route, LazyRoute)]
+
+
+def test_route_loaded_on_first_request(app):
+    """Test that a placeholder publishes its resource on the first request."""
+    api._add_lazy_routes(ROUTES)  # pylint: disable=protected-access
+    assert lazy_paths(app) == ["/apis/v1/helloworld", "/apis/v1/secure"]
+
+    response = TestClient(app).get("/apis/v1/helloworld")
+    assert response.status_code == 200
+    assert response.json()["data"] == "Hello, World!"
+    assert lazy_paths(app) == ["/apis/v1/secure"]
+
+
+def test_warmup(app):
+    """Test that warmup loads the listed routes only."""
+    api._add_lazy_routes(ROUTES)  # pylint: disable=protected-access
+    api.warmup(["/apis/v1/secure"])
+    assert lazy_paths(app) == ["/apis/v1/helloworld"]
+    assert "/apis/v1/secure" in [route.path for route in app.routes]
+
+
+def test_load_off_the_event_loop():
+    """Test that concurrent first requests wait for one load in the threadpool."""
+    threads, running = [], []
+
+    def load():
+        threads.append(threading.get_ident())
+        running.append(None)
+        time.sleep(0.05)
+        assert len(running) == 1  # Never two loads at once
+        running.pop()
+
+    router = AsyncMock()
+    endpoint = LazyEndpoint(load, router)
+
+    async def first_requests():
+        await asyncio.gather(*(endpoint({}, None, None) for _ in range(3)))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(first_requests())
+    assert len(threads) == 3 and loop_thread not in threads
+    assert router.await_count == 3
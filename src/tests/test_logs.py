@@ -0,0 +1,116 @@
+"""Test the queued logging pipeline and the access log."""
+
+import io
+import json
+import logging
+import queue
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.core import AccessLogMiddleware, JsonFormatter, LogPipeline
+from api.core.logs import DroppingQueueHandler, parse_sample_rates
+
+
+class ListHandler(logging.Handler):
+    """Keeps the records it handles."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    """Returns a logger writing only to `handler`."""
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def test_pipeline_writes_in_background():
+    """Test that records go through the writer thread, drained on stop."""
+    pipeline = LogPipeline(size=100)
+    output = io.StringIO()
+    pipeline.output.setStream(output)
+    pipeline.start()
+    logger = make_logger("tests.pipeline", pipeline.handler)
+    logger.info("hello %s", "world")
+    pipeline.stop()
+    assert output.getvalue().endswith(" - INFO - tests.pipeline - hello world\n")
+
+
+def test_full_queue_drops_records():
+    """Test that records are dropped and counted instead of blocking."""
+    handler = DroppingQueueHandler(queue.Queue(2))
+    logger = make_logger("tests.dropping", handler)
+    for i in range(5):
+        logger.error("error %d", i)
+    logger.warning("warning")
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == {"ERROR": 3, "WARNING": 1}
+    assert handler.queue.get().msg == "error 0"
+
+
+def test_json_formatter():
+    """Test that extra fields and tracebacks are separate keys."""
+    error = ValueError("boom")
+    try:
+        raise error
+    except ValueError:
+        pass
+    record = logging.makeLogRecord(
+        {
+            "name": "api",
+            "levelname": "ERROR",
+            "msg": "failed: %s",
+            "args": (error,),
+            "exc_info": (ValueError, error, error.__traceback__),
+            "route": "/",
+        }
+    )
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "failed: boom"
+    assert entry["route"] == "/"
+    assert "ValueError: boom" in entry["exc"]
+
+
+def test_parse_sample_rates():
+    """Test the per-route access log rules."""
+    assert parse_sample_rates("*=0.1, /auth/login=1") == {
+        "*": 0.1,
+        "/auth/login": 1.0,
+    }
+    assert not parse_sample_rates("")
+
+
+def test_access_log_sampled_per_route():
+    """Test that routes are logged at their rate, server errors always."""
+    handler = ListHandler()
+    make_logger("api.access", handler)
+    app = FastAPI()
+    app.get("/quiet")(lambda: {})
+    app.get("/loud")(lambda: {})
+
+    @app.get("/broken")
+    def broken():
+        raise RuntimeError("broken")
+
+    client = TestClient(
+        AccessLogMiddleware(app, {"*": 0.0, "/loud": 1.0}),
+        raise_server_exceptions=False,
+    )
+    try:
+        for path in ("/quiet", "/loud", "/broken", "/missing"):
+            client.get(path)
+    finally:
+        logging.getLogger("api.access").handlers = []
+        logging.getLogger("api.access").propagate = True
+    assert [(r.route, r.status) for r in handler.records] == [
+        ("/loud", 200),
+        ("/broken", 500),
+    ]
@@ -0,0 +1,82 @@
+"""Test the route discovery manifest."""
+
+import logging
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi_utils import Api as FastRestApi
+
+from api import api
+from api.core import Api
+from api.core.manifest import RouteManifest
+
+ROUTES = [
+    {"path": "/apis/v1/demo", "module": "v1.demo", "class": "Demo", "publish": True}
+]
+
+
+@pytest.fixture(name="routes_dir")
+def fixture_routes_dir(tmp_path):
+    """Create a routes tree with a single package."""
+    package = tmp_path / "routes" / "v1" / "demo"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("from .__main__ import Demo\n")
+    (package / "__main__.py").write_text("class Demo:\n    pass\n")
+    return tmp_path / "routes"
+
+
+def test_manifest_roundtrip(routes_dir, tmp_path):
+    """Test that a saved manifest is loaded while the tree is unchanged."""
+    manifest = RouteManifest(str(routes_dir), str(tmp_path / "manifest.json"))
+    assert manifest.load() is None
+    manifest.save(ROUTES)
+    assert manifest.load() == ROUTES
+
+
+def test_manifest_invalidated_by_new_route(routes_dir, tmp_path):
+    """Test that adding a route package invalidates the manifest."""
+    manifest = RouteManifest(str(routes_dir), str(tmp_path / "manifest.json"))
+    manifest.save(ROUTES)
+    (routes_dir / "v1" / "other").mkdir()
+    assert manifest.load() is None
+
+
+def test_manifest_invalidated_by_edited_init(routes_dir, tmp_path):
+    """Test that editing an __init__.py invalidates the manifest."""
+    manifest = RouteManifest(str(routes_dir), str(tmp_path / "manifest.json"))
+    manifest.save(ROUTES)
+    init_file = routes_dir / "v1" / "demo" / "__init__.py"
+    stat = os.stat(init_file)
+    os.utime(init_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert manifest.load() is None
+
+
+def test_strict_mode_fails_fast():
+    """Test that strict mode raises on a route that cannot be published."""
+    route = {"path": "/x", "module": "v1.helloworld", "class": "Nope", "publish": True}
+    # A fresh app, so the shared one is left untouched
+    app = FastAPI()
+    app.logger = logging.getLogger("api")
+    fresh = patch.multiple(
+        Api, app=app, api=FastRestApi(app), STRICT_ROUTES=True, LAZY_ROUTES=False
+    )
+    with fresh, patch.object(RouteManifest, "load", return_value=[route]):
+        with pytest.raises(AttributeError):
+            api._load_paths()  # pylint: disable=protected-access
+
+
+def test_default_manifest_outside_the_tree(routes_dir, tmp_path):
+    """Test that the default manifest lives in the temp directory, per routes dir."""
+    with patch("api.core.manifest.tempfile.gettempdir", return_value=str(tmp_path)):
+        first = RouteManifest.default_filename("/srv/a/routes")
+        second = RouteManifest.default_filename("/srv/b/routes")
+    assert os.path.dirname(first) == str(tmp_path / f"api-{os.getuid()}")
+    assert first != second
+
+    # The directory of the user is created on save, private to them
+    manifest = RouteManifest(str(routes_dir), first)
+    manifest.save(ROUTES)
+    assert manifest.load() == ROUTES
+    assert os.stat(os.path.dirname(first)).st_mode & 0o777 == 0o700
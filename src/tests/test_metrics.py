@@ -0,0 +1,115 @@
+"""Test the metrics registry and endpoint."""
+
+import json
+import os
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from api import api
+from api.core import Metrics
+
+client = TestClient(api.app)
+
+
+def test_counters_summed_over_threads():
+    """Test that the per-thread shards are summed when collected."""
+    registry = Metrics()
+    threads = [
+        threading.Thread(target=lambda: registry.inc("hits", (("route", "/"),)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert registry.collect()["counters"] == [["hits", [("route", "/")], 4]]
+
+
+def test_histogram_rendering():
+    """Test the cumulative buckets, sum and count of a histogram."""
+    registry = Metrics()
+    registry.describe("latency", "histogram", "Latency.")
+    registry.observe("latency", (("op", "a"),), 0.003)
+    registry.observe("latency", (("op", "a"),), 20.0)
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP latency Latency.", "# TYPE latency histogram"]
+    assert 'latency_bucket{op="a",le="0.001"} 0' in lines
+    assert 'latency_bucket{op="a",le="0.005"} 1' in lines
+    assert 'latency_bucket{op="a",le="10"} 1' in lines
+    assert 'latency_bucket{op="a",le="+Inf"} 2' in lines
+    assert 'latency_sum{op="a"} 20.003' in lines
+    assert 'latency_count{op="a"} 2' in lines
+
+
+def test_label_escaping():
+    """Test that label values are escaped."""
+    registry = Metrics()
+    registry.inc("hits", (("path", 'a"b\\c\n'),))
+    assert 'hits{path="a\\"b\\\\c\\n"} 1' in registry.render()
+
+
+def test_multiprocess_mode(tmp_path):
+    """Test that the totals of every worker are merged."""
+    first = Metrics(str(tmp_path))
+    second = Metrics(str(tmp_path))
+    first.inc("hits", (("route", "/"),), 2)
+    # Same pid in this test, so write the second worker under another name
+    second.inc("hits", (("route", "/"),), 3)
+    second.flush()
+    (tmp_path / f"metrics-{os.getpid()}.json").rename(tmp_path / "metrics-1.json")
+    assert first.collect()["counters"] == [["hits", [("route", "/")], 5]]
+    first.close()
+    second.close()
+
+
+def test_background_flush(tmp_path):
+    """Test that the totals are written by a background thread, not by inc."""
+    registry = Metrics(str(tmp_path), flush_interval=0.01)
+    registry.inc("hits")
+    filename = tmp_path / f"metrics-{os.getpid()}.json"
+    for _ in range(100):
+        if filename.exists():
+            break
+        time.sleep(0.01)
+    registry.close()
+    assert json.loads(filename.read_text())["counters"] == [["hits", [], 1]]
+
+
+def test_archive_exited_workers(tmp_path):
+    """Test that the files of exited workers are merged into the archive."""
+    registry = Metrics(str(tmp_path))
+    for pid, hits in ((1, 2), (2, 3), (3, 4)):
+        (tmp_path / f"metrics-{pid}.json").write_text(
+            json.dumps({"counters": [["hits", [], hits]], "histograms": []})
+        )
+    registry.archive([1, 2])
+    registry.archive([3])
+    assert sorted(os.listdir(tmp_path)) == ["metrics-archive.json"]
+    assert registry.collect()["counters"] == [["hits", [], 9]]
+
+    # A worker file still there once archived is not counted twice
+    (tmp_path / "metrics-3.json").write_text(
+        json.dumps({"counters": [["hits", [], 4]], "histograms": []})
+    )
+    assert registry.collect()["counters"] == [["hits", [], 9]]
+
+    registry.clear()
+    assert not os.listdir(tmp_path)
+
+
+def test_metrics_endpoint():
+    """Test that requests are counted per route template."""
+    client.get("/apis/v1/helloworld")
+    client.get("/does-not-exist")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'api_requests_total{route="/apis/v1/helloworld",method="GET",status="200"}'
+        in response.text
+    )
+    assert 'api_requests_total{route="unmatched",method="GET",status="404"}' in (
+        response.text
+    )
@@ -0,0 +1,50 @@
+"""Test the pure-ASGI middlewares."""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from api import api
+from api.core import ResponseHeadersMiddleware, TimingMiddleware
+
+client = TestClient(api.app)
+
+
+def test_static_headers():
+    """Test that the X-Backend header is added to every response."""
+    assert client.get("/").headers["X-Backend"] == "Sample API"
+    assert client.get("/missing").headers["X-Backend"] == "Sample API"
+
+
+def test_request_id():
+    """Test that the request ID is echoed, or generated when missing."""
+    response = client.get("/", headers={"X-Request-ID": "abc"})
+    assert response.headers["X-Request-ID"] == "abc"
+    assert len(client.get("/").headers["X-Request-ID"]) == 32
+
+
+def test_timing():
+    """Test the Server-Timing header and that the request still reaches the app."""
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/path")
+    def path(request: Request):
+        return {"path": request.url.path}
+
+    response = TestClient(app).get("/path")
+    assert response.json() == {"path": "/path"}
+    assert response.headers["Server-Timing"].startswith("app;dur=")
+
+
+def test_response_headers_middleware_is_abstract():
+    """Test that subclasses must implement both hooks."""
+
+    class Incomplete(ResponseHeadersMiddleware):
+        """Middleware without `headers`."""
+
+        def begin(self, scope):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete(None)  # pylint: disable=abstract-class-instantiated
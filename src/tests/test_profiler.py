@@ -0,0 +1,93 @@
+"""Test the request profiler."""
+
+import marshal
+import pstats
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import api
+from api.core import Api, Profiler, ProfilerMiddleware
+
+
+client = TestClient(api.app)
+
+
+def busy_handler():
+    """Burn CPU long enough to be sampled."""
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    return {"done": True}
+
+
+def profiled_client(profiler: Profiler) -> TestClient:
+    """Returns a client of a small app wrapped in the profiling middleware."""
+    app = FastAPI()
+    app.get("/busy")(busy_handler)
+    return TestClient(ProfilerMiddleware(app, profiler))
+
+
+def test_sampled_request_is_profiled():
+    """Test that a sampled request lands in the ring buffer with its stacks."""
+    profiler = Profiler(enabled=True, rate=1.0, interval=0.001, capacity=2)
+    http = profiled_client(profiler)
+    for _ in range(3):
+        assert http.get("/busy").status_code == 200
+    assert len(profiler.profiles) == 2
+    summary = profiler.summary("/busy")[0]
+    assert summary["status"] == 200 and summary["samples"] > 0
+    assert "busy_handler (" in profiler.collapsed()
+    stats = marshal.loads(profiler.pstats())
+    assert any(name == "busy_handler" for _, _, name in stats)
+
+
+def test_header_requires_permission():
+    """Test that the profile header is only honored when authorized."""
+    profiler = Profiler(enabled=True, authorize=lambda request: False)
+    http = profiled_client(profiler)
+    http.get("/busy", headers={"X-Profile": "1"})
+    assert not profiler.profiles
+    profiler.authorize = lambda request: "authorization" in request.headers
+    http.get("/busy", headers={"X-Profile": "1", "Authorization": "Bearer x"})
+    assert len(profiler.profiles) == 1
+
+
+def test_pstats_loadable(tmp_path):
+    """Test that the pstats export loads in the standard library viewer."""
+    profiler = Profiler(interval=0.01)
+    main, handler = ("app.py", 1, "main"), ("app.py", 10, "handler")
+    profiler.profiles.append({"route": "/", "stacks": {(main, handler): 3, (main,): 1}})
+    filename = tmp_path / "api.pstats"
+    filename.write_bytes(profiler.pstats())
+    stats = pstats.Stats(str(filename))
+    assert round(stats.total_tt, 3) == 0.04
+    assert stats.stats[handler][4] == {main: (3, 3, 0.03, 0.03)}
+    assert profiler.collapsed() == (
+        "main (app.py:1) 1\nmain (app.py:1);handler (app.py:10) 3\n"
+    )
+
+
+def test_admin_download(auth_header):
+    """Test that admins download the profiles in each format."""
+    profiler = Profiler(enabled=True)
+    profiler.profiles.append(
+        {"route": "/", "status": 200, "stacks": {(("app.py", 1, "main"),): 2}}
+    )
+    path = "/apis/v1alpha/admin/profile"
+    with patch.object(Api, "profiler", profiler):
+        assert client.get(path, headers=auth_header(["user"])).status_code == 403
+        response = client.get(path, headers=auth_header(["admin"]))
+        assert response.json()["data"] == [{"route": "/", "status": 200}]
+        response = client.get(
+            path, params={"format": "collapsed"}, headers=auth_header(["admin"])
+        )
+        assert response.text == "main (app.py:1) 2\n"
+        response = client.get(
+            path, params={"format": "pstats"}, headers=auth_header(["admin"])
+        )
+        assert response.headers["content-type"] == "application/octet-stream"
+    response = client.get(path, headers=auth_header(["admin"]))
+    assert response.status_code == 404
@@ -0,0 +1,72 @@
+"""Test the rate limiter."""
+
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api import api
+from api.core import BucketTable, RateLimiter, SharedBucketTable
+
+client = TestClient(api.app)
+
+
+def test_bucket_table_refills():
+    """Test that a bucket allows its capacity, then refills over time."""
+    table = BucketTable()
+    with patch("api.core.ratelimit.time.monotonic", return_value=100.0):
+        assert table.take("key", 2, 1.0) == 0
+        assert table.take("key", 2, 1.0) == 0
+        assert table.take("key", 2, 1.0) == 1.0
+    with patch("api.core.ratelimit.time.monotonic", return_value=101.0):
+        assert table.take("key", 2, 1.0) == 0
+
+
+def test_bucket_table_sweeps_full_buckets():
+    """Test that idle buckets are dropped lazily."""
+    table = BucketTable(sweep_every=2)
+    with patch("api.core.ratelimit.time.monotonic", return_value=0.0):
+        table.take("idle", 1, 1.0)
+    with patch("api.core.ratelimit.time.monotonic", return_value=10.0):
+        table.take("active", 1, 1.0)
+    assert len(table) == 1
+
+
+def test_shared_bucket_table(tmp_path):
+    """Test that two handles on the same file share their buckets."""
+    first = SharedBucketTable(str(tmp_path / "ratelimit"), slots=64)
+    second = SharedBucketTable(str(tmp_path / "ratelimit"), slots=64)
+    assert first.take("key", 1, 0.001) == 0
+    assert second.take("key", 1, 0.001) > 0
+    assert second.take("other", 1, 0.001) == 0
+    first.close()
+    second.close()
+
+
+def test_parse_rules():
+    """Test parsing the RATE_LIMITS format."""
+    assert RateLimiter.parse_rules("/auth/login=5/60, *=100/1,") == {
+        "/auth/login": (5, 60.0),
+        "*": (100, 1.0),
+    }
+
+
+def test_disabled_by_default():
+    """Test that the limiter has no rules unless RATE_LIMITS sets some."""
+    with patch.dict("os.environ", clear=True):
+        assert not RateLimiter.from_env().rules
+    with patch.dict("os.environ", {"RATE_LIMITS": "/auth/get-token=10/60"}):
+        assert RateLimiter.from_env().rules == {"/auth/get-token": (10.0, 10 / 60)}
+
+
+def test_rate_limited_route():
+    """Test that a route returns 429 with Retry-After once its budget is spent."""
+    limiter = RateLimiter({"/": (2, 60)})
+    with patch.object(api.rate_limiter, "rules", limiter.rules), patch.object(
+        api.rate_limiter, "table", limiter.table
+    ):
+        assert client.get("/").status_code == 200
+        assert client.get("/").status_code == 200
+        response = client.get("/")
+    assert response.status_code == 429
+    assert response.json()["data"] == "Too Many Requests"
+    assert int(response.headers["Retry-After"]) == 30
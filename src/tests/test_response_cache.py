@@ -0,0 +1,155 @@
+"""Test the response cache and conditional GETs."""
+
+from unittest.mock import patch
+
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+from fastapi_utils import Api as FastRestApi
+
+from api import api
+from api.core import Api, ApiResource, ApiResponse, ResponseCache, cache_response
+
+client = TestClient(api.app)
+
+
+class Counter(ApiResource):  # pylint: disable=too-few-public-methods
+    """Resource counting the calls of its handler."""
+
+    calls = 0
+
+    @cache_response(ttl=60, vary="user")
+    def get(self):
+        """Returns the number of calls."""
+        Counter.calls += 1
+        return ApiResponse(status_code=200, data=Counter.calls)
+
+
+def counter_client() -> TestClient:
+    """Returns a client of an app serving the Counter resource."""
+    app = FastAPI()
+    FastRestApi(app).add_resource(Counter(), "/counter")
+    return TestClient(app)
+
+
+def variant(request: Request, _: str):
+    """Keys the callers by their Authorization header."""
+    return request.headers.get("Authorization", "anonymous")
+
+
+def scope_request(path: str, if_none_match: str = "") -> Request:
+    """Returns a GET request to `path`."""
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": headers,
+        }
+    )
+
+
+def body_response() -> Response:
+    """Returns a response with a 10 bytes body."""
+    return Response(b"0123456789")
+
+
+def test_conditional_get():
+    """Test that a matching If-None-Match gets a 304."""
+    with patch.object(Api, "response_cache", ResponseCache()):
+        first = client.get("/apis/v1/helloworld")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "public, max-age=60"
+        second = client.get("/apis/v1/helloworld")
+        assert second.content == first.content
+        assert second.headers["etag"] == etag
+        response = client.get(
+            "/apis/v1/helloworld", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+        assert response.status_code == 304
+        assert not response.content
+        assert response.headers["etag"] == etag
+        stats = Api.response_cache.stats()
+    assert (stats["miss"], stats["hit"], stats["not_modified"]) == (1, 1, 1)
+    assert round(stats["hit_ratio"], 2) == 0.67
+
+
+def test_cached_responses_metadata():
+    """Test that cached bodies only carry metadata when the resource opts in."""
+    with patch.object(Api, "response_cache", ResponseCache()):
+        assert "metatata" not in client.get("/apis/v1alpha/helloworld").json()
+        first = client.get("/apis/v1/helloworld").json()["metatata"]
+        assert client.get("/apis/v1/helloworld").json()["metatata"] == first
+
+
+def test_undeclared_query_parameters_ignored():
+    """Test that made up query parameters share the entry of the route."""
+    with patch.object(Api, "response_cache", ResponseCache()):
+        client.get("/apis/v1/helloworld")
+        for i in range(5):
+            client.get(f"/apis/v1/helloworld?bust={i}")
+        stats = Api.response_cache.stats()
+    assert (stats["entries"], stats["miss"], stats["hit"]) == (1, 1, 5)
+
+
+def test_query_parameters_sorted():
+    """Test that the order of the query parameters does not split the cache."""
+    first = Request({**scope_request("/a").scope, "query_string": b"b=2&a=1"})
+    second = Request({**scope_request("/a").scope, "query_string": b"a=1&b=2"})
+    assert ResponseCache.query(first) == ResponseCache.query(second)
+
+
+def test_handler_skipped_and_varied_per_user():
+    """Test that cached responses skip the handler and vary by caller."""
+    http = counter_client()
+    Counter.calls = 0
+    with patch.object(Api, "response_cache", ResponseCache(variant=variant)):
+        alice = {"Authorization": "alice"}
+        assert http.get("/counter", headers=alice).json()["data"] == 1
+        assert http.get("/counter", headers=alice).json()["data"] == 1
+        response = http.get("/counter", headers={"Authorization": "bob"})
+        assert response.json()["data"] == 2
+        assert response.headers["vary"] == "Authorization"
+        assert response.headers["cache-control"] == "private, max-age=60"
+    assert Counter.calls == 2
+
+
+def test_not_cached_without_variant():
+    """Test that responses varying by caller bypass a cache unable to key them."""
+    http = counter_client()
+    Counter.calls = 0
+    with patch.object(Api, "response_cache", ResponseCache()):
+        http.get("/counter")
+        response = http.get("/counter")
+    assert response.json()["data"] == 2
+    assert "etag" not in response.headers
+
+
+def test_lru_eviction_by_bytes():
+    """Test that the least recently used entries are evicted over the size."""
+    cache = ResponseCache(max_bytes=3 * (ResponseCache.ENTRY_OVERHEAD + 10))
+    options = {"ttl": 60, "vary": None}
+    for path in ("/a", "/b", "/c"):
+        request = scope_request(path)
+        key, _ = cache.lookup(request, options)
+        cache.store(request, key, body_response(), options)
+    cache.lookup(scope_request("/a"), options)  # /b is now the oldest
+    request = scope_request("/d")
+    key, _ = cache.lookup(request, options)
+    cache.store(request, key, body_response(), options)
+    assert cache.lookup(scope_request("/b"), options)[1] is None
+    assert cache.lookup(scope_request("/a"), options)[1] is not None
+    assert cache.stats()["evicted"] == 1
+    assert cache.size == 3 * (ResponseCache.ENTRY_OVERHEAD + 10)
+
+
+def test_expired_entries_are_misses():
+    """Test that entries are dropped once their TTL has elapsed."""
+    cache = ResponseCache()
+    options = {"ttl": 0, "vary": None}
+    request = scope_request("/a")
+    key, _ = cache.lookup(request, options)
+    cache.store(request, key, body_response(), options)
+    assert cache.lookup(request, options)[1] is None
+    assert cache.stats()["entries"] == 0
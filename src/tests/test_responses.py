@@ -0,0 +1,63 @@
+"""Test the JSON response class."""
+
+import asyncio
+import json
+
+import pytest
+from pydantic_core import PydanticSerializationError
+
+from api.core import ApiJSONResponse, ApiResource, ApiResponse
+
+
+def test_render_api_response():
+    """Test that an ApiResponse is rendered straight to JSON bytes."""
+    data = {"users": [{"username": f"user-{i}"} for i in range(1000)], "ids": {1}}
+    response = ApiJSONResponse(content=ApiResponse(status_code=200, data=data))
+    body = json.loads(response.body)
+    assert body["data"]["users"][999] == {"username": "user-999"}
+    assert body["data"]["ids"] == [1]
+    assert body["status_code"] == 200
+
+
+def test_render_plain_content():
+    """Test rendering content that is not a model."""
+    response = ApiJSONResponse(content={"message": "héllo"})
+    assert json.loads(response.body) == {"message": "héllo"}
+
+
+def test_render_unknown_types_fails():
+    """Test that values JSON has no type for are not silently turned into strings."""
+    with pytest.raises(TypeError):
+        ApiJSONResponse(content={"error": ValueError("x")})
+    with pytest.raises(PydanticSerializationError):
+        ApiJSONResponse(content=ApiResponse(status_code=500, data=ValueError("x")))
+
+
+def test_render_non_string_keys_and_big_integers():
+    """Test content orjson can not encode as is."""
+    response = ApiJSONResponse(content={1: "one", "big": 2**70})
+    assert json.loads(response.body) == {"1": "one", "big": 2**70}
+
+
+def test_resource_handlers_render_api_response():
+    """Test that resource handlers return a rendered response."""
+
+    class Resource(ApiResource):  # pylint: disable=too-few-public-methods
+        """Test resource."""
+
+        def get(self):
+            """Sync handler."""
+            return ApiResponse(status_code=200, data="sync")
+
+        async def post(self):
+            """Async handler."""
+            return ApiResponse(status_code=200, data="async")
+
+        async def put(self):
+            """Handler returning something else."""
+            return {"raw": True}
+
+    resource = Resource()
+    assert isinstance(resource.get(), ApiJSONResponse)
+    assert json.loads(asyncio.run(resource.post()).body)["data"] == "async"
+    assert asyncio.run(resource.put()) == {"raw": True}
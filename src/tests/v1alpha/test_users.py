@@ -0,0 +1,83 @@
+"""Test the Users endpoint."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import api
+
+app = api.app
+client = TestClient(app)
+PREFIX_PATH = "/apis"
+
+
+@pytest.fixture(name="async_db_driver")
+def fixture_async_db_driver() -> str:
+    """Serve the users from SQLite."""
+    return "sqlite"
+
+
+@pytest.fixture(name="users", autouse=True)
+def fixture_users(async_db):
+    """Store a few users."""
+    async_db.store.put_many(
+        {f"user-{i}": {"password": "hash", "roles": ["user"]} for i in range(5)}
+    )
+
+
+def test_users_stream(async_db, auth_header):  # pylint: disable=unused-argument
+    """Test that users are streamed as NDJSON without passwords."""
+    response = client.get(
+        f"{PREFIX_PATH}/v1alpha/users", headers=auth_header(["admin"])
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = response.text.splitlines()
+    assert len(lines) == 5
+    assert lines[0] == '{"username": "user-0", "roles": ["user"]}'
+
+
+def test_users_stream_pagination(
+    async_db, auth_header
+):  # pylint: disable=unused-argument
+    """Test the cursor and limit parameters."""
+    response = client.get(
+        f"{PREFIX_PATH}/v1alpha/users",
+        params={"after": "user-1", "limit": 2},
+        headers=auth_header(["admin"]),
+    )
+    assert [line.split('"')[3] for line in response.text.splitlines()] == [
+        "user-2",
+        "user-3",
+    ]
+
+
+def test_users_stream_negative_limit(
+    async_db, auth_header
+):  # pylint: disable=unused-argument
+    """Test that a negative limit is rejected."""
+    response = client.get(
+        f"{PREFIX_PATH}/v1alpha/users",
+        params={"limit": -1},
+        headers=auth_header(["admin"]),
+    )
+    assert response.status_code == 422
+
+
+def test_users_stream_requires_admin(
+    async_db, auth_header
+):  # pylint: disable=unused-argument
+    """Test that only admins can list users."""
+    response = client.get(f"{PREFIX_PATH}/v1alpha/users", headers=auth_header(["user"]))
+    assert response.status_code == 403
+
+
+def test_users_stream_by_role(async_db, auth_header):
+    """Test filtering the users by role."""
+    async_db.store.update("user-3", {"password": "hash", "roles": ["admin"]})
+    response = client.get(
+        f"{PREFIX_PATH}/v1alpha/users",
+        params={"role": "admin"},
+        headers=auth_header(["admin"]),
+    )
+    assert response.text == '{"username": "user-3", "roles": ["admin"]}\n'